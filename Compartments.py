@@ -0,0 +1,159 @@
+import numpy as np
+from scipy import sparse, integrate
+from scipy.sparse import linalg
+from RTD import RTDResult
+import FigureBuilder
+
+# Compartment models of large non-ideal reactors
+# A reactor is split into well-mixed compartments of volume V_j joined by
+# streams (from, to, flow) between the feed 'in', the compartments and the
+# outlet 'out' (the same description as Network). The tracer balance
+#   V_j dc_j/dt = sum_i q_ij c_i + q_in,j c_in - (outflow of j) c_j
+# is a sparse linear system dc/dt = A c + b c_in, with one nonzero per stream,
+# so thousands of compartments cost little more than a few. Responses come from
+# the action of the matrix exponential on a vector (scipy expm_multiply, no
+# dense exp(A t) is ever formed) or, for stiff systems, from an implicit BDF
+# integrator using the sparse A as its Jacobian. result() gives an RTDResult
+# for the C/E/F figures.
+
+# Time points of a response (uniform from 0 to time_end)
+POINTS = 500
+# |A| time_end above which the implicit integrator is faster than expm_multiply
+STIFF = 2000
+# Most compartments in series the real reactor page asks for (about a second with dead zones)
+MAX_COMPARTMENTS = 2000
+
+class Compartments:
+
+    def __init__(self, volumes, streams):
+        # volumes: {name: V}; streams: [(from, to, flow)]
+        self.names = list(volumes)
+        index = {name: i for i, name in enumerate(self.names)}
+        size = len(self.names)
+        self.volumes = np.array([volumes[name] for name in self.names], dtype=float)
+        if (self.volumes <= 0).any():
+            raise ValueError("Compartment volumes must be positive")
+
+        rows, cols, flows = [], [], []
+        inflow = np.zeros(size)
+        outflow = np.zeros(size)
+        self.feed = np.zeros(size)
+        self.outlet = np.zeros(size)
+        self.direct = 0.
+        for source, target, flow in streams:
+            if source not in index and source != 'in' or target not in index and target != 'out' or flow < 0:
+                raise ValueError("Unknown stream {} -> {}".format(source, target))
+            if source in index:
+                outflow[index[source]] += flow
+            if target in index:
+                inflow[index[target]] += flow
+            if source == 'in' and target == 'out':
+                self.direct += flow
+            elif source == 'in':
+                self.feed[index[target]] += flow
+            elif target == 'out':
+                self.outlet[index[source]] += flow
+            else:
+                rows.append(index[target])
+                cols.append(index[source])
+                flows.append(flow)
+        if not np.allclose(inflow, outflow):
+            raise ValueError("Flows into and out of every compartment must balance")
+        self.flow = self.feed.sum() + self.direct
+        if self.flow == 0 or not np.isclose(self.outlet.sum() + self.direct, self.flow):
+            raise ValueError("Flow into the reactor must equal the flow out of it")
+
+        # A = V^-1 (exchange - diag(outflow)); duplicate streams are summed by the COO -> CSR conversion
+        exchange = sparse.coo_matrix((flows, (rows, cols)), shape=(size, size)).tocsr()
+        self.A = (sparse.diags(1/self.volumes) @ (exchange - sparse.diags(outflow))).tocsr()
+        self.b = self.feed / self.volumes
+        # Mean residence time of the whole reactor
+        self.tau = self.volumes.sum() / self.flow
+
+    def outlet_concentration(self, c):
+        # Flow weighted mix of the streams to the outlet (c: compartments x times), without the direct stream
+        return self.outlet @ c / self.flow
+
+    def pulse(self, time_end, num=POINTS, method="auto"):
+        # E(t): an amount of tracer equal to the feed flow (so the areas come out as 1) injected at t = 0,
+        # spread over the compartments the feed enters. The directly bypassed part leaves at t = 0 and is
+        # not in E (instant fraction: self.direct/self.flow)
+        c = self.evolve(self.A, self.b, time_end, num, method)
+        return self.outlet_concentration(c)
+
+    def step(self, time_end, num=POINTS, method="auto"):
+        # F(t): feed concentration 1 from t = 0. The constant feed is carried as one more state with
+        # derivative 0, so the same matrix exponential gives the forced response
+        size = len(self.names)
+        A = sparse.bmat([[self.A, sparse.csr_matrix(self.b[:, None])],
+                         [None, sparse.csr_matrix((1, 1))]]).tocsr()
+        c0 = np.zeros(size + 1)
+        c0[-1] = 1
+        c = self.evolve(A, c0, time_end, num, method)[:size]
+        return self.outlet_concentration(c) + self.direct/self.flow
+
+    def evolve(self, A, c0, time_end, num, method):
+        # c(t) = exp(A t) c0 at num uniform times from 0 to time_end, as a (states x times) array
+        # "auto" takes expm_multiply unless the system is stiff over the run (its cost grows with
+        # |A| time_end: small compartments with large flows), then the implicit integrator
+        if method == "auto":
+            method = "expm" if linalg.onenormest(A) * time_end < STIFF else "implicit"
+        if method == "expm":
+            return linalg.expm_multiply(A, c0, start=0, stop=time_end, num=num, endpoint=True).T
+        # Variable step BDF with the sparse A as its Jacobian (one sparse LU per step size change)
+        solution = integrate.solve_ivp(lambda t, c: A @ c, (0, time_end), c0, method='BDF', jac=A,
+                                       t_eval=np.linspace(0, time_end, num), rtol=1e-6, atol=1e-9*np.abs(c0).max())
+        return solution.y
+
+    def result(self, time_end=None, num=POINTS, method="auto", amount=100):
+        # time, C, E and F for the RTD views; C is the outlet concentration of a pulse of `amount`
+        # (the ideal pages' 100 units) injected into the feed
+        time_end = time_end or self.tau*5
+        time = np.linspace(0, time_end, num)
+        E = self.pulse(time_end, num, method)
+        F = self.step(time_end, num, method)
+        return RTDResult(time, C=amount/self.flow*E, E=E, F=F, dt=time[1], time_end=time_end)
+
+def backmixed_chain(V, Q, n, backflow=0, dead_fraction=0, exchange=0):
+    # n equal compartments in series with a backflow between neighbours, each with a stagnant side
+    # compartment of dead_fraction of its volume swapping `exchange` flow with it
+    # (backflow 0 and no dead zones: n tanks in series)
+    volumes, streams = {}, [('in', 'c0', Q), ('c{}'.format(n - 1), 'out', Q)]
+    for i in range(n):
+        volumes['c{}'.format(i)] = V * (1 - dead_fraction) / n
+        if i + 1 < n:
+            streams += [('c{}'.format(i), 'c{}'.format(i + 1), Q + backflow),
+                        ('c{}'.format(i + 1), 'c{}'.format(i), backflow)]
+        if dead_fraction and exchange:
+            volumes['d{}'.format(i)] = V * dead_fraction / n
+            streams += [('c{}'.format(i), 'd{}'.format(i), exchange), ('d{}'.format(i), 'c{}'.format(i), exchange)]
+    return Compartments(volumes, streams)
+
+def figures(result, title="Compartment Model"):
+    # C, E and F figures in the layouts of the ideal reactor page (E and F played by its Display buttons)
+    end = result.time[-1]
+    C = FigureBuilder.figure(
+        data=[FigureBuilder.scatter(result.time, result.C)],
+        layout=FigureBuilder.layout('rtd_C',
+            xaxis=dict(range=[0, end]),
+            yaxis=dict(range=[0, result.C.max()*1.1]),
+            title=title + ": Plot of Concentration against Time",
+        )
+    )
+    E = FigureBuilder.figure(
+        data=[FigureBuilder.scatter([], [])],
+        layout=FigureBuilder.layout('rtd_E',
+            xaxis=dict(range=[0, end]),
+            yaxis=dict(range=[0, result.E.max()*1.1]),
+            title=title + ": Plot of E against Time",
+        ), frames=result.frames('E')
+    )
+    F = FigureBuilder.figure(
+        data=[FigureBuilder.scatter([], [])],
+        layout=FigureBuilder.layout('rtd_F',
+            xaxis=dict(range=[0, end]),
+            yaxis=dict(range=[0, max(result.F.max(), 1)*1.1]),
+            title=title + ": Plot of F against Time",
+        ), frames=result.frames('F')
+    )
+    return C, E, F
@@ -0,0 +1,105 @@
+import numpy as np
+from scipy import integrate, sparse
+
+# Conversion of an nth order reaction  -r = k C^order  from an RTD
+# The tracer curves say how long fluid stays, not when it mixes; the two
+# limits of early and late mixing bound the conversion of any reactor with
+# that RTD:
+#   segregation:        X = integral of X_batch(t) E(t) dt
+#                       (every fluid element is a batch reactor)
+#   maximum mixedness:  Zwietering's equation in the life expectancy lambda,
+#                       dX/dlambda = -k C0^(order-1) (1 - X)^order + E/(1 - F) X,
+#                       integrated from the tail of the RTD back to lambda = 0
+# Both work on the time, E and F arrays of an RTDResult (RTD.kernel, Real_RTD's
+# curves, Experiment or Compartments) on any grid, and are vectorized over
+# rate constants and orders: k and order broadcast against each other and X
+# has their shape, so a whole conversion against Damkohler number curve is one
+# call. A bypass (F(0) > 0) leaves unreacted.
+
+# 1 - F below which the RTD tail is cut for maximum mixedness (the exit rate dF/(1 - F) is 0/0 past it)
+TAIL = 1e-6
+# Gauss-Legendre points per grid interval for segregation (the batch conversion bends much faster
+# than E for fast reactions, and the plotted grids are sparse where E is flat)
+NODES = 4
+
+def rate_constant(k, order, C0):
+    # k C0^(order - 1): the batch and Zwietering equations in X only depend on this
+    k, order = np.broadcast_arrays(np.asarray(k, dtype=float), np.asarray(order, dtype=float))
+    return k * float(C0)**(order - 1), order
+
+def batch(t, k, order=1, C0=1):
+    # X(t) of a batch reactor for every (k, order), shape broadcast(k, order) + t.shape
+    t = np.asarray(t, dtype=float)
+    kC, order = rate_constant(k, order, C0)
+    kC, order = (p.reshape(p.shape + (1,)*t.ndim) for p in (kC, order))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # C/C0 = (1 + (order - 1) kC t)^(1/(1 - order)); below first order the reactant runs out at a finite time
+        base = np.maximum(1 + (order - 1)*kC*t, 0)
+        remaining = np.where(order == 1, np.exp(-kC*t), base**(1/(1 - order)))
+    return 1 - np.nan_to_num(remaining, nan=0., posinf=0.)
+
+def segregation(time, E, k, order=1, C0=1, F=None):
+    # The amount of fluid leaving in each grid interval is taken from F (the running integral of E when
+    # F is not given) and spread over the interval in proportion to E, linear between the grid points.
+    # That way the bypass, drawn as a spike in E on the first interval but already in F(0), leaves
+    # unreacted at t = 0, and fluid still inside at the end of the grid (1 - F) leaves at the last time
+    time = np.asarray(time, dtype=float)
+    E = np.asarray(E, dtype=float)
+    if F is None:
+        F = np.concatenate([[0], np.cumsum((E[1:] + E[:-1]) / 2 * np.diff(time))])
+    F = np.asarray(F, dtype=float)
+    x, w = np.polynomial.legendre.leggauss(NODES)
+    x, w = (x + 1)/2, w/2
+    shape = (E[:-1, None]*(1 - x) + E[1:, None]*x) * w
+    total = shape.sum(axis=1, keepdims=True)
+    shape = np.where(total > 0, shape / np.where(total > 0, total, 1), w)
+    t = time[:-1, None] + x*np.diff(time)[:, None]
+    share = np.diff(F)[:, None] * shape
+    return (batch(t, k, order, C0) * share).sum(axis=(-2, -1)) + max(1 - F[-1], 0) * batch(time[-1], k, order, C0)
+
+def maximum_mixedness(time, F, k, order=1, C0=1, rtol=1e-6):
+    # The exit rate E/(1 - F) is taken as constant over each grid interval, with the exact integral
+    # ln((1 - F_i)/(1 - F_i+1)) of dF/(1 - F) over it, so it only needs F (spikes in E do not matter)
+    time = np.asarray(time, dtype=float)
+    unmixed = 1 - np.asarray(F, dtype=float)
+    kC, order = rate_constant(k, order, C0)
+    shape = kC.shape
+    kC, order = kC.ravel(), order.ravel()
+
+    end = np.flatnonzero(unmixed > TAIL)[-1]
+    time, unmixed = time[:end + 1], unmixed[:end + 1]
+    exit_rate = np.log(unmixed[:-1] / unmixed[1:]) / np.diff(time)
+
+    def h(lam):
+        return exit_rate[np.clip(np.searchsorted(time, lam) - 1, 0, exit_rate.size - 1)]
+
+    # Start at the cut, at the X that makes dX/dlambda = 0 there (the late tail of most RTDs has a
+    # nearly constant exit rate), found by bisection: hX - kC (1 - X)^order rises with X
+    low, high = np.zeros_like(kC), np.ones_like(kC)
+    for _ in range(50):
+        X = (low + high) / 2
+        rising = exit_rate[-1]*X - kC*(1 - X)**order > 0
+        high = np.where(rising, X, high)
+        low = np.where(rising, low, X)
+
+    def slope(lam, X):
+        return -kC*np.clip(1 - X, 0, 1)**order + h(lam)*X
+
+    def jacobian(lam, X):
+        left = np.clip(1 - X, 1e-12, 1)
+        return sparse.diags(kC*order*left**(order - 1) + h(lam))
+
+    # Stiff for fast reactions, so BDF with the (diagonal) Jacobian; max_step keeps it from stepping
+    # over short intervals of high exit rate
+    solution = integrate.solve_ivp(slope, (time[-1], 0), (low + high)/2, method='BDF', jac=jacobian,
+                                   rtol=rtol, atol=1e-9, max_step=time[-1]/200)
+    # The bypass (1 - F(0) short of 1) joins with X = 0 at the outlet
+    return (np.clip(solution.y[:, -1], 0, 1) * unmixed[0]).reshape(shape)
+
+def damkohler_curve(result, tau, Da, order=1, model="segregation"):
+    # X against Da = k tau C0^(order - 1) for an RTDResult of a reactor with mean residence time tau
+    # (C0 = 1, so k = Da/tau)
+    k = np.asarray(Da, dtype=float) / tau
+    if model == "segregation":
+        return segregation(result.time, result.E, k, order, F=result.F)
+    return maximum_mixedness(result.time, result.F, k, order)
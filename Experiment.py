@@ -0,0 +1,289 @@
+import os
+import sys
+import time as clock
+import itertools
+import numpy as np
+from RTD import RTDResult, C_DT, PLAYBACK_SPEED
+import RTDModels
+import FigureBuilder
+
+# Experimental RTD from tracer logs
+# A log is rows of (time, outlet concentration), sorted by time, either as
+# text (comma, tab, semicolon or whitespace delimited, told apart on the first
+# data row, after any header lines) or binary (a .npy array of shape (rows, 2)
+# or more columns, or raw float64 pairs). Logs can have millions of rows, so they are
+# read in chunks (text) or memory mapped (binary) and never held in RAM whole.
+# Each chunk goes through Moments.add once: that accumulates the area under C,
+# the mean residence time, variance and skewness of E(t) = C / area (all as
+# trapezoid integrals, merged chunk by chunk with the pairwise update of
+# Chan/Pebay so large offsets in t do not cancel), and keeps a thinned copy of
+# the curve with its running area for the E and F plots.
+# Live feeds (a sensor read sample by sample) go through Moments.sample
+# instead, which updates the same sums in O(1) per sample and keeps no curve:
+# E and F of each sample are then C and the running area over the pulse's
+# whole area (the injected amount over the flow for the simulated sensor, one
+# pass over the file for a recorded log), while the mean and variance are
+# estimates over the area so far that settle as the tail comes in.
+
+# Rows parsed or sliced at once
+CHUNK_ROWS = 500_000
+
+# Most points kept for the E/F plots
+PLOT_POINTS = 1000
+
+# Simulated sensor: tracer injected (as on the ideal page), relative noise, and the dispersion number
+# that stands for a real PFR (the sensor never sees a perfect spike)
+SENSOR_AMOUNT = 100
+SENSOR_NOISE = .02
+SENSOR_DISPERSION = .005
+# Most samples a live stream sends (the sample spacing grows past C_DT for long residence times,
+# and recorded logs are thinned), the playback speeds a stream may ask for and the longest it may
+# run in wall clock seconds (it holds a server thread all the while)
+MAX_STREAM_ROWS = 2000
+MIN_STREAM_SPEED = 1
+MAX_STREAM_SPEED = 1000
+MAX_STREAM_SECONDS = 120
+
+# Text delimiters tried on the first data row, in order (None: any whitespace)
+DELIMITERS = [',', '\t', ';', None]
+
+def read_text(path, delimiter="auto", chunk_rows=CHUNK_ROWS):
+    # (time, C) chunks of a text log. Lines before the first row of two numbers (headers, units) are
+    # skipped, so loadtxt parses every chunk; lines that are not two numbers further down (blank
+    # lines, comments) send their chunk through the slower line by line parse
+    with open(path) as f:
+        for line in f:
+            if delimiter == "auto":
+                found = sniff(line)
+            else:
+                found = delimiter if is_row(line, delimiter) else "auto"
+            if found != "auto":
+                break
+        else:
+            return
+        delimiter = found
+        lines = [line] + list(itertools.islice(f, chunk_rows - 1))
+        while lines:
+            try:
+                data = np.loadtxt(lines, delimiter=delimiter, usecols=(0, 1), ndmin=2)
+            except ValueError:
+                rows = [line.split(delimiter)[:2] for line in lines if is_row(line, delimiter)]
+                data = np.array(rows, dtype=float).reshape(-1, 2)
+            if len(data):
+                yield data[:, 0], data[:, 1]
+            lines = list(itertools.islice(f, chunk_rows))
+
+def sniff(line):
+    # The first delimiter that splits the line into two numbers (or more), "auto" if none does
+    for delimiter in DELIMITERS:
+        if is_row(line, delimiter):
+            return delimiter
+    return "auto"
+
+def is_row(line, delimiter):
+    fields = line.split(delimiter)
+    return len(fields) >= 2 and is_number(fields[0]) and is_number(fields[1])
+
+def is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+def read_binary(path, chunk_rows=CHUNK_ROWS):
+    # (time, C) chunks of a memory mapped .npy file (time and C in its first two columns) or raw
+    # float64 (time, C) pairs
+    if str(path).endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        if data.ndim != 2 or data.shape[1] < 2:
+            raise ValueError("A .npy tracer log must have shape (rows, 2) or more columns")
+    else:
+        if os.path.getsize(path) % 16:
+            raise ValueError("A raw tracer log must be whole float64 (time, C) pairs")
+        data = np.memmap(path, dtype='<f8', mode='r').reshape(-1, 2)
+    for start in range(0, len(data), chunk_rows):
+        chunk = np.asarray(data[start:start + chunk_rows], dtype=float)
+        yield chunk[:, 0], chunk[:, 1]
+
+def read(path, **kwargs):
+    if str(path).endswith(('.npy', '.bin', '.dat', '.f8')):
+        return read_binary(path, **kwargs)
+    return read_text(path, **kwargs)
+
+def replay(path, stride=1, **kwargs):
+    # (t, C) rows of a recorded log, one at a time (every stride-th row)
+    rows = (row for t, C in read(path, **kwargs) for row in zip(t.tolist(), C.tolist()))
+    yield from itertools.islice(rows, 0, None, stride)
+
+def sensor(reactorType, tau, flow, n=1, dt=None, time_end=None, noise=SENSOR_NOISE, seed=None):
+    # (t, C) rows of a simulated outlet sensor after a pulse: the model curve with normal noise of
+    # `noise` times its peak, never below 0. Samples are C_DT apart, or fewer for long runs
+    time_end = time_end or (tau*2 if reactorType == "pfr" else tau*5)
+    dt = dt or max(C_DT, time_end/MAX_STREAM_ROWS)
+    time = RTDModels.time_grid(dt, time_end)
+    if reactorType == "pfr":
+        E = RTDModels.dispersion(time, tau, SENSOR_DISPERSION)[0]
+    else:
+        E = RTDModels.ncstr(time, tau, n)[0]
+    C = SENSOR_AMOUNT / flow * E
+    C = np.maximum(C + np.random.default_rng(seed).normal(0, noise*C.max(), C.size), 0)
+    yield from zip(time.tolist(), C.tolist())
+
+def paced(rows, speed=PLAYBACK_SPEED, seconds=MAX_STREAM_SECONDS):
+    # Rows released as they would arrive from the plant, `speed` seconds of log time per second,
+    # until the rows run out or the next one is due more than `seconds` after the first
+    start = None
+    for t, C in rows:
+        if start is None:
+            start = (clock.monotonic(), t)
+        due = (t - start[1])/speed
+        if due > seconds:
+            return
+        wait = start[0] + due - clock.monotonic()
+        if wait > 0:
+            clock.sleep(wait)
+        yield t, C
+
+class Moments:
+    # One pass accumulator for a tracer log fed in time order, chunk by chunk
+
+    def __init__(self, points=PLOT_POINTS):
+        self.points = points
+        # Trapezoid weights of the time values: area, weighted mean, 2nd and 3rd central sums
+        self.area = 0.
+        self.mean = 0.
+        self.M2 = 0.
+        self.M3 = 0.
+        # Running trapezoid area (plain sum, for F) and rows seen
+        self.area_before = 0.
+        self.rows = 0
+        self.last = None
+        # Thinned curve: every stride-th row, with the area up to it
+        self.stride = 1
+        self.kept = []
+
+    def add(self, t, C):
+        t = np.asarray(t, dtype=float)
+        C = np.asarray(C, dtype=float)
+        if self.last is not None:
+            # Interval between the end of the previous chunk and the start of this one
+            t = np.concatenate([[self.last[0]], t])
+            C = np.concatenate([[self.last[1]], C])
+            first = self.rows - 1
+        else:
+            first = 0
+        if t.size == 0:
+            return
+
+        # Each interval's trapezoid splits into half a C*dt weight at either end
+        half = np.diff(t) / 2
+        times = np.concatenate([t[:-1], t[1:]])
+        weights = np.concatenate([C[:-1]*half, C[1:]*half])
+        self.merge(times, weights)
+
+        running = self.area_before + np.concatenate([[0], np.cumsum((C[:-1] + C[1:]) * half)])
+        self.area_before = running[-1]
+        self.keep(first, t, C, running)
+        self.rows = first + t.size
+        self.last = (t[-1], C[-1])
+
+    def sample(self, t, C):
+        # One row: the trapezoid of the interval since the last row is two weights, merged as a chunk
+        if self.last is not None:
+            t0, C0 = self.last
+            half = (t - t0) / 2
+            self.merge(np.array([t0, t]), np.array([C0*half, C*half]))
+            self.area_before += (C0 + C) * half
+        self.rows += 1
+        self.last = (t, C)
+
+    def live(self, total):
+        # The last row with E and F over the pulse's whole area `total`, and the mean and variance
+        # as known so far (None before there is any area)
+        t, C = self.last
+        known = self.area > 0
+        return {'t': t, 'C': C, 'rows': self.rows, 'area': self.area, 'E': C / total, 'F': self.area / total,
+                'mean': self.mean if known else None, 'variance': self.variance if known else None}
+
+    def merge(self, times, weights):
+        W = weights.sum()
+        if W == 0:
+            return
+        mean = (weights*times).sum() / W
+        d = times - mean
+        M2 = (weights*d**2).sum()
+        M3 = (weights*d**3).sum()
+        total = self.area + W
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.M3 += M3 + delta**3 * self.area*W*(self.area - W)/total**2 + 3*delta*(self.area*M2 - W*self.M2)/total
+        self.M2 += M2 + delta**2 * self.area*W/total
+        self.mean += delta * W/total
+        self.area = total
+
+    def keep(self, first, t, C, running):
+        # Rows whose index is a multiple of the stride; the stride doubles whenever too many are kept
+        index = first + np.arange(t.size)
+        if self.rows:
+            # The carried row was kept (or not) with the previous chunk
+            index, t, C, running = index[1:], t[1:], C[1:], running[1:]
+        mask = index % self.stride == 0
+        self.kept.append(np.stack([index[mask], t[mask], C[mask], running[mask]], axis=1))
+        while sum(len(k) for k in self.kept) > 2*self.points:
+            self.stride *= 2
+            self.kept = [k[k[:, 0] % self.stride == 0] for k in self.kept]
+
+    @property
+    def variance(self):
+        return self.M2 / self.area
+
+    @property
+    def skewness(self):
+        return self.M3 / self.area / self.variance**1.5
+
+    def summary(self):
+        return {'rows': self.rows, 'area': self.area, 'mean': self.mean,
+                'variance': self.variance, 'skewness': self.skewness}
+
+    def result(self):
+        # E and F of the thinned curve, normalized by the whole log's area
+        kept = np.concatenate(self.kept)
+        return RTDResult(kept[:, 1], C=kept[:, 2], E=kept[:, 2]/self.area, F=kept[:, 3]/self.area)
+
+def ingest(path, points=PLOT_POINTS, **kwargs):
+    moments = Moments(points)
+    for t, C in read(path, **kwargs):
+        moments.add(t, C)
+    if moments.area == 0:
+        raise ValueError("Tracer log has no area under the concentration curve")
+    return moments
+
+def figures(moments):
+    # E and F figures in the layouts of the ideal reactor page, played by its Display buttons
+    result = moments.result()
+    end = result.time[-1]
+    title = " (mean {:.2f} s, variance {:.2f} s^2, skewness {:.2f})".format(moments.mean, moments.variance, moments.skewness)
+    E = FigureBuilder.figure(
+        data=[FigureBuilder.scatter([], [], name="Experiment")],
+        layout=FigureBuilder.layout('rtd_E',
+            xaxis=dict(range=[result.time[0], end]),
+            yaxis=dict(range=[0, result.E.max()*1.1]),
+            title="Experimental RTD: Plot of E against Time" + title,
+        ), frames=result.frames('E', name="Experiment")
+    )
+    F = FigureBuilder.figure(
+        data=[FigureBuilder.scatter([], [], name="Experiment")],
+        layout=FigureBuilder.layout('rtd_F',
+            xaxis=dict(range=[result.time[0], end]),
+            yaxis=dict(range=[0, max(result.F.max(), 1)*1.1]),
+            title="Experimental RTD: Plot of F against Time",
+        ), frames=result.frames('F', name="Experiment")
+    )
+    return E, F
+
+if __name__ == "__main__":
+    # python Experiment.py tracer.csv
+    for key, value in ingest(sys.argv[1]).summary().items():
+        print("{}: {:g}".format(key, value))
@@ -0,0 +1,261 @@
+import json
+import plotly.io as pio
+import plotly.colors
+import FigureJSON
+
+# Validation-free figure builder
+# go.Figure/go.Scatter/update_layout validate every property on each request.
+# Our layouts never change between requests, so they are kept here as prebuilt
+# plain-dict skeletons (already in the normalised form plotly would produce)
+# and each request only fills in trace data, ranges and titles.
+# validate() checks a built figure against plotly once, e.g. `python FigureBuilder.py`.
+
+# Resolved once; plotly.js does not know template names, only their contents
+DARK_TEMPLATE = pio.templates['plotly_dark'].to_plotly_json()
+
+# Named colorscales are resolved to their stops by plotly, and plotly.js would draw its own version of the name
+VIRIDIS = plotly.colors.get_colorscale('Viridis')
+
+FONT = {'family': "Helvetica Neue, monospace", 'size': 12, 'color': "#FFFFFF"}
+LEGEND = {'orientation': "h", 'yanchor': "bottom", 'y': 1.02, 'xanchor': "right", 'x': 1}
+
+def animate_menu(redraw, duration=0):
+    # "Display" button that plays the frames of an E/F plot (duration ms per frame)
+    return [{
+        'bgcolor': 'grey',
+        'font': {'color': 'black', 'family': "Helvetica Neue, monospace", 'size': 12},
+        'type': "buttons",
+        'buttons': [{'label': "Display",
+                     'method': "animate",
+                     'args': [None, {"frame": {"duration": duration, "redraw": redraw},
+                                     "fromcurrent": True,
+                                     "transition": {"duration": 0}}]}]
+    }]
+
+# One skeleton per chart type
+LAYOUTS = {
+    # plot (binary VLE): title/axis titles filled in per plot
+    'binary': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'legend': LEGEND,
+        'font': FONT,
+        'xaxis': {'showspikes': True},
+        'yaxis': {'showspikes': True},
+    },
+    # plot_steam
+    'steam': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'title': {'text': "<b>Vaporization Curve of Water</b>"},
+        'xaxis': {'title': {'text': "Temperature" + chr(176) + "C"}, 'showspikes': True},
+        'yaxis': {'title': {'text': "Pressure (kPa)"}, 'showspikes': True},
+        'legend': LEGEND,
+        'font': FONT,
+    },
+    # GvsP / GvsT
+    'gibbs': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'legend': LEGEND,
+        'font': FONT,
+    },
+    # PhaseMap.phase_map: V/F heatmap over the T-P plane
+    'phasemap': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'title': {'text': "Temperature (" + chr(176) + "C)"}},
+        'yaxis': {'title': {'text': "Pressure (kPa)"}},
+        'legend': LEGEND,
+        'font': FONT,
+    },
+    # RTD concentration plots (animated from the page, so no frames)
+    'rtd_C': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Concentration (mol/m3)"}},
+    },
+    # RTD E and F plots, played with the Display button
+    'rtd_E': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Exit Age Function (1/s)"}},
+        'updatemenus': animate_menu(False),
+    },
+    'rtd_F': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Cumulative Distribution Function"}},
+        'updatemenus': animate_menu(False),
+    },
+    # Real_RTD E and F plots: ideal curve drawn alongside, so they carry a legend
+    'real_E': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Exit Age Function (1/s)"}},
+        'legend': dict(LEGEND, title={'text': 'Legend'}),
+        'updatemenus': animate_menu(True),
+    },
+    'real_F': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Cumulative Distribution Function"}},
+        'legend': dict(LEGEND, title={'text': 'Legend'}),
+        'updatemenus': animate_menu(True),
+    },
+    # Real_RTD.sweep_figures: one frame per value of the swept parameter, played by the Display button
+    # or picked with the slider (filled per request with frame_slider)
+    'sweep_E': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Exit Age Function (1/s)"}},
+        'updatemenus': animate_menu(False, 150),
+    },
+    'sweep_F': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Time (s)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Cumulative Distribution Function"}},
+        'updatemenus': animate_menu(False, 150),
+    },
+    # AxialDispersion concentration profiles, one frame per time
+    'axial_profile': {
+        'template': DARK_TEMPLATE,
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'xaxis': {'autorange': False, 'title': {'text': "Axial Position (z/L)"}},
+        'yaxis': {'autorange': False, 'title': {'text': "Concentration"}},
+        'updatemenus': animate_menu(False, 100),
+    },
+}
+
+def merge(base, fill):
+    # Returns base updated with fill, recursing into nested dicts. base is never modified
+    result = dict(base)
+    for key, value in fill.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+def layout(name, title=None, xaxis_title=None, yaxis_title=None, **fill):
+    # Skeleton `name` with the per-request parts filled in
+    if title is not None:
+        fill['title'] = {'text': title}
+    if xaxis_title is not None:
+        fill['xaxis'] = merge(fill.get('xaxis', {}), {'title': {'text': xaxis_title}})
+    if yaxis_title is not None:
+        fill['yaxis'] = merge(fill.get('yaxis', {}), {'title': {'text': yaxis_title}})
+    return merge(LAYOUTS[name], fill)
+
+def scatter(x, y, **props):
+    # Same dict go.Scatter(x=x, y=y, **props) would hold, using nested dicts (line={'color': ...}) for styles
+    trace = {'type': 'scatter', 'x': x, 'y': y}
+    trace.update(props)
+    return trace
+
+def annotation(x, y, text, font_size, **props):
+    # Same as fig.add_annotation(..., font_size=..., font_color="black", bgcolor="white", showarrow=False)
+    note = {'x': x, 'y': y, 'text': text, 'showarrow': False, 'bgcolor': "white",
+            'font': {'size': font_size, 'color': "black"}}
+    note.update(props)
+    return note
+
+def frame_slider(names):
+    # Slider with one step per named frame, jumping straight to it
+    return [{
+        'active': 0,
+        'steps': [{'label': name,
+                   'method': "animate",
+                   'args': [[name], {"frame": {"duration": 0, "redraw": False},
+                                     "mode": "immediate",
+                                     "transition": {"duration": 0}}]} for name in names]
+    }]
+
+def figure(data, layout, frames=None, names=None):
+    # names: optional frame names (for frame_slider)
+    fig = {'data': data, 'layout': layout}
+    if frames:
+        fig['frames'] = [{'data': frame} for frame in frames]
+        for frame, name in zip(fig['frames'], names or []):
+            frame['name'] = name
+    return fig
+
+def to_plotly(fig):
+    # Full (validated) go.Figure, for fig.show() while testing
+    import plotly.graph_objects as go
+    return go.Figure(fig)
+
+def validate(fig):
+    # Runs plotly's validation on a built figure and checks nothing was renamed or dropped
+    expected = json.loads(FigureJSON.dumps(to_plotly(fig)))
+    built = json.loads(FigureJSON.dumps(fig))
+    if expected != built:
+        raise ValueError("Figure does not match its validated form: {}".format(fig['layout'].get('title')))
+    return True
+
+def validate_all():
+    # Builds every chart type once and validates it
+    from VLECalculations import RachfordRice, Steam
+    from Plot import plot, plot_steam, GvsP, GvsT
+    from RTD import RTD
+    from Real_RTD import Real_RTD
+
+    figs = []
+    for method in ['plot_yx_constP', 'plot_yx_constT', 'plot_Pxy', 'plot_Txy']:
+        binary = plot(RachfordRice(2, 30, 500, ['Propane', 'n-Butane'], [0.4, 0.6]))
+        getattr(binary, method)()
+        figs.append(binary.fig)
+    steam = Steam(50, 100)
+    steam.instantiate()
+    steamplot = plot_steam(steam)
+    steamplot.plot_steamVLE()
+    figs.append(steamplot.fig)
+    figs.append(json.loads(GvsP(50)[0]))
+    figs.append(json.loads(GvsT(1)[0]))
+
+    for tracer in ['pulse', 'step']:
+        system = RTD(15, 2, tracer)
+        for method, args in [('PFR', ()), ('PFR_E', ()), ('PFR_F', ()), ('CSTR', (1,)), ('CSTR_E', (1,)), ('CSTR_F', (1,))]:
+            getattr(system, method)(*args)
+            figs.append(system.fig)
+        system.inlet_C('cstr' if tracer == 'pulse' else 'pfr', 'square', 4)
+        figs.append(system.fig)
+        for method in ['dispersion_E', 'dispersion_F']:
+            getattr(system, method)([1, 10, 100], 'open' if tracer == 'pulse' else 'closed')
+            figs.append(system.fig)
+        realsystem = Real_RTD(20, 2, tracer)
+        for method, args in [('PFR_bypass', ()), ('PFR_bypass_E', ()), ('PFR_bypass_F', ()),
+                             ('PFR_deadvol', ()), ('PFR_deadvol_E', ()), ('PFR_deadvol_F', ()),
+                             ('CSTR_bypass', (1,)), ('CSTR_bypass_E', (1,)), ('CSTR_bypass_F', (1,)),
+                             ('CSTR_deadvol', (1,)), ('CSTR_deadvol_E', (1,)), ('CSTR_deadvol_F', (1,))]:
+            getattr(realsystem, method)(*args)
+            figs.append(realsystem.fig)
+
+    import AxialDispersion
+    reactor = AxialDispersion.AxialDispersion(10, 20, cells=200)
+    figs.append(AxialDispersion.profile_figure(*reactor.result(dt=.1)[1]))
+
+    from Real_RTD import parameter_sweep, sweep_figures
+    for parameter in ['n', 'bypass']:
+        values = [1, 2, 4] if parameter == 'n' else [0, .1, .2]
+        figs += sweep_figures(*parameter_sweep(10, parameter, values), parameter, values)
+
+    import Particles
+    figs += Particles.figures(*Particles.run(*Particles.non_ideal('cstr', 10, 2, bypass=.2), 10_000, 50, seed=0))
+
+    from PhaseMap import phase_map
+    figs.append(phase_map(('Propane', 'n-Butane'), 0.4, 30, 500, n=50))
+
+    for fig in figs:
+        validate(fig)
+    return len(figs)
+
+if __name__ == "__main__":
+    print("{} figures validated".format(validate_all()))
@@ -0,0 +1,89 @@
+import json
+import base64
+import numpy as np
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast figure serialization
+# json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder) walks every node of the
+# graph_objects tree, converts NumPy arrays element by element and then
+# round-trips the whole string through json.loads to clean up NaN values.
+# Here the figure is turned into plain dicts once and arrays are converted in C
+# (ndarray.tolist, or orjson when it is installed) or, optionally, packed into
+# Plotly's typed-array form.
+
+# Arrays with at least this many elements are base64 packed when typed_arrays=True
+TYPED_ARRAY_MIN = 1000
+
+# Plotly.js typed-array dtype codes
+TYPED_ARRAY_DTYPES = {
+    np.dtype('float64'): 'f8',
+    np.dtype('float32'): 'f4',
+    np.dtype('int32'): 'i4',
+    np.dtype('int16'): 'i2',
+    np.dtype('int8'): 'i1',
+    np.dtype('uint32'): 'u4',
+    np.dtype('uint16'): 'u2',
+    np.dtype('uint8'): 'u1',
+}
+
+def encode_array(arr, typed_arrays=False):
+    # Returns a JSON-ready representation of a NumPy array
+    arr = np.asarray(arr)
+    if arr.dtype.kind == 'f' and not np.isfinite(arr).all():
+        # Plotly treats null as a gap, same as PlotlyJSONEncoder output
+        return np.where(np.isfinite(arr), arr, None).tolist()
+    if typed_arrays and arr.size >= TYPED_ARRAY_MIN:
+        if arr.dtype.kind == 'i' and arr.dtype.itemsize == 8:
+            # Plotly.js has no int64 typed array
+            arr = arr.astype('int32') if np.abs(arr).max() < 2**31 else arr.astype('float64')
+        if arr.dtype in TYPED_ARRAY_DTYPES:
+            arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+            packed = {'dtype': TYPED_ARRAY_DTYPES[arr.dtype], 'bdata': base64.b64encode(arr.data).decode('ascii')}
+            if arr.ndim > 1:
+                packed['shape'] = ', '.join(str(i) for i in arr.shape)
+            return packed
+    return arr.tolist()
+
+def to_dict(fig):
+    # Accepts a go.Figure or an already plain figure dict
+    # fig.to_plotly_json() deepcopies every array; the figure is only read here, so use its stores directly
+    if hasattr(fig, '_frame_objs'):
+        result = {'data': fig._data, 'layout': fig._layout}
+        if fig._frame_objs:
+            result['frames'] = [frame._props for frame in fig._frame_objs]
+        return result
+    if hasattr(fig, 'to_plotly_json'):
+        return fig.to_plotly_json()
+    return fig
+
+def pack_arrays(obj):
+    # Copy of the figure dict with large arrays replaced by their typed-array form
+    if isinstance(obj, dict):
+        return {key: pack_arrays(value) for key, value in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return encode_array(obj, typed_arrays=True)
+    if isinstance(obj, (list, tuple)) and obj and isinstance(obj[0], (dict, list, tuple, np.ndarray)):
+        return [pack_arrays(value) for value in obj]
+    return obj
+
+def dumps(fig, typed_arrays=False):
+    # Typed arrays need plotly.js >= 2.28; the templates still load plotly-latest (1.58), so it is off by default
+    def default(obj):
+        if isinstance(obj, np.ndarray):
+            return encode_array(obj)
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if hasattr(obj, 'to_plotly_json'):
+            return obj.to_plotly_json()
+        raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+    fig = to_dict(fig)
+    if typed_arrays:
+        fig = pack_arrays(fig)
+    if orjson is not None:
+        # orjson writes float64/int arrays natively (NaN as null)
+        return orjson.dumps(fig, default=default, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    return json.dumps(fig, default=default, separators=(',', ':'))
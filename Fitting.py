@@ -0,0 +1,109 @@
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy import optimize, special
+import RTDModels
+
+# Non-ideal reactor parameters from measured E(t) or F(t)
+# Real_RTD draws a fixed bypass and dead volume; fit() estimates them, with the
+# shape of the active zone, from data. The active zone is either tanks in series
+# (shape n) or an open-open axial dispersion vessel (shape D = D/uL), with
+#   tau_active = tau (1 - deadvol) / (1 - bypass)
+#   E(t) = (1 - bypass) E_active(t)           (t > 0, the bypass leaves at t = 0)
+#   F(t) = bypass + (1 - bypass) F_active(t)
+# tau = V/Q is known from the reactor; bypass and deadvol are fractions.
+# The Jacobian is analytic for E data. For F data it is analytic in bypass and
+# deadvol (dF/dtau_active = -t/tau_active E_active); the shape column uses
+# a central difference, as the incomplete gamma and erfc forms have no
+# elementary derivative in n or D.
+# fit_batch() fits a whole tracer campaign over a process pool.
+
+# Parameter order: shape, bypass, deadvol
+SHAPES = {'cstr': 'n', 'dispersion': 'D'}
+BOUNDS = {'cstr': ([.2, 0, 0], [500, .95, .95]),
+          'dispersion': ([1e-4, 0, 0], [10, .95, .95])}
+START = {'cstr': 2, 'dispersion': .1}
+
+def active(model, t, tau_active, shape):
+    # E, F and the derivatives of log E in tau_active and in the shape parameter
+    theta = t / tau_active
+    if model == "cstr":
+        E, F = RTDModels.ncstr(t, tau_active, shape)
+        dlogE_shape = np.log(theta) + np.log(shape) + 1 - special.digamma(shape) - theta
+        dlogE_tau = shape * (theta - 1) / tau_active
+    else:
+        E, F = RTDModels.dispersion(t, tau_active, shape)
+        dlogE_shape = -1/(2*shape) + (1 - theta)**2 / (4*shape**2*theta)
+        dlogE_tau = (1/2 - (1 - theta)*(1 + theta)/(4*shape*theta) - 1) / tau_active
+    return E, F, dlogE_shape, dlogE_tau
+
+def curve(params, model, kind, t, tau):
+    shape, bypass, deadvol = params
+    E, F = active(model, t, tau*(1 - deadvol)/(1 - bypass), shape)[:2]
+    if kind == "E":
+        return (1 - bypass) * E
+    return bypass + (1 - bypass) * F
+
+def jacobian(params, model, kind, t, tau):
+    shape, bypass, deadvol = params
+    tau_active = tau*(1 - deadvol)/(1 - bypass)
+    E, F, dlogE_shape, dlogE_tau = active(model, t, tau_active, shape)
+    dtau_bypass = tau*(1 - deadvol)/(1 - bypass)**2
+    dtau_deadvol = -tau/(1 - bypass)
+    J = np.empty((t.size, 3))
+    if kind == "E":
+        dE_tau = E * dlogE_tau
+        J[:, 0] = (1 - bypass) * E * dlogE_shape
+        J[:, 1] = -E + (1 - bypass) * dE_tau * dtau_bypass
+        J[:, 2] = (1 - bypass) * dE_tau * dtau_deadvol
+    else:
+        dF_tau = -t/tau_active * E
+        step = 1e-6 * max(shape, 1e-3)
+        J[:, 0] = (1 - bypass) * (active(model, t, tau_active, shape + step)[1] -
+                                  active(model, t, tau_active, shape - step)[1]) / (2*step)
+        J[:, 1] = 1 - F + (1 - bypass) * dF_tau * dtau_bypass
+        J[:, 2] = (1 - bypass) * dF_tau * dtau_deadvol
+    return J
+
+def fit(time, values, tau, model="cstr", kind="E", start=None):
+    # Least squares fit of (shape, bypass, deadvol) to E or F values measured at `time`
+    time = np.asarray(time, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = (time > 0) & np.isfinite(values)
+    t, y = time[keep], values[keep]
+    if t.size < 3:
+        raise ValueError("At least 3 points with t > 0 are needed to fit 3 parameters")
+
+    lower, upper = BOUNDS[model]
+    x0 = np.clip(start if start is not None else [START[model], .05, .05], lower, upper)
+    solution = optimize.least_squares(
+        lambda p: curve(p, model, kind, t, tau) - y, x0,
+        jac=lambda p: jacobian(p, model, kind, t, tau),
+        bounds=(lower, upper), method='trf', x_scale='jac')
+    shape, bypass, deadvol = solution.x
+    return {'model': model, SHAPES[model]: shape, 'bypass': bypass, 'deadvol': deadvol,
+            'tau_active': tau*(1 - deadvol)/(1 - bypass),
+            'rms': np.sqrt(np.mean(solution.fun**2)), 'success': bool(solution.success)}
+
+def fit_dataset(dataset):
+    # fit() of one dict of its keyword arguments (picklable, for the process pool)
+    try:
+        return fit(**dataset)
+    except ValueError as error:
+        return {'model': dataset.get('model', "cstr"), 'success': False, 'error': str(error)}
+
+def fit_batch(datasets, processes=None, chunksize=8):
+    # Fits of many datasets (dicts of fit() arguments) in parallel, in order
+    datasets = list(datasets)
+    if processes == 1 or len(datasets) < 2:
+        return [fit_dataset(dataset) for dataset in datasets]
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(fit_dataset, datasets, chunksize=chunksize))
+
+if __name__ == "__main__":
+    # python Fitting.py tracer.csv tau [cstr|dispersion] [E|F]: fit a (time, value) log
+    import Experiment
+    rows = np.concatenate([np.stack(chunk, axis=1) for chunk in Experiment.read(sys.argv[1])])
+    result = fit(rows[:, 0], rows[:, 1], float(sys.argv[2]), *sys.argv[3:5])
+    for key, value in result.items():
+        print("{}: {}".format(key, value))
@@ -0,0 +1,181 @@
+import numpy as np
+
+# Reactor networks in the Laplace domain
+# Every unit is a transfer function G(s) = L{E(t)}, a function of a complex
+# array s. A Network is a flow graph of units: streams (from, to, flow) join the
+# feed 'in', the units and the outlet 'out', with any splits, mixing points and
+# recycle loops. The concentration leaving unit j is G_j(s) times the flow
+# weighted mix of the streams entering it, so for each s the whole network is
+# one small linear system, solved for all s at once. E(t) and F(t) come back
+# through the fixed Talbot inversion (Abate and Valko), which evaluates the
+# network at every contour point of every time in one call.
+# A Network is itself a unit, so networks nest (series, parallel and recycle
+# below build the common ones). Talbot's contour runs far into Re(s) < 0, where
+# a pure delay exp(-s tau) blows up, so networks with PFR units are inverted
+# with the Fourier series on the line Re s = c instead, with Lanczos sigma
+# factors against the Gibbs ringing at the jumps a delay makes. Against the
+# closed forms (PFR + tanks in series, PFR with bypass) that is good to about
+# 1e-4 of the peak away from the jumps; within about time_end/1000 of a jump
+# the curves are smoothed, and a pure PFR's E (a Dirac spike) comes back as a
+# narrow peak of area 1. Flow that reaches the outlet with no delay at all (a
+# bypass) is a spike at t = 0, returned separately by Network.instant().
+
+# Talbot contour points per time (double precision is good to about 1e-8 with 24-32)
+TALBOT_M = 32
+# Fourier series inversion: terms, and the aliasing error relative to f (sets the line Re s = c)
+FOURIER_TERMS = 4000
+FOURIER_TOL = 1e-8
+# s at which G(s) is taken as G(infinity), in units of 1/(largest time)
+S_INFINITY = 1e9
+
+def cstr(tau, n=1):
+    # n tanks in series with total mean residence time tau
+    return lambda s: (1 + s*tau/n)**(-n)
+
+def pfr(tau):
+    transfer = lambda s: np.exp(-s*tau)
+    # Networks containing a delay are inverted with fourier(), smoothed
+    transfer.delay = True
+    return transfer
+
+def dispersion(tau, D):
+    # Axial dispersion, closed-closed vessel (Danckwerts) with dispersion number D = D/uL, written so
+    # that only decaying exponentials appear
+    Pe = 1/D
+    def transfer(s):
+        a = np.sqrt(1 + 4*s*tau/Pe)
+        return 4*a*np.exp(Pe*(1 - a)/2) / ((1 + a)**2 - (1 - a)**2*np.exp(-a*Pe))
+    return transfer
+
+def pipe():
+    # No volume: the tracer passes straight through (a bypass stream)
+    return lambda s: np.ones_like(s)
+
+class Network:
+
+    def __init__(self, units, streams):
+        # units: {name: transfer function}; streams: [(from, to, flow)] between 'in', the units and 'out'
+        self.units = dict(units)
+        self.names = list(self.units)
+        self.delay = any(getattr(unit, 'delay', False) for unit in self.units.values())
+        index = {name: i for i, name in enumerate(self.names)}
+        size = len(self.names)
+        inflow = np.zeros(size + 1)
+        outflow = np.zeros(size + 1)
+        # Flows into each unit (rows) from each unit (columns), from the feed, and into the outlet
+        self.mixing = np.zeros((size, size))
+        self.feed = np.zeros(size)
+        self.outlet = np.zeros(size)
+        self.direct = 0.
+        for source, target, flow in streams:
+            if source not in index and source != 'in' or target not in index and target != 'out' or flow < 0:
+                raise ValueError("Unknown stream {} -> {}".format(source, target))
+            i = index.get(source, size)
+            j = index.get(target, size)
+            outflow[i] += flow
+            inflow[j] += flow
+            if target == 'out':
+                if source == 'in':
+                    self.direct += flow
+                else:
+                    self.outlet[i] += flow
+            elif source == 'in':
+                self.feed[j] += flow
+            else:
+                self.mixing[j, i] += flow
+        if not np.allclose(inflow[:size], outflow[:size]) or not np.isclose(inflow[size], outflow[size]) or inflow[size] == 0:
+            raise ValueError("Flows into and out of every unit (and in and out of the network) must balance")
+        # Flow weighted mixing: fractions of each unit's inflow, and of the network's outflow
+        self.mixing /= inflow[:size, None]
+        self.feed /= inflow[:size]
+        self.outlet /= inflow[size]
+        self.direct /= inflow[size]
+
+    def __call__(self, s):
+        # Transfer function of the whole network at the points s (any shape)
+        s = np.asarray(s, dtype=complex)
+        G = np.stack([self.units[name](s.ravel()) for name in self.names], axis=-1)
+        # c = G * (mixing c + feed)  ->  (I - G mixing) c = G feed
+        system = np.eye(len(self.names)) - G[:, :, None] * self.mixing
+        c = np.linalg.solve(system, (G * self.feed)[:, :, None])[:, :, 0]
+        return (c @ self.outlet + self.direct).reshape(s.shape)
+
+    def instant(self, time_end=1):
+        # Fraction of the tracer that leaves at t = 0 (G at infinity)
+        return float(self(np.array([S_INFINITY/time_end])).real[0])
+
+    def E(self, time):
+        # E(t) without the t = 0 spike of instant()
+        time = np.asarray(time, dtype=float)
+        at_once = self.instant(time.max())
+        return self.inverse(lambda s: self(s) - at_once, time)
+
+    def F(self, time):
+        return self.inverse(lambda s: self(s)/s, np.asarray(time, dtype=float))
+
+    def inverse(self, transform, time):
+        if self.delay:
+            return fourier(transform, time, smooth=True)
+        return talbot(transform, time)
+
+def talbot(transform, time, M=TALBOT_M):
+    # f(t) from its Laplace transform, vectorized over time (t = 0 is taken just after 0)
+    t = np.maximum(np.asarray(time, dtype=float), 1e-9*max(np.max(time), 1e-9))[..., None]
+    theta = np.arange(1, M) * np.pi / M
+    cot = 1/np.tan(theta)
+    r = 2*M / (5*t)
+    s = r * np.concatenate([[1], theta*(cot + 1j)])
+    weight = np.exp(t*s) * np.concatenate([[.5], 1 + 1j*theta*(1 + cot**2) - 1j*cot])
+    # Far along the contour delays (exp(-s tau)) overflow where exp(t s) vanishes; those terms are 0
+    with np.errstate(over='ignore', invalid='ignore'):
+        terms = weight * transform(s)
+    terms[~np.isfinite(terms)] = 0
+    return (r[..., 0]/M) * terms.real.sum(axis=-1)
+
+def fourier(transform, time, terms=FOURIER_TERMS, tol=FOURIER_TOL, smooth=False):
+    # f(t) for 0 <= t <= max(time) from its Laplace transform on the line Re s = c (Durbin's Fourier
+    # series with half period max(time)), one matrix product for every time. The line never enters
+    # Re(s) < 0, so unlike talbot() it is good for sharp, nearly delayed responses (high Peclet
+    # dispersion); transform may return extra leading axes (e.g. one per parameter value).
+    # smooth multiplies the terms by Lanczos' sigma factors, for responses with jumps (delays)
+    time = np.asarray(time, dtype=float)
+    half = time.max()
+    c = np.log(1/tol) / (2*half)
+    k = np.arange(terms + 1)
+    omega = k * np.pi / half
+    values = transform(c + 1j*omega)
+    if smooth:
+        values = values * np.sinc(k / (terms + 1))
+    values[..., 0] *= .5
+    return np.exp(c*time) / half * (values @ np.exp(1j*omega[:, None]*time)).real
+
+def series(*units):
+    names = ["unit{}".format(i) for i in range(len(units))]
+    path = ['in'] + names + ['out']
+    return Network(zip(names, units), [(a, b, 1) for a, b in zip(path[:-1], path[1:])])
+
+def parallel(*branches):
+    # branches: (fraction of the feed, unit); a unit of None is a bypass straight to the outlet
+    units, streams = {}, []
+    for i, (fraction, unit) in enumerate(branches):
+        if unit is None:
+            streams.append(('in', 'out', fraction))
+        else:
+            name = "branch{}".format(i)
+            units[name] = unit
+            streams += [('in', name, fraction), (name, 'out', fraction)]
+    return Network(units, streams)
+
+def recycle(unit, ratio):
+    # unit with ratio times the feed flow returned from its outlet to its inlet. The unit sees
+    # (1 + ratio) times the flow, so its own tau is the time of one pass
+    return Network({'loop': unit}, [('in', 'loop', 1), ('loop', 'loop', ratio), ('loop', 'out', 1)])
+
+def non_ideal(unit, tau, bypass=0, deadvol=0, recycle_ratio=0):
+    # The combined model of RTDModels.combined as a network: unit(tau) is a transfer function
+    # factory (cstr, dispersion...) given the tau of one pass through the active zone
+    tau_active = tau * (1 - deadvol) / (1 - bypass)
+    active = unit(tau_active / (1 + recycle_ratio))
+    if recycle_ratio:
+        active = recycle(active, recycle_ratio)
+    return parallel((1 - bypass, active), (bypass, None))
@@ -0,0 +1,185 @@
+import os
+import sys
+import hashlib
+import tempfile
+from functools import lru_cache
+import numpy as np
+import scipy
+import plotly
+import orjson
+from RTD import RTD
+from Real_RTD import Real_RTD
+import FigureJSON
+
+# Precomputed reactor pages
+# The ideal page takes integer V 1-20 and Q 1-5 over 2 reactor types and 2
+# tracers (400 pages), and the real page fixes V and Q, leaving 2 reactor types,
+# 2 tracers and 2 problems each (8 pages). Every one is rendered once into a
+# content-addressed store: each page's figures and template context is a JSON
+# blob named by the SHA-256 of its bytes (identical pages are stored once), and
+# index.json maps the page inputs to blob names. The index records a
+# fingerprint of the modules that compute the pages. The store is built by
+# `python PageStore.py` before the server starts (see the Procfile), which does
+# nothing when the store already matches the code; the app only reads the index
+# (open_index), so the routes read a blob per request and do no numerical work.
+# The forms only accept inputs in the store, and a page is computed as before
+# while the store is missing or stale (e.g. running main.py without building it).
+
+STORE = os.environ.get("PAGE_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_store"))
+
+# Modules whose code decides what the pages show
+SOURCES = ["RTD.py", "Real_RTD.py", "RTDModels.py", "Network.py", "Tracer.py", "FigureBuilder.py", "FigureJSON.py", "PageStore.py"]
+
+# The real page's fixed reactor, and its problems by the kind of non-ideality each one causes
+REAL_VOLUME = 20
+REAL_FLOW = 2
+REASONS_FOR_DEADVOL = ["poor impeller design", "reactor fouling"]
+REASONS_FOR_BYPASS = ["poor outlet design", "poor bed packing"]
+# REASONS_FOR_BOTH = [] <- can add in when got more ideas
+REAL_PROBLEMS = {"cstr": ["poor impeller design", "poor outlet design"], "pfr": ["reactor fouling", "poor bed packing"]}
+
+# Blobs kept in memory (a few pages are asked for far more than the rest)
+CACHED_PAGES = 64
+
+def system_context(system):
+    # The attributes of an RTD/Real_RTD the page templates use (Jinja reads dict keys as attributes)
+    return {'V_reactor': system.V_reactor, 'flow': system.flow, 'type': system.type, 'fps': system.fps,
+            'length': getattr(system, 'length', 0), 'x': getattr(system, 'x', None), 'y': getattr(system, 'y', None)}
+
+def blank(system):
+    # A page's system without its curves, for the form with errors
+    return dict(system, length=0, x=None, y=None)
+
+def compute_ideal(reactorType, reactorVol, reactorFlow, tracerType):
+    system = RTD(reactorVol, reactorFlow, tracerType)
+    if reactorType == "cstr":
+        Cgraph = system.CSTR(1) #note that code now has this as "n"
+        Egraph = system.CSTR_E(1)
+        Fgraph = system.CSTR_F(1)
+    else:
+        Cgraph = system.PFR()
+        Egraph = system.PFR_E()
+        Fgraph = system.PFR_F()
+    return {'system': system_context(system), 'Cgraph': Cgraph, 'Egraph': Egraph, 'Fgraph': Fgraph}
+
+def compute_real(reactorType, tracerType, problemType):
+    idealsystem = RTD(REAL_VOLUME, REAL_FLOW, tracerType)
+    realsystem = Real_RTD(REAL_VOLUME, REAL_FLOW, tracerType)
+    problem = "deadvol" if problemType in REASONS_FOR_DEADVOL else "bypass"
+    if reactorType == "cstr":
+        Cgraph = idealsystem.CSTR(1)
+        realCgraph = getattr(realsystem, "CSTR_" + problem)(1)
+        realEgraph = getattr(realsystem, "CSTR_{}_E".format(problem))(1)
+        realFgraph = getattr(realsystem, "CSTR_{}_F".format(problem))(1)
+    else:
+        Cgraph = idealsystem.PFR()
+        realCgraph = getattr(realsystem, "PFR_" + problem)()
+        realEgraph = getattr(realsystem, "PFR_{}_E".format(problem))()
+        realFgraph = getattr(realsystem, "PFR_{}_F".format(problem))()
+    # Starting slider positions: the fraction the page's own curves use for the chosen problem
+    sweepStart = {'bypass': realsystem.bypass if problem == "bypass" else 0,
+                  'deadvol': realsystem.deadvol/REAL_VOLUME if problem == "deadvol" else 0}
+    return {'idealsystem': system_context(idealsystem), 'realsystem': system_context(realsystem), 'Cgraph': Cgraph,
+            'realCgraph': realCgraph, 'realEgraph': realEgraph, 'realFgraph': realFgraph, 'sweepStart': sweepStart}
+
+def pages():
+    # (key, compute) of every page in the store
+    for reactorType in ("cstr", "pfr"):
+        for reactorVol in range(1, 21):
+            for reactorFlow in range(1, 6):
+                for tracerType in ("pulse", "step"):
+                    yield ideal_key(reactorType, reactorVol, reactorFlow, tracerType), \
+                        (compute_ideal, (reactorType, reactorVol, reactorFlow, tracerType))
+    for reactorType, problems in REAL_PROBLEMS.items():
+        for tracerType in ("pulse", "step"):
+            for problemType in problems:
+                yield real_key(reactorType, tracerType, problemType), (compute_real, (reactorType, tracerType, problemType))
+
+def ideal_key(reactorType, reactorVol, reactorFlow, tracerType):
+    return "idealreactors/{}/{}/{}/{}".format(reactorType, reactorVol, reactorFlow, tracerType)
+
+def real_key(reactorType, tracerType, problemType):
+    return "realreactors/{}/{}/{}".format(reactorType, tracerType, problemType)
+
+def fingerprint():
+    # Hash of the page modules and of the NumPy, SciPy and Plotly versions (the curves can change in the
+    # last digits with the first two, the serialized figures with Plotly's defaults and validators)
+    digest = hashlib.sha256(" ".join([np.__version__, scipy.__version__, plotly.__version__]).encode())
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCES:
+        with open(os.path.join(folder, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def write_atomic(path, data):
+    # Write to a temporary file in the same folder and rename it over the target, so a process
+    # reading the store (another worker) never sees half a file
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(handle, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+def blob_path(name, store=STORE):
+    return os.path.join(store, "blobs", name[:2], name + ".json")
+
+def build(store=STORE):
+    # Render every page into the store and write its index; blobs already there are not rewritten
+    index = {}
+    for key, (compute, args) in pages():
+        data = FigureJSON.dumps(compute(*args)).encode()
+        name = hashlib.sha256(data).hexdigest()
+        path = blob_path(name, store)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, data)
+        index[key] = name
+    write_atomic(os.path.join(store, "index.json"), orjson.dumps({'fingerprint': fingerprint(), 'pages': index}))
+    return index
+
+def read_index(store=STORE):
+    try:
+        with open(os.path.join(store, "index.json"), 'rb') as f:
+            index = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return index['pages'] if index.get('fingerprint') == fingerprint() else None
+
+# Page inputs -> blob names of the store in use (empty until open_index() has found one)
+index = {}
+
+def ensure(store=STORE):
+    # Deploy step: build the store unless it already matches the code
+    return read_index(store) or build(store)
+
+def open_index(store=STORE):
+    # At boot: serve from the store if it matches the code (never builds it)
+    global index
+    index = read_index(store) or {}
+    return index
+
+@lru_cache(maxsize=CACHED_PAGES)
+def load(name, store=STORE):
+    # A blob never changes (its name is its hash), so it can be cached for the life of the process
+    with open(blob_path(name, store), 'rb') as f:
+        return orjson.loads(f.read())
+
+def page(key, compute, *args):
+    # Template context of a page: from the store, or computed when the store does not have it
+    name = index.get(key)
+    if name is not None:
+        try:
+            return load(name)
+        except (OSError, ValueError):
+            pass
+    return orjson.loads(FigureJSON.dumps(compute(*args)))
+
+def ideal_page(reactorType, reactorVol, reactorFlow, tracerType):
+    return page(ideal_key(reactorType, reactorVol, reactorFlow, tracerType), compute_ideal, reactorType, reactorVol, reactorFlow, tracerType)
+
+def real_page(reactorType, tracerType, problemType):
+    return page(real_key(reactorType, tracerType, problemType), compute_real, reactorType, tracerType, problemType)
+
+if __name__ == "__main__":
+    # python PageStore.py [store]: build the store if it is missing or stale, before the app starts
+    store = sys.argv[1] if len(sys.argv) > 1 else STORE
+    print("{} pages in {}".format(len(ensure(store)), store))
@@ -0,0 +1,175 @@
+import time as clock
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from RTD import RTDResult
+import FigureBuilder
+
+# Monte Carlo residence times: tracer particles pushed through a reactor network
+# The network is described as for Network and Compartments: units joined by
+# streams (from, to, flow) between the feed 'in' and the outlet 'out'. Here a
+# unit is a tuple naming how long a particle stays in it:
+#   ('pfr', tau)        exactly tau
+#   ('cstr', tau, n)    n tanks of tau/n each, one exponential stay per tank
+#                       (their sum is a gamma(n, tau/n) draw)
+#   ('pipe',)           no time (a bypass)
+# and every particle leaving a unit picks the next stream at random in
+# proportion to its flow, so splits, bypasses and recycle loops need nothing
+# special. All particles of a chunk move together as NumPy arrays (one draw
+# per unit per pass), chunks run on a process pool with independent seeds, and
+# only histogram counts come back. E(t) is the histogram normalized by the
+# particle count, with binomial confidence bands; the particles leaving at
+# t = 0 (bypassed through pipes only) are counted apart, as Network.instant().
+
+# Particles per chunk, histogram bins, and passes through units after which
+# the particles still inside (long recycle loops) are dropped
+CHUNK = 1_000_000
+BINS = 200
+MAX_PASSES = 1000
+# Most particles a page request may ask for
+MAX_PARTICLES = 4_000_000
+# Two-sided 95% normal quantile for the bands
+Z = 1.96
+
+def stay(unit, rng, size):
+    kind = unit[0]
+    if kind == 'pfr':
+        return np.full(size, float(unit[1]))
+    if kind == 'cstr':
+        tau, n = unit[1], unit[2] if len(unit) > 2 else 1
+        return rng.gamma(n, tau/n, size)
+    if kind == 'pipe':
+        return np.zeros(size)
+    raise ValueError("Unknown unit {}".format(kind))
+
+def routes(units, streams):
+    # For 'in' and each unit: the target indices of its streams and their cumulative flow fractions.
+    # Targets are unit indices, with len(units) for 'out'
+    names = list(units)
+    index = {name: i for i, name in enumerate(names)}
+    index['out'] = len(names)
+    targets = {name: [] for name in ['in'] + names}
+    for source, target, flow in streams:
+        if source not in targets or target not in index or flow < 0:
+            raise ValueError("Unknown stream {} -> {}".format(source, target))
+        if flow > 0:
+            targets[source].append((index[target], flow))
+    table = []
+    for name in ['in'] + names:
+        if not targets[name]:
+            raise ValueError("No stream leaves {}".format(name))
+        to, flows = zip(*targets[name])
+        table.append((np.array(to), np.cumsum(flows) / np.sum(flows)))
+    return names, table
+
+def simulate(units, streams, count, rng):
+    # Exit times of `count` particles fed at t = 0 (NaN for particles still inside after MAX_PASSES)
+    names, table = routes(units, streams)
+    unit_list = [units[name] for name in names]
+    out = len(names)
+    times = np.zeros(count)
+    # Node of every particle: -1 the feed, then unit indices; 'out' particles are dropped from `alive`
+    alive = np.arange(count)
+    node = np.full(count, -1)
+    for _ in range(MAX_PASSES):
+        if alive.size == 0:
+            break
+        choice = rng.random(alive.size)
+        # Every particle takes one stream per pass: the masks are of the old nodes, the moves go to a copy
+        moved = node.copy()
+        for source in np.unique(node):
+            at = node == source
+            to, cumulative = table[source + 1]
+            moved[at] = to[np.minimum(np.searchsorted(cumulative, choice[at], side='right'), to.size - 1)]
+        node = moved
+        leaving = node == out
+        alive, node = alive[~leaving], node[~leaving]
+        for unit in np.unique(node):
+            at = node == unit
+            times[alive[at]] += stay(unit_list[unit], rng, int(at.sum()))
+    times[alive] = np.nan
+    return times
+
+def simulate_chunk(task):
+    # Histogram of one chunk (picklable, for the process pool): counts per bin, at t = 0, past the
+    # last bin, and still inside, with the sum and sum of squares of the times for the mean and variance
+    units, streams, count, edges, seed = task
+    times = simulate(units, streams, count, np.random.default_rng(seed))
+    inside = np.isnan(times)
+    times = times[~inside]
+    instant = times == 0
+    counts = np.histogram(times[~instant], edges)[0]
+    return counts, int(instant.sum()), int((times > edges[-1]).sum()), int(inside.sum()), times.sum(), (times**2).sum()
+
+def run(units, streams, particles, time_end, bins=BINS, chunk=CHUNK, processes=None, seed=None):
+    # E and F from `particles` particles, and the run's statistics (bands, mean, particles per second)
+    edges = np.linspace(0, time_end, bins + 1)
+    sizes = [chunk] * (particles // chunk) + ([particles % chunk] if particles % chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(dict(units), list(streams), size, edges, s) for size, s in zip(sizes, seeds)]
+    start = clock.perf_counter()
+    if processes == 1 or len(tasks) < 2:
+        parts = [simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            parts = list(pool.map(simulate_chunk, tasks))
+    seconds = clock.perf_counter() - start
+
+    counts = sum(part[0] for part in parts)
+    instant, late, inside = (sum(part[i] for part in parts) for i in (1, 2, 3))
+    total, squares = sum(part[4] for part in parts), sum(part[5] for part in parts)
+    width = np.diff(edges)
+    # Fraction in each bin is binomial: standard error sqrt(p (1 - p) / N)
+    p = counts / particles
+    error = Z * np.sqrt(p * (1 - p) / particles)
+    E = p / width
+    # F at the bin centres too: half of each bin's particles have left by its centre
+    F = (instant + np.cumsum(counts) - counts/2) / particles
+    F_error = Z * np.sqrt(F * (1 - F) / particles)
+    left = particles - inside
+    mean = total / left
+    stats = {'particles': particles, 'seconds': seconds, 'rate': particles / seconds,
+             'instant': instant / particles, 'late': late / particles, 'inside': inside / particles,
+             'mean': mean, 'variance': squares / left - mean**2,
+             'E_low': np.maximum(E - error/width, 0), 'E_high': E + error/width,
+             'F_low': np.maximum(F - F_error, 0), 'F_high': np.minimum(F + F_error, 1)}
+    return RTDResult((edges[:-1] + edges[1:]) / 2, E=E, F=F, time_end=time_end), stats
+
+def non_ideal(reactorType, tau, n=1, bypass=0, deadvol=0):
+    # (units, streams) of the bypass/dead volume reactor of RTDModels.model: the active zone has
+    # tau (1 - deadvol)/(1 - bypass) and a pipe carries the bypassed flow
+    tau_active = tau * (1 - deadvol) / (1 - bypass)
+    units = {'reactor': ('pfr', tau_active) if reactorType == "pfr" else ('cstr', tau_active, n)}
+    streams = [('in', 'reactor', 1 - bypass), ('reactor', 'out', 1 - bypass)]
+    if bypass:
+        units['bypass'] = ('pipe',)
+        streams += [('in', 'bypass', bypass), ('bypass', 'out', bypass)]
+    return units, streams
+
+def figures(result, stats, title="Monte Carlo RTD"):
+    # E and F with their 95% bands (filled between the two bound traces), played by the Display buttons
+    figs = []
+    for curve, layout in (('E', 'rtd_E'), ('F', 'rtd_F')):
+        values = getattr(result, curve)
+        frame = [FigureBuilder.scatter(result.time, stats[curve + '_low'], name="95% band", line={'width': 0}, showlegend=False),
+                 FigureBuilder.scatter(result.time, stats[curve + '_high'], name="95% band", line={'width': 0}, fill='tonexty'),
+                 FigureBuilder.scatter(result.time, values, name="{:,} particles".format(stats['particles']))]
+        figs.append(FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name=trace['name']) for trace in frame],
+            layout=FigureBuilder.layout(layout,
+                xaxis=dict(range=[0, result.time_end]),
+                yaxis=dict(range=[0, max(stats[curve + '_high'].max(), 1 if curve == 'F' else 0)*1.1]),
+                title="{}: Plot of {} against Time ({:,.0f} particles/s)".format(title, curve, stats['rate']),
+            ), frames=[frame]
+        ))
+    return figs
+
+if __name__ == "__main__":
+    # python Particles.py [particles]: throughput and agreement with the closed form N-CSTR with bypass
+    import sys
+    import RTDModels
+    particles = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000
+    result, stats = run(*non_ideal("cstr", 10, 2, bypass=.2, deadvol=.1), particles, 50)
+    E = .8 * RTDModels.ncstr(result.time, 10*.9/.8, 2)[0]
+    inside = ((E >= stats['E_low']) & (E <= stats['E_high'])).mean()
+    print("{:,} particles in {:.2f} s ({:,.0f}/s); bypassed {:.4f}; E inside the 95% band at {:.0%} of bins".format(
+        particles, stats['seconds'], stats['rate'], stats['instant'], inside))
@@ -0,0 +1,85 @@
+import sys
+import numpy as np
+from VLECalculations import RachfordRice
+import FigureBuilder
+
+# Vapour fraction maps of a binary
+# V/F comes from RachfordRice.batchFlash, which works on whole arrays at once.
+# phase_map() draws it over the T-P plane for one z; flash_grid() fills any
+# T x P x z study array in chunks, so a study can be written straight into a
+# memory mapped .npy file (export_study) without holding it in RAM.
+
+# Default map resolution and the largest map the page may ask for
+MAP_POINTS = 400
+MAX_MAP_POINTS = 600
+
+# Grid points flashed at once by flash_grid (about 8 bytes x a few temporaries each)
+MAX_CELLS = 2_000_000
+
+def contour_field(values):
+    # Only the level 1 line of sum(z*K) / sum(z/K) is drawn, so far away values are clipped
+    # and everything rounded to keep the JSON small
+    return np.round(np.clip(values, 0.5, 1.5), 3)
+
+def phase_map(components, z, T=None, P=None, n=MAP_POINTS):
+    # V/F heatmap with bubble and dew lines over the T and P range of the binary page
+    # T, P mark the current system when given
+    params = RachfordRice.params
+    T_grid = np.linspace(params['Tmin'], params['Tmax'], n)
+    P_grid = np.linspace(params['Pmin'], params['Pmax'], n)
+    # Rows follow P (heatmap y), columns follow T (heatmap x)
+    v, bubble, dew = RachfordRice.batchFlash(components, T_grid[None, :], P_grid[:, None], z)
+
+    level = {'start': 1, 'end': 1, 'size': 1, 'coloring': 'lines'}
+    data = [
+        {'type': 'heatmap', 'x': T_grid, 'y': P_grid, 'z': np.round(v, 3), 'name': "V/F",
+         'colorscale': FigureBuilder.VIRIDIS, 'zmin': 0, 'zmax': 1, 'colorbar': {'title': {'text': 'V/F'}},
+         'hovertemplate': 'T: %{x:.1f}' + chr(176) + 'C<br>P: %{y:.0f} kPa<br>V/F: %{z:.3f}<extra></extra>'},
+        {'type': 'contour', 'x': T_grid, 'y': P_grid, 'z': contour_field(bubble), 'name': "Bubble Line",
+         'contours': level, 'line': {'color': "#FF00FF", 'width': 2}, 'showscale': False, 'showlegend': True,
+         'hoverinfo': 'skip'},
+        {'type': 'contour', 'x': T_grid, 'y': P_grid, 'z': contour_field(dew), 'name': "Dew Line",
+         'contours': level, 'line': {'color': "#FFFF00", 'width': 2}, 'showscale': False, 'showlegend': True,
+         'hoverinfo': 'skip'},
+    ]
+    if T is not None and P is not None:
+        data.append(FigureBuilder.scatter([T], [P], mode='markers', name="Current System",
+                                          marker={'size': 10, 'color': "#FFFFFF"},
+                                          hovertemplate='T: %{x:.2f}' + chr(176) + 'C<br>P: %{y:.2f} kPa<extra></extra>'))
+
+    return FigureBuilder.figure(data, FigureBuilder.layout('phasemap',
+        title="<b>Phase Map of " + components[0] + "/" + components[1] + " at z = " + str(z) + "</b>"))
+
+def flash_grid(components, T, P, z, out=None, max_cells=MAX_CELLS):
+    # Fills out[i, j, k] with V/F at T[i], P[j], z[k], flashing at most max_cells points at a time
+    # (a single T, P pair always takes the whole z axis)
+    T, P, z = (np.atleast_1d(np.asarray(a, dtype=float)) for a in (T, P, z))
+    if out is None:
+        out = np.empty((T.size, P.size, z.size))
+    rows = max(1, max_cells // (P.size * z.size))
+    cols = P.size if rows > 1 else max(1, max_cells // z.size)
+    for i in range(0, T.size, rows):
+        for j in range(0, P.size, cols):
+            v, _, _ = RachfordRice.batchFlash(components, T[i:i+rows, None, None], P[None, j:j+cols, None], z[None, None, :])
+            out[i:i+rows, j:j+cols] = v
+    return out
+
+def export_study(components, T, P, z, path, dtype='float32', max_cells=MAX_CELLS):
+    # Writes the T x P x z V/F study to a .npy file (np.load(path, mmap_mode='r') reads it back lazily)
+    shape = (np.size(T), np.size(P), np.size(z))
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    flash_grid(components, T, P, z, out, max_cells)
+    out.flush()
+    return shape
+
+if __name__ == "__main__":
+    # python PhaseMap.py "Propane" "n-Butane" study.npy [nT nP nz]
+    if len(sys.argv) < 4:
+        sys.exit('usage: python PhaseMap.py componentA componentB out.npy [nT nP nz]')
+    nT, nP, nz = [int(i) for i in sys.argv[4:7]] if len(sys.argv) >= 7 else (400, 400, 101)
+    params = RachfordRice.params
+    shape = export_study((sys.argv[1], sys.argv[2]),
+                         np.linspace(params['Tmin'], params['Tmax'], nT),
+                         np.linspace(params['Pmin'], params['Pmax'], nP),
+                         np.linspace(0, 1, nz), sys.argv[3])
+    print("Wrote {} V/F values to {}".format("x".join(str(i) for i in shape), sys.argv[3]))
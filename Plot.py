@@ -2,14 +2,48 @@
 from VLECalculations import RachfordRice, Antoine, Steam
 import plotly
 import json
+import FigureJSON
+import FigureBuilder
 import plotly.graph_objects as go
 import numpy as np
+from functools import lru_cache
 from pyXSteam.XSteam import XSteam
 steamTable = XSteam(XSteam.UNIT_SYSTEM_MKS)
 
 # Params is a dictionary with divID, Tmin/max, Pmin/max, numpoints
 #self.params = params
 
+# Equilibrium line of a binary, swept over T at constant P (sweep='T', fixed=P in kPa) or over
+# P at constant T (sweep='P', fixed=T in degC). It depends on the components and the fixed variable
+# only, so one curve serves every T/z the user picks; plot_* draw the current state over it.
+# Returns [x, y, T or P] points sorted by x, with the pure component points [0,0,bp_B]/[1,1,bp_A]
+# at the ends when the full range is swept.
+@lru_cache(maxsize=256)
+def equilibrium_curve(components, sweep, fixed, lo=None, hi=None, num=50):
+    if sweep == 'T':
+        RR = RachfordRice(2, 25, fixed, list(components), [0.5, 0.5])
+        bps = [RR.getPureComponentBoilingTemp(c, RR.P_psia) for c in components]
+    else:
+        RR = RachfordRice(2, fixed, 101.3, list(components), [0.5, 0.5])
+        bps = [RR.getPureComponentBoilingPressure(c, RR.T_degR) for c in components]
+    if lo is None or hi is None:
+        lo, hi = min(bps), max(bps)
+        ends = True
+    else:
+        ends = False
+
+    values = np.linspace(lo, hi, num=num)
+    if sweep == 'T':
+        x, y = RachfordRice.binaryEquilibrium(components, values, fixed)
+    else:
+        x, y = RachfordRice.binaryEquilibrium(components, fixed, values)
+    inside = (0 <= x) & (x <= 1) & (0 <= y) & (y <= 1)
+    points = sorted(zip(x[inside].tolist(), y[inside].tolist(), values[inside].tolist()))
+    if points and ends:
+        points.insert(0, (0, 0, bps[1]))
+        points.append((1, 1, bps[0]))
+    return tuple(points)
+
 #rename plot_binary
 class plot:
     def __init__(self,RR):
@@ -17,16 +51,41 @@ class plot:
         self.RR = RR
         
     def create_plot(self):
-        self.fig = go.Figure()
-        self.fig.update_layout(template='plotly_dark', paper_bgcolor='rgba(0,0,0,0)')
+        self.fig = FigureBuilder.figure([], FigureBuilder.layout('binary'))
+
+    def add_trace(self, trace):
+        self.fig['data'].append(trace)
+
+    def update_layout(self, **fill):
+        self.fig['layout'] = FigureBuilder.layout('binary', **fill)
 
     # Add a 45 degree line (For y-x graphs)
     def add_45degLine(self):
         self.create_plot()
         x_data = np.linspace(0,1,num=20,endpoint=True)
-        self.fig.add_trace(go.Scatter(x=x_data, y=x_data, mode = 'lines', name="x = y", line_color = "#FFFF00"))
+        self.add_trace(FigureBuilder.scatter(x_data, x_data, mode = 'lines', name="x = y", line = {'color': "#FFFF00"}))
+
+    # Traces for the current T, P and z, drawn over the (cached) equilibrium curve
+    # Only these change when T or z is moved, see current_state()
+    def current_marker(self):
+        # Current x, y on a y-x plot
+        current_x = [self.RR.x[0]]
+        current_y = [self.RR.y[0]]
+        if self.plotID == 'yxP':
+            name, text = "Current Temperature", f'Temperature: {self.RR.T}'+ chr(176) + "C"
+        else:
+            name, text = "Current Pressure", f'Pressure: {self.RR.P} kPa'
+        return FigureBuilder.scatter(current_x, current_y, mode='markers', name=name,
+                                      marker = dict(size=10),
+                                      hovertemplate =
+                                      'x: %{x:.2f}' +
+                                      '<br>y: %{y:.2f}<br>' +
+                                      '%{text}', text = [text])
 
     def create_tieline(self):
+        self.add_trace(self.tieline())
+
+    def tieline(self):
         x = self.RR.x
         y = self.RR.y
         z = self.RR.z
@@ -63,90 +122,40 @@ class plot:
 
         
         if type == 'T':
-            self.fig.add_trace(go.Scatter(x=x_arr, y=y_arr, 
+            return FigureBuilder.scatter(x_arr, y_arr, 
                                         mode='lines+markers', name="Current System",
                                         marker = dict(size=10), 
                                         hovertemplate =
                                         '%{text}' + 
                                         ': %{x:.2f}' +
                                         '<br>T: %{y:.2f}' + chr(176)+ 'C',
-                                        text = ['{}'.format(i) for i in labels]))
+                                        text = ['{}'.format(i) for i in labels])
         else:
-            self.fig.add_trace(go.Scatter(x=x_arr, y=y_arr, 
+            return FigureBuilder.scatter(x_arr, y_arr, 
                                         mode='lines+markers', name="Current System",
                                         marker = dict(size=10), 
                                         hovertemplate =
                                         '%{text}' + 
                                         ': %{x:.2f}' +
                                         '<br>P: %{y:.2f}' + 'kPa',
-                                        text = ['{}'.format(i) for i in labels]))
-
-    def generate_yx_constP_data(self):
-        # zA = composition of component A in VLE
-        # Generates (x,y,P) values using zA data at constant T
-        points = []
-
-        # @ selected zA, vary T to obtain [x,y,T,v] values
-        bps = [self.RR.getPureComponentBoilingTemp(self.RR.components[0],self.RR.P_psia), self.RR.getPureComponentBoilingTemp(self.RR.components[1],self.RR.P_psia)]
-        if bps[0] > bps[1]: # first component is lighter
-            bp_light, bp_heavy = bps[0], bps[1]
-        else: 
-            bp_light, bp_heavy = bps[1], bps[0]
-        temporaryobject = RachfordRice(self.RR.n, self.RR.T, self.RR.P, self.RR.components, self.RR.z)
-        for i in np.linspace(bp_light, bp_heavy, num=50):
-            temporaryobject.setT(i)
-            if 0 <= temporaryobject.v and temporaryobject.v <= 1:
-                # points will have [[xA1,yA1,T1,v1],[xA1,yA1,T1,v1]]
-                points.append([temporaryobject.x[0], temporaryobject.y[0], i, temporaryobject.v])# reset temp
-
-        #Sorted according to x
-        points = sorted(points)
-        if points:
-            bps = [self.RR.getPureComponentBoilingTemp(self.RR.components[0],self.RR.P_psia), self.RR.getPureComponentBoilingTemp(self.RR.components[1],self.RR.P_psia)]
-            if bps[0] > bps[1]: # first component is lighter
-                bp_light, bp_heavy = bps[0], bps[1]
-                points.insert(0,[0,0, bp_heavy, None])
-                points.append([1,1,bp_light, None])
-            else: 
-                bp_light, bp_heavy = bps[1], bps[0]
-                points.insert(0,[0,0, bp_light, None])
-                points.append([1,1,bp_heavy, None])
+                                        text = ['{}'.format(i) for i in labels])
 
-        return points
+    def current_state(self, plotID):
+        # Current state traces alone, for updating a plot already on the page (last trace of every binary plot)
+        self.plotID = plotID
+        if plotID in ('yxP', 'yxT'):
+            return [self.current_marker()]
+        return [self.tieline()]
 
-    def generate_yx_constT_data(self):
-        # zA = composition of component A in VLE
-        # Generates (x,y,P) values using zA data at constant T
-        points = []
+    def generate_yx_constP_data(self, lo=None, hi=None, num=50):
+        # [x, y, T] points of the equilibrium line at the system P
+        # lo/hi narrow the T sweep (zoomed views), num is the number of T values tried
+        return list(equilibrium_curve(tuple(self.RR.components), 'T', self.RR.P, lo, hi, num))
 
-        # @ selected zA, vary P to obtain [x,y,P,v] values
-        bps = [self.RR.getPureComponentBoilingPressure(self.RR.components[0], self.RR.T_degR), self.RR.getPureComponentBoilingPressure(self.RR.components[1],self.RR.T_degR)]
-            
-        if bps[0] < bps[1]: # first component is lighter
-            bp_light, bp_heavy = bps[0], bps[1]
-        else: 
-            bp_light, bp_heavy = bps[1], bps[0]
-        temporaryobject = RachfordRice(self.RR.n, self.RR.T, self.RR.P, self.RR.components, self.RR.z)
-        for i in np.linspace(bp_heavy, bp_light, num = 50):
-            temporaryobject.setP(i)
-            if 0 <= temporaryobject.v and temporaryobject.v <= 1:
-                # points will have [[xA1,yA1,P1,v1],[xA2,yA2,P2,v2]]
-                points.append([temporaryobject.x[0], temporaryobject.y[0], i, temporaryobject.v])
-
-        #Sorted according to x
-        points = sorted(points)
-        if points:
-            bps = [self.RR.getPureComponentBoilingPressure(self.RR.components[0], self.RR.T_degR), self.RR.getPureComponentBoilingPressure(self.RR.components[1],self.RR.T_degR)]
-            
-            if bps[0] < bps[1]: # first component is lighter
-                bp_light, bp_heavy = bps[0], bps[1]
-                points.insert(0,[0,0, bp_heavy, None])
-                points.append([1,1,bp_light, None])
-            else: 
-                bp_light, bp_heavy = bps[1], bps[0]
-                points.insert(0,[0,0, bp_light, None])
-                points.append([1,1,bp_heavy, None])
-        return points
+    def generate_yx_constT_data(self, lo=None, hi=None, num=50):
+        # [x, y, P] points of the equilibrium line at the system T
+        # lo/hi narrow the P sweep (zoomed views), num is the number of P values tried
+        return list(equilibrium_curve(tuple(self.RR.components), 'P', self.RR.T, lo, hi, num))
 
     # Idea is on HTML, if y-x const P selected, run this method. Same for others
     # (1) Creates 45 degree line
@@ -168,42 +177,22 @@ class plot:
         # Adds the points to the fig and plots a line and marker chart
         pressure = self.RR.P
         component = self.RR.components[0]
-        self.fig.update_layout(
+        self.update_layout(
             title="<b>x-y Plot at Constant Pressure of " + str(pressure) + "kPa</b>",
             xaxis_title="x (" + component + ")",
-            yaxis_title = "y (" + component + ")",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            )
+            yaxis_title = "y (" + component + ")"
         )
 
-        self.fig.add_trace(go.Scatter(x=x_arr, y=y_arr, 
-                                      mode='markers+lines', name="Equilibrium Line", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(x_arr, y_arr, 
+                                      mode='markers+lines', name="Equilibrium Line", line = {'color': "#FF00FF"},
                                       hovertemplate =
                                       'x: %{x:.2f}' +
                                       '<br>y: %{y:.2f}'))
 
-        currentTemp = self.RR.T
-        current_x = [self.RR.x[0]]
-        current_y = [self.RR.y[0]]
-        self.fig.add_trace(go.Scatter(x=current_x, y=current_y, mode='markers', name="Current Temperature",
-                                      marker = dict(size=10),
-                                      hovertemplate =
-                                      'x: %{x:.2f}' +
-                                      '<br>y: %{y:.2f}<br>' +
-                                      '%{text}', text = [f'Temperature: {currentTemp}'+ chr(176) + "C"]))
+        self.add_trace(self.current_marker())
         
-        self.fig.update_xaxes(showspikes=True, range = [0, 1])
-        self.fig.update_yaxes(showspikes=True, range = [0, 1], scaleanchor = "x", scaleratio = 1)
+        self.fig['layout']['xaxis'] = FigureBuilder.merge(self.fig['layout']['xaxis'], {'range': [0, 1]})
+        self.fig['layout']['yaxis'] = FigureBuilder.merge(self.fig['layout']['yaxis'], {'range': [0, 1], 'scaleanchor': "x", 'scaleratio': 1})
         
     def plot_yx_constT(self):
         self.add_45degLine()
@@ -220,41 +209,21 @@ class plot:
         # Adds the points to the fig and plots a line and marker chart
         temperature = self.RR.T
         component = self.RR.components[0]
-        self.fig.update_layout(
+        self.update_layout(
             title="<b>x-y Plot at Constant Temperature of " + str(temperature) + chr(176) + "C</b>",
             xaxis_title="x (" + component + ")",
-            yaxis_title = "y (" + component + ")",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            )
+            yaxis_title = "y (" + component + ")"
         )
-        self.fig.add_trace(go.Scatter(x=x_arr, y=y_arr, 
-                                      mode='lines + markers', name="Equilibrium Line", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(x_arr, y_arr, 
+                                      mode='lines+markers', name="Equilibrium Line", line = {'color': "#FF00FF"},
                                       hovertemplate =
                                       'x: %{x:.2f}' +
                                       '<br>y: %{y:.2f}'))
 
-        currentPressure = self.RR.P
-        current_x = [self.RR.x[0]]
-        current_y = [self.RR.y[0]]
-        self.fig.add_trace(go.Scatter(x=current_x, y=current_y, mode='markers', name="Current Pressure",
-                                      marker = dict(size=10),
-                                      hovertemplate =
-                                      'x: %{x:.2f}' +
-                                      '<br>y: %{y:.2f}<br>' +
-                                      '%{text}', text = [f'Pressure: {currentPressure} kPa']))
+        self.add_trace(self.current_marker())
 
-        self.fig.update_xaxes(showspikes=True, range = [0, 1])
-        self.fig.update_yaxes(showspikes=True, range = [0, 1], scaleanchor = "x", scaleratio = 1)
+        self.fig['layout']['xaxis'] = FigureBuilder.merge(self.fig['layout']['xaxis'], {'range': [0, 1]})
+        self.fig['layout']['yaxis'] = FigureBuilder.merge(self.fig['layout']['yaxis'], {'range': [0, 1], 'scaleanchor': "x", 'scaleratio': 1})
     
     def plot_Pxy(self):
         self.create_plot()
@@ -272,40 +241,25 @@ class plot:
 
         pressure = self.RR.P
         component = self.RR.components[0]
-        self.fig.update_layout(
+        self.update_layout(
             title="<b>T-x-y Plot at Constant Pressure of " + str(pressure) + "kPa</b>",
             xaxis_title="x (" + component + ")/y (" + component + ")",
-            yaxis_title = "Temperature ("+chr(176)+"C)",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            )
+            yaxis_title = "Temperature ("+chr(176)+"C)"
         )
 
 
 
-        self.fig.add_trace(go.Scatter(x=x_arr, y=P_arr,
-                                      mode="lines", name="Bubble Line", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(x_arr, P_arr,
+                                      mode="lines", name="Bubble Line", line = {'color': "#FF00FF"},
                                       hovertemplate =
                                       'x: %{x:.2f}' +
                                       '<br>T: %{y:.2f}' + chr(176)+ 'C'))
-        self.fig.add_trace(go.Scatter(x=y_arr, y=P_arr,
-                                      mode="lines", name="Dew Line", line_color = "#FFFF00",
+        self.add_trace(FigureBuilder.scatter(y_arr, P_arr,
+                                      mode="lines", name="Dew Line", line = {'color': "#FFFF00"},
                                       hovertemplate =
                                       'y: %{x:.2f}' +
                                       '<br>T: %{y:.2f}' + chr(176)+ 'C'))
         self.create_tieline()
-
-        self.fig.update_xaxes(showspikes=True)
-        self.fig.update_yaxes(showspikes=True)
                                       
     def plot_Txy(self):
         self.create_plot()
@@ -322,47 +276,30 @@ class plot:
         # Adds the points for T-x and T-y to plot saturated lines
         temperature = self.RR.T
         component = self.RR.components[0]
-        self.fig.update_layout(
+        self.update_layout(
             title="<b>P-x-y Plot at Constant Temperature of " + str(temperature) + chr(176) + "C</b>",
             xaxis_title = "x (" + component + ")/y (" + component + ")",
-            yaxis_title="Pressure (kPa)",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            )
+            yaxis_title="Pressure (kPa)"
         )
 
-        self.fig.add_trace(go.Scatter(x=x_arr, y=T_arr,
-                                      mode="lines", name="Bubble Line", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(x_arr, T_arr,
+                                      mode="lines", name="Bubble Line", line = {'color': "#FF00FF"},
                                       hovertemplate =
                                       'x: %{x:.2f}' +
                                       '<br>P: %{y:.2f} kPa'))
-        self.fig.add_trace(go.Scatter(x=y_arr, y=T_arr,
-                                      mode="lines", name="Dew Line", line_color = "#FFFF00",
+        self.add_trace(FigureBuilder.scatter(y_arr, T_arr,
+                                      mode="lines", name="Dew Line", line = {'color': "#FFFF00"},
                                       hovertemplate =
                                       'y: %{x:.2f}' +
                                       '<br>P: %{y:.2f} kPa'))
         self.create_tieline()
 
-        self.fig.update_xaxes(showspikes=True)
-        self.fig.update_yaxes(showspikes=True)
-
     # To generate or show the graph plotted
     def generate(self):
-        return json.dumps(self.fig, cls=plotly.utils.PlotlyJSONEncoder)
+        return FigureJSON.dumps(self.fig)
     
     def show(self):
-        self.fig.update_xaxes(showspikes=True)
-        self.fig.update_yaxes(showspikes=True)
-        self.fig.show()
+        FigureBuilder.to_plotly(self.fig).show()
 
 class plot_pure:
     def __init__(self, Ant):
@@ -378,13 +315,11 @@ class plot_pure:
             T_arr.append(self.points[i][0])
             P_arr.append(self.points[i][1])
         
-        self.fig.add_trace(go.Scatter(x=T_arr, y=P_arr,
-                                        mode="lines", name="Equilibrium Line", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(T_arr, P_arr,
+                                        mode="lines", name="Equilibrium Line", line = {'color': "#FF00FF"},
                                         hovertemplate =
                                         'T: %{x:.2f} C' +
                                         '<br>P: %{y:.2f} kPa'))
-        self.fig.update_xaxes(showspikes=True)
-        self.fig.update_yaxes(showspikes=True)
 
     def generate_Psat(self):
         points = []
@@ -400,6 +335,7 @@ class plot_pure:
         return points
 
     create_plot = plot.__dict__["create_plot"]
+    add_trace = plot.__dict__["add_trace"]
     generate = plot.__dict__["generate"]
     show = plot.__dict__["show"]
 
@@ -421,46 +357,28 @@ class plot_steam:
 
         return [np.array(T_ls), np.array(P_ls)*100] # T in degC and P in kPa
 
+    def create_plot(self):
+        self.fig = FigureBuilder.figure([], FigureBuilder.layout('steam'))
+
     def plot_steamVLE(self):
         self.create_plot()
         self.points = self.generate_vapcurve()
 
-        self.fig.update_layout(
-            title="<b>Vaporization Curve of Water</b>",
-            xaxis_title = "Temperature" + chr(176) + "C",
-            yaxis_title="Pressure (kPa)",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            )
-        )
-        
-        self.fig.add_trace(go.Scatter(x=self.points[0], y=self.points[1],
-                                        mode="lines", name="Vaporization Curve", line_color = "#FF00FF",
+        self.add_trace(FigureBuilder.scatter(self.points[0], self.points[1],
+                                        mode="lines", name="Vaporization Curve", line = {'color': "#FF00FF"},
                                         hovertemplate =
                                         'T: %{x:.2f} C' +
                                         '<br>P: %{y:.2f} kPa'))
 
-        self.fig.add_annotation(x=self.sys.triplePointT(), y=self.sys.triplePointP(), text = "TRIPLE <br> POINT", showarrow=True, arrowhead=1, align="left")
+        self.fig['layout']['annotations'] = [dict(x=self.sys.triplePointT(), y=self.sys.triplePointP(), text = "TRIPLE <br> POINT", showarrow=True, arrowhead=1, align="left")]
 
-        self.fig.update_xaxes(showspikes=True)
-        self.fig.update_yaxes(showspikes=True)
 
-
-    create_plot = plot.__dict__["create_plot"]
+    add_trace = plot.__dict__["add_trace"]
     generate = plot.__dict__["generate"]
     show = plot.__dict__["show"]
 
     def generate(self):
-        return json.dumps(self.fig, cls=plotly.utils.PlotlyJSONEncoder)
+        return FigureJSON.dumps(self.fig)
 
 def GvsP(T): #ISOTHERMAL T in degC
     #useful link: https://chem.libretexts.org/Bookshelves/Physical_and_Theoretical_Chemistry_Textbook_Maps/Map%3A_Physical_Chemistry_(McQuarrie_and_Simon)/23%3A_Phase_Equilibria/23.02%3A_Gibbs_Energies_and_Phase_Diagrams
@@ -499,39 +417,25 @@ def GvsP(T): #ISOTHERMAL T in degC
             S[pressure*100] = Sliq_val[pressure*100]
             H[pressure*100] = Hliq_val[pressure*100]
     
-    fig = go.Figure()
-    fig.update_layout(template='plotly_dark', 
-        paper_bgcolor='rgba(0,0,0,0)',
+    fig = FigureBuilder.figure([], FigureBuilder.layout('gibbs',
         title="<b>Gibbs Energy vs Pressure</b>",
         xaxis_title = "Pressure (kPa)",
-        yaxis_title="Gibbs (kJ/kg)",
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        font=dict(
-            family="Helvetica Neue, monospace",
-            size=12,
-            color="#FFFFFF"
-        ))
-    fig.add_trace(go.Scatter(x=[pressure*100 for pressure in total_range], y=list(Ggas.values()),
+        yaxis_title="Gibbs (kJ/kg)"))
+    fig['data'].append(FigureBuilder.scatter([pressure*100 for pressure in total_range], list(Ggas.values()),
                     mode='lines+markers', 
                     name='G<sup>vap</sup><sub>water</sub>',
                     showlegend=True,
                     hovertemplate =
                     'P: %{x:.2f} kPa' +
                     '<br>G: %{y:.2f} kJ/kg'))
-    fig.add_trace(go.Scatter(x=[pressure*100 for pressure in total_range], y=list(Gliq.values()),
+    fig['data'].append(FigureBuilder.scatter([pressure*100 for pressure in total_range], list(Gliq.values()),
                     mode='lines+markers', 
                     name='G<sup>liq</sup><sub>water</sub>',
                     showlegend=True,
                     hovertemplate =
                     'P: %{x:.2f} kPa' +
                     '<br>G: %{y:.2f} kJ/kg'))
-    fig.add_trace(go.Scatter(x=[pressure*100 for pressure in total_range], y=list(G.values()),
+    fig['data'].append(FigureBuilder.scatter([pressure*100 for pressure in total_range], list(G.values()),
                         mode='lines+markers', 
                         name='G<sup>sys</sup><sub>water</sub>',
                         showlegend=True,
@@ -539,7 +443,7 @@ def GvsP(T): #ISOTHERMAL T in degC
                         'P: %{x:.2f} kPa' +
                         '<br>G: %{y:.2f} kJ/kg'))
 
-    return (json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder), G, Ggas, Gliq, H, Hgas_val, Hliq_val, S, Sgas_val, Sliq_val, specific_vol)
+    return (FigureJSON.dumps(fig), G, Ggas, Gliq, H, Hgas_val, Hliq_val, S, Sgas_val, Sliq_val, specific_vol)
 
 def GvsT(P): # ISOBARIC P in bar
     #useful link: https://chem.libretexts.org/Bookshelves/Physical_and_Theoretical_Chemistry_Textbook_Maps/Map%3A_Physical_Chemistry_(McQuarrie_and_Simon)/23%3A_Phase_Equilibria/23.02%3A_Gibbs_Energies_and_Phase_Diagrams
@@ -578,39 +482,25 @@ def GvsT(P): # ISOBARIC P in bar
             S[temperature] = Sliq_val[temperature]
             H[temperature] = Hliq_val[temperature]
 
-    fig = go.Figure()
-    fig.update_layout(template='plotly_dark', 
-            paper_bgcolor='rgba(0,0,0,0)',
+    fig = FigureBuilder.figure([], FigureBuilder.layout('gibbs',
             title="<b>Gibbs Energy vs Temperature</b>",
             xaxis_title = "Temperature" + chr(176) + "C",
-            yaxis_title="Gibbs (kJ/kj)",
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            font=dict(
-                family="Helvetica Neue, monospace",
-                size=12,
-                color="#FFFFFF"
-            ))
-    fig.add_trace(go.Scatter(x=total_range, y=list(Ggas.values()),
+            yaxis_title="Gibbs (kJ/kj)"))
+    fig['data'].append(FigureBuilder.scatter(total_range, list(Ggas.values()),
                     mode='lines+markers', 
                     name='G<sup>vap</sup><sub>water</sub>',
                     showlegend=True,
                     hovertemplate =
                     'P: %{x:.2f} kPa' +
                     '<br>G: %{y:.2f} kJ/kg'))
-    fig.add_trace(go.Scatter(x=total_range, y=list(Gliq.values()),
+    fig['data'].append(FigureBuilder.scatter(total_range, list(Gliq.values()),
                     mode='lines+markers', 
                     name='G<sup>liq</sup><sub>water</sub>',
                     showlegend=True,
                     hovertemplate =
                     'P: %{x:.2f} kPa' +
                     '<br>G: %{y:.2f} kJ/kg'))
-    fig.add_trace(go.Scatter(x=total_range, y=list(G.values()),
+    fig['data'].append(FigureBuilder.scatter(total_range, list(G.values()),
                         mode='lines+markers', 
                         name='G<sup>sys</sup><sub>water</sub>',
                         showlegend=True,
@@ -618,7 +508,7 @@ def GvsT(P): # ISOBARIC P in bar
                         'P: %{x:.2f} kPa' +
                         '<br>G: %{y:.2f} kJ/kg'))
     
-    return (json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder), G, Ggas, Gliq, H, Hgas_val, Hliq_val, S, Sgas_val, Sliq_val, specific_vol)
+    return (FigureJSON.dumps(fig), G, Ggas, Gliq, H, Hgas_val, Hliq_val, S, Sgas_val, Sliq_val, specific_vol)
 
 
 # Testing functions
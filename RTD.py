@@ -21,14 +21,105 @@ import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import plotly
 import json
-#Instasll rtdpy first! (TRY INSTALL MANUALLY INSTEAD OF PIP) idk why it installed older version
-import rtdpy
+import FigureJSON
+import FigureBuilder
+# E/F come from RTDModels (closed form). rtdpy is only needed to check it: python RTDModels.py
+import RTDModels
+import Tracer
 import time
+from functools import lru_cache
+
+# Time step of the concentration (C) plots, which the pages animate point by point
+C_DT = .25
+
+# The C plots play back at FPS frames per second, one keyframe per frame, covering PLAYBACK_SPEED
+# seconds of reactor time per second (one C_DT point per frame)
+FPS = 60
+PLAYBACK_SPEED = C_DT * FPS
+
+# Axial dispersion families: points from 0 to 3 tau, and the most Peclet numbers drawn at once
+DISPERSION_POINTS = 601
+# Time step of the arbitrary inlet plots, and the most points one may have (dt grows past it)
+INLET_DT = .01
+MAX_INLET_POINTS = 200_000
+MAX_PECLET = 64
+
+class RTDResult:
+    # One reactor run kept as NumPy arrays: time and the concentration (C), exit age (E) and
+    # cumulative (F) curves computed on it (None when not computed)
+    # The arrays go into figures (FigureJSON) and templates (jsarray filter) as they are, never as lists
+    def __init__(self, time, C=None, E=None, F=None, dt=None, time_end=None):
+        self.time = np.asarray(time, dtype=float)
+        self.C = None if C is None else np.asarray(C, dtype=float)
+        self.E = None if E is None else np.asarray(E, dtype=float)
+        self.F = None if F is None else np.asarray(F, dtype=float)
+        # Grid the curves were evaluated on (rtdpy: time = np.arange(0, time_end, dt)), dt is None
+        # for the nonuniform event grids of RTDModels.event_model
+        self.dt = dt
+        self.time_end = time_end
+
+    def interp(self, t, curve):
+        # Curve at times t, linear between grid points, on uniform and nonuniform grids alike
+        return np.interp(t, self.time, getattr(self, curve))
+
+    def resample(self, dt):
+        # The curves on a uniform dt grid from 0 to time_end (e.g. the C plots' C_DT axis), read off the
+        # grid they were computed on instead of evaluating the model again
+        time = RTDModels.time_grid(dt, self.time_end)
+        curves = {curve: self.interp(time, curve) for curve in ('C', 'E', 'F') if getattr(self, curve) is not None}
+        return RTDResult(time, **curves, dt=dt, time_end=self.time_end)
+
+    def frames(self, curve, **props):
+        # Animation played by the Display button: one frame with the whole curve
+        return [[FigureBuilder.scatter(self.time, getattr(self, curve), **props)]]
+
+    def index(self, t):
+        # Position of time t on the time axis (the first point at or after it)
+        return min(int(np.searchsorted(self.time, t - 1e-9)), self.time.size - 1)
+
+    def keyframes(self, curve, fps=FPS, speed=PLAYBACK_SPEED):
+        # The points a page appends to its animated plot, one per frame: the curve at evenly spaced
+        # times, as many as the playback ((time span)/speed seconds at fps) has frames, plus its
+        # events (extremes and both ends of its largest jump) so spikes and fronts are drawn exactly
+        values = getattr(self, curve)
+        count = int(round((self.time[-1] - self.time[0]) / speed * fps)) + 1
+        index = np.minimum(np.searchsorted(self.time, np.linspace(self.time[0], self.time[-1], count) - 1e-9), self.time.size - 1)
+        jump = int(np.abs(np.diff(values)).argmax()) if values.size > 1 else 0
+        index = np.union1d(index, [values.argmax(), values.argmin(), jump, min(jump + 1, values.size - 1)])
+        return RTDResult(self.time[index], **{curve: values[index]}, dt=self.dt, time_end=self.time_end)
+
+@lru_cache(maxsize=64)
+def rtd_kernel(reactorType, tau, n, dt, time_end, bypass=0, deadvol=0):
+    # E and F evaluated once per reactor configuration, shared between requests, so the arrays are
+    # made read only. dt None gives the event-aware nonuniform grid the E/F plots are drawn on
+    if dt is None:
+        time, E, F = RTDModels.event_model(reactorType, tau, n, time_end, bypass, deadvol)
+    else:
+        time, E, F = RTDModels.model(reactorType, tau, n, dt, time_end, bypass, deadvol)
+    result = RTDResult(time, E=E, F=F, dt=dt, time_end=time_end)
+    for arr in (result.time, result.E, result.F):
+        arr.setflags(write=False)
+    return result
+
+@lru_cache(maxsize=16)
+def dispersion_kernel(tau, Pe, boundary):
+    # E and F of an axial dispersion vessel ('open' or 'closed') for a tuple of Peclet numbers,
+    # evaluated together (RTDModels.dispersion_family), read only like rtd_kernel's
+    time = np.linspace(0, tau*3, DISPERSION_POINTS)
+    E, F = RTDModels.dispersion_family(time, tau, np.array(Pe), boundary)
+    result = RTDResult(time, E=E, F=F, time_end=tau*3)
+    for arr in (result.time, result.E, result.F):
+        arr.setflags(write=False)
+    return result
 
 class RTD:
+
+    # Frame rate the pages play the C plot keyframes at
+    fps = FPS
     
     def __init__(self,V_reactor,flow, type):
-        types = ['pulse', 'step']
+        # 'arbitrary': the inlet signal is given to outlet() instead
+        types = ['pulse', 'step', 'arbitrary']
         if type in types:
             self.V_reactor = V_reactor
             self.flow = flow
@@ -53,6 +144,65 @@ class RTD:
         plt.show()
     '''
 
+    def response(self, reactorType, n=1, dt=.01, time_end=None):
+        # Exit age (E) and step response (F) of the ideal reactor on a dt grid
+        return rtd_kernel(reactorType, self.tau, n, dt, time_end or (self.tau*2 if reactorType == "pfr" else self.tau*5))
+
+    def grid(self, reactorType):
+        # dt and time_end of the E/F curves: a PFR runs to 2 tau, a CSTR to 5 tau, both on event-aware
+        # nonuniform grids (dt None, RTDModels.event_model): the PFR spike sits exactly at tau for any tau
+        # (1/SPIKE_WIDTH = 100 high) and the CSTR curves are the cached dimensionless ones rescaled
+        if reactorType == "pfr":
+            return None, self.tau*2
+        return None, self.tau*5
+
+    def kernel(self, reactorType, n=1, tau=None, bypass=0, deadvol=0, dt=None):
+        # Shared evaluation on this reactor's grid (or on a dt grid).
+        # Real_RTD passes its bypass and dead volume fractions (or another tau) to get the real
+        # reactor on the same grid
+        grid_dt, time_end = self.grid(reactorType)
+        return rtd_kernel(reactorType, tau or self.tau, n, dt or grid_dt, time_end, bypass, deadvol)
+
+    def pfr_front(self, bypass=0, deadvol=0):
+        # Time axis of a PFR C plot (every C_DT to 2 tau, animated point by point) with the exact time
+        # the tracer front arrives added, and F on it: a step at the front, from the bypassed fraction to 1
+        tau_active = self.tau * (1 - deadvol) / (1 - bypass)
+        time = RTDModels.with_events(RTDModels.time_grid(C_DT, self.tau*2), [tau_active])
+        return RTDResult(time, F=bypass + (1 - bypass)*(time >= tau_active)), tau_active
+
+    def outlet(self, reactorType, inlet, dt, n=1, bypass=0, deadvol=0):
+        # Outlet concentration for an arbitrary inlet signal (Tracer) sampled every dt from t = 0
+        # E runs over the whole signal, and at least to where the pages stop plotting it
+        inlet = np.asarray(inlet, dtype=float)
+        time_end = max(dt*inlet.size, self.grid(reactorType)[1])
+        kernel = rtd_kernel(reactorType, self.tau, n, dt, time_end, bypass, deadvol)
+        size = min(inlet.size, kernel.time.size)
+        return RTDResult(kernel.time[:size], C=Tracer.outlet(inlet[:size], kernel.E, dt),
+                         E=kernel.E[:size], F=kernel.F[:size], dt=dt, time_end=dt*size)
+
+    def inlet_C(self, reactorType, shape, period=None, n=1):
+        # Inlet and outlet concentrations for one of the Tracer.SIGNALS (period defaults to tau), over the
+        # E/F plots' span or three periods, whichever is longer
+        period = period or self.tau
+        time_end = max(self.grid(reactorType)[1], period*3)
+        dt = max(INLET_DT, time_end/MAX_INLET_POINTS)
+        C_in = Tracer.inlet(shape, RTDModels.time_grid(dt, time_end), period)
+        self.result = self.outlet(reactorType, C_in, dt, n)
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(self.result.time, C_in[:self.result.time.size], name="Inlet"),
+                  FigureBuilder.scatter(self.result.time, self.result.C, name="Outlet")],
+            layout=FigureBuilder.layout('rtd_C',
+                xaxis=dict(range=[0, self.result.time_end]),
+                yaxis=dict(range=[0, max(C_in.max(), self.result.C.max())*1.1]),
+                legend=FigureBuilder.LEGEND,
+                title="{} {} Inlet: Plot of Concentration against Time".format(reactorType.upper(), shape.capitalize()),
+            )
+        )
+
+        self.fig = fig
+        return FigureJSON.dumps(fig)
+
     #rtdpy not as nice as signal.unit_impulse for PFR
     # 3 methods for ideal PFR RTD:
     #   1) pfr = rtdpy.Pfr(tau = tau, dt=.01, time_end=100)
@@ -62,221 +212,163 @@ class RTD:
 
     def PFR(self):
 
-        xdata = []
-        ydata = []
-        PFR = rtdpy.Pfr(tau=self.tau, dt=.25, time_end=self.tau*2)
+        PFR, tau = self.pfr_front()
         x = PFR.time
         if self.type == 'pulse':
-            y = PFR.exitage*25
-            if not self.tau.is_integer():
-                y.fill(0)
-            # print(y)
+            # Whole pulse leaves at tau (a point of the time axis for any tau)
+            y = np.where(x == tau, 100., 0.)
         else:
-            y = PFR.stepresponse*100
-            y = np.where(y < 50, 0, y)
-            y = np.where(y >= 50, 100, y)
+            y = 100*PFR.F
         
-        if not self.tau.is_integer():
-            x = list(x)
-            x.append(round(self.tau,2))
-            # print(x)
-            x = sorted(x)
-            index = x.index(round(self.tau, 2))
-            # print(index)
-            y = list(y)
-            y.insert(index, 100)
-            # print(y)
-        
-        self.x = list(x).copy()
-        self.y = list(y).copy()
-        self.length = self.x.index(float("{:.2f}".format(self.tau)))
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
+        self.length = self.result.index(self.tau)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[], name = "PFR")],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name = "PFR")],
+            layout=FigureBuilder.layout('rtd_C',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, 110], autorange=False, showticklabels=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, 110], showticklabels=False),
                 title="Ideal PFR: Plot of Concentration against Time",
             ),
         )
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_E(self):
         xdata, ydata = [], []
-        PFR = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
-        x = PFR.time
-        y = PFR.exitage
-        # x = x[::25]
-        # y = y[::25]
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
+        self.result = self.kernel("pfr")
+        frames = self.result.frames('E')
         
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name = "PFR")],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name = "PFR")],
+            layout=FigureBuilder.layout('rtd_E',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, 110], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, 110]),
                 title="Ideal PFR: Plot of E against Time",
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-               buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": False},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
 
-        
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_F(self):
         xdata, ydata = [], []
-        PFR = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
-        x = PFR.time
-        y = PFR.stepresponse 
-        # x = x[::25]
-        # y = y[::25]
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
+        self.result = self.kernel("pfr")
+        frames = self.result.frames('F')
         
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name = "PFR")],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name = "PFR")],
+            layout=FigureBuilder.layout('rtd_F',
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, self.result.F.max()*1.1]),
                 title="Ideal PFR: Plot of F against Time",
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": False},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
         
 
     def CSTR(self, n):
-        CSTR = rtdpy.Ncstr(tau=self.tau, n = n, dt=.25, time_end=self.tau*5)
-        # x = np.arange(0, self.tau*5, 0.25)
+        # The E/F views' kernel, read at every C_DT for the animated C plot
+        CSTR = self.kernel("cstr", n).resample(C_DT)
         x = CSTR.time
-        y = []
 
+        # Outlet concentration is the amount injected over Q times E (pulse) or F (step)
         if self.type == "pulse":
-            for t in x:
-                c = (100/self.V_reactor)*math.exp((-1)*self.flow*t/self.V_reactor)
-                y.append(c)
+            y = (100/self.flow)*CSTR.E
         else:
-            for t in x:
-                c = (100/self.flow)*(1-math.exp((-1)*(self.flow)*t/self.V_reactor))
-                y.append(c)
+            y = (100/self.flow)*CSTR.F
 
-        self.x = list(x).copy()
-        self.y = list(y).copy()
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
         self.length = len(self.x)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[])],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [])],
+            layout=FigureBuilder.layout('rtd_C',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="Ideal CSTR: Plot of Concentration against Time"
             )
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_E(self,n):
 
-        CSTR = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
         xdata, ydata = [], []
-        x = CSTR.time
-        y = CSTR.exitage
-            
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+        self.result = self.kernel("cstr", n)
+        frames = self.result.frames('E')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata)],
+            layout=FigureBuilder.layout('rtd_E',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, self.result.E.max()*1.1]),
                 title="Ideal CSTR: Plot of E against Time",
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": False},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
 
     def CSTR_F(self,n):
 
-        CSTR = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
         xdata, ydata = [], []
-        x = CSTR.time
-        y = CSTR.stepresponse
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        self.result = self.kernel("cstr", n)
+        frames = self.result.frames('F')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata)],
+            layout=FigureBuilder.layout('rtd_F',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, self.result.F.max()*1.1]),
                 title="Ideal CSTR: Plot of F against Time",
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": False},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
         
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
+
+    def dispersion_E(self, Pe, boundary="open"):
+        # E family of an axial dispersion PFR, one trace per Peclet number, played with the Display button
+        self.result = dispersion_kernel(self.tau, tuple(Pe), boundary)
+        traces = [FigureBuilder.scatter(self.result.time, E, name="Pe = {:g}".format(p)) for p, E in zip(Pe, self.result.E)]
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name=trace['name']) for trace in traces],
+            layout=FigureBuilder.layout('rtd_E',
+                xaxis=dict(range=[0, self.tau*3]),
+                yaxis=dict(range=[0, self.result.E.max()*1.1]),
+                title="Axial Dispersion ({}-{}): Plot of E against Time".format(boundary.capitalize(), boundary),
+            ), frames = [traces]
+        )
+
+        self.fig = fig
+        return FigureJSON.dumps(fig)
+
+    def dispersion_F(self, Pe, boundary="open"):
+        self.result = dispersion_kernel(self.tau, tuple(Pe), boundary)
+        traces = [FigureBuilder.scatter(self.result.time, F, name="Pe = {:g}".format(p)) for p, F in zip(Pe, self.result.F)]
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name=trace['name']) for trace in traces],
+            layout=FigureBuilder.layout('rtd_F',
+                xaxis=dict(range=[0, self.tau*3]),
+                yaxis=dict(range=[0, 1.1]),
+                title="Axial Dispersion ({}-{}): Plot of F against Time".format(boundary.capitalize(), boundary),
+            ), frames = [traces]
+        )
+
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
 # a = RTD(50,2,'pulse')  # esp for PFR, ONLY INTEGER VALUES
 # a.CSTR(1)
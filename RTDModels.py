@@ -0,0 +1,254 @@
+import numpy as np
+from functools import lru_cache
+from scipy import special
+import Network
+
+# Closed form residence time distributions
+# E(t) and F(t) of the ideal reactors on rtdpy's time grid, as plain NumPy
+# expressions, so pages never build rtdpy objects:
+#   N-CSTR (tanks in series, any n > 0): E = n^n t^(n-1) exp(-n t/tau) / (tau^n Gamma(n))
+#                                        F = P(n, n t/tau), the regularized lower incomplete gamma
+#   Axial dispersion, open-open vessel (dispersion number D = D/uL):
+#        E = exp(-(1-theta)^2/(4 D theta)) / (tau sqrt(4 pi D theta)), mean residence time tau (1 + 2D)
+#        F = (erfc((1-theta)/(2 sqrt(D theta))) - exp(1/D) erfc((1+theta)/(2 sqrt(D theta))))/2
+#   Axial dispersion, closed-closed vessel: no closed form in t (its eigenfunction series cancels
+#        terms of size exp(Pe/2) at high Peclet numbers), so its Laplace transform
+#        (Network.dispersion) is inverted with Network.fourier, mean residence time tau
+#   Both dispersion models take arrays of D (e.g. D[:, None] for a family of curves over time)
+#   PFR: a delay of tau. E is rtdpy's discrete spike (area 1 split over the two grid points
+#        around tau) and F its running integral
+# Non-ideal reactors combine these with bypass and dead volume, see model().
+# model() works on rtdpy's uniform grid (needed for FFT convolution). The
+# plotted curves use event_model() instead: a nonuniform grid that contains the
+# exact events (t = 0, tau_active) and is dense where the curves bend and
+# sparse in flat tails, so a PFR front is exact for any tau with a few points.
+# In dimensionless time theta = t/tau the N-CSTR curves depend on n only (E = E_theta(t/tau)/tau,
+# F = F_theta(t/tau)), so they are computed once per n on a fine theta grid and rescaled to each tau.
+# rtdpy is only used to check the results: python RTDModels.py
+
+def time_grid(dt, time_end):
+    # Same grid as rtdpy
+    return np.arange(0, time_end, dt)
+
+def cumulative(E, dt):
+    # Running trapezoid integral (rtdpy's step response) on an even grid
+    F = np.empty_like(E)
+    F[0] = 0
+    np.cumsum((E[1:] + E[:-1]) * (dt/2), out=F[1:])
+    return F
+
+def pfr(time, tau, dt):
+    if tau <= 0 or tau >= time[-1]:
+        raise ValueError("PFR tau must be inside the time grid")
+    E = np.zeros_like(time)
+    i = np.flatnonzero(time <= tau)[-1]
+    E[i] = (time[i+1] - tau) / dt / dt
+    E[i+1] = (tau - time[i]) / dt / dt
+    return E, cumulative(E, dt)
+
+def ncstr(time, tau, n):
+    if tau <= 0 or n <= 0:
+        raise ValueError("N-CSTR tau and n must be positive")
+    theta = time / tau
+    # In logs so large n does not overflow; xlogy gives 0 for t = 0 when n = 1
+    E = np.exp(special.xlogy(n - 1, theta) + n*np.log(n) - special.gammaln(n) - n*theta) / tau
+    F = special.gammainc(n, n*theta)
+    return E, F
+
+def dispersion(time, tau, D):
+    if tau <= 0 or np.any(np.asarray(D) <= 0):
+        raise ValueError("Dispersion tau and D must be positive")
+    theta = time / tau
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = 2*np.sqrt(D*theta)
+        E = np.where(theta > 0, np.exp(-((1 - theta)/root)**2) / (np.sqrt(np.pi) * root * tau), 0.)
+        # exp(1/D) erfc(u) written as exp(1/D - u^2) erfcx(u), whose exponent is never positive
+        upper = (1 + theta) / root
+        F = np.where(theta > 0, (special.erfc((1 - theta)/root) - np.exp(1/D - upper**2) * special.erfcx(upper)) / 2, 0.)
+    return E, F
+
+def closed_dispersion(time, tau, D):
+    # time must run from 0; E and F for every D come from one inversion
+    D = np.asarray(D, dtype=float)
+    if tau <= 0 or np.any(D <= 0):
+        raise ValueError("Dispersion tau and D must be positive")
+    transfer = Network.dispersion(tau, D[..., None])
+    E, F = Network.fourier(lambda s: np.stack([transfer(s), transfer(s)/s]), time)
+    return np.maximum(E, 0), np.clip(F, 0, 1)
+
+def dispersion_family(time, tau, Pe, boundary="open"):
+    # E and F of an axial dispersion vessel for every Peclet number (Pe = 1/D), shape Pe.shape + time.shape
+    D = 1 / np.asarray(Pe, dtype=float)[..., None]
+    if boundary == "closed":
+        return closed_dispersion(time, tau, D[..., 0])
+    return dispersion(time, tau, D)
+
+# theta grid of the cached dimensionless curves
+THETA_STEP = 1/2000
+THETA_END = 20
+
+@lru_cache(maxsize=16)
+def dimensionless(n):
+    # theta, E_theta and F_theta of an N-CSTR (shared between requests, so read only)
+    theta = np.arange(int(round(THETA_END/THETA_STEP))) * THETA_STEP
+    E, F = ncstr(theta, 1, n)
+    for arr in (theta, E, F):
+        arr.setflags(write=False)
+    return theta, E, F
+
+def scaled_ncstr(time, tau, n, dt):
+    # ncstr() on time = np.arange(0, time_end, dt). When dt is a whole number of THETA_STEPs of tau
+    # the grid is every k-th point of the cached curve, so E costs one multiply; otherwise
+    # (zoomed windows, bypass) the closed form is evaluated directly
+    step = dt / tau / THETA_STEP
+    k = int(round(step))
+    if k < 1 or abs(step - k) > 1e-6 or (time.size - 1)*k >= THETA_END/THETA_STEP:
+        return ncstr(time, tau, n)
+    theta, E, F = dimensionless(n)
+    # copy: orjson only writes contiguous arrays
+    return E[::k][:time.size] * (1/tau), F[::k][:time.size].copy()
+
+def model(reactorType, tau, n=1, dt=.01, time_end=None, bypass=0, deadvol=0):
+    # time, E and F of a reactor with mean residence time tau = V/Q
+    # bypass: fraction of the flow that goes straight to the outlet
+    # deadvol: fraction of the volume that does not take part in the flow
+    # The active part has tau (1-deadvol)/(1-bypass) and carries (1-bypass) of the tracer; the bypassed
+    # tracer leaves at t = 0, drawn as a spike on the first grid interval (its area is bypass)
+    time = time_grid(dt, time_end)
+    tau_active = tau * (1 - deadvol) / (1 - bypass)
+    if reactorType == "pfr":
+        E, F = pfr(time, tau_active, dt)
+    else:
+        E, F = scaled_ncstr(time, tau_active, n, dt)
+    if bypass:
+        E = (1 - bypass) * E
+        E[0] += 2 * bypass / dt
+        F = bypass + (1 - bypass) * F
+    return time, E, F
+
+# Tail weight at which the recycle series of combined() is cut off
+RECYCLE_TOL = 1e-8
+
+def combined(time, tau, n=1, bypass=0, deadvol=0, recycle=0, bypass_as="spike"):
+    # Tanks in series with bypass, dead volume and a recycle stream, vectorized over the parameters:
+    # n, bypass, deadvol and recycle may be arrays, and E and F have their broadcast shape + time.shape
+    # The bypassed tracer leaves at t = 0, drawn in E as a spike on the first interval whose area is
+    # bypass (bypass_as "spike", as model() draws it) or as E(0) raised by bypass (bypass_as "height",
+    # the marker the real reactor page's curves show)
+    # With a recycle ratio R the active volume is passed at (1+R)Q, so one pass takes tau_pass =
+    # tau_active/(1+R), and a fraction 1/(1+R) leaves after each pass. k+1 passes through n tanks are
+    # n(k+1) tanks, so E is a series of gamma densities weighted (1/(1+R)) (R/(1+R))^k
+    n, bypass, deadvol, recycle = (np.asarray(p, dtype=float)[..., None] for p in np.broadcast_arrays(n, bypass, deadvol, recycle))
+    tau_pass = tau * (1 - deadvol) / (1 - bypass) / (1 + recycle)
+    scale = tau_pass / n
+    leave = 1 / (1 + recycle)
+    stay = recycle * leave
+    most = stay.max()
+    passes = 1 if most == 0 else int(min(np.ceil(np.log(RECYCLE_TOL) / np.log(most)), 1000))
+
+    E = np.zeros(n.shape[:-1] + time.shape)
+    F = np.zeros_like(E)
+    for k in range(passes):
+        shape = n * (k + 1)
+        weight = leave * stay**k
+        E += weight * np.exp(special.xlogy(shape - 1, time) - special.gammaln(shape) - shape*np.log(scale) - time/scale)
+        F += weight * special.gammainc(shape, time/scale)
+    bypass = bypass[..., 0]
+    E *= (1 - bypass)[..., None]
+    if bypass_as == "spike":
+        E[..., 0] += 2 * bypass / (time[1] - time[0])
+    elif bypass_as == "height":
+        E[..., 0] += bypass
+    else:
+        raise ValueError("Unknown bypass drawing {}".format(bypass_as))
+    F = bypass[..., None] + (1 - bypass)[..., None] * F
+    return E, F
+
+# Half width of the drawn PFR and bypass spikes (peak 1/SPIKE_WIDTH = 100, as on a dt = 0.01 grid)
+SPIKE_WIDTH = .01
+# Largest distance, relative to the curve's maximum, between an adaptive grid's straight lines and the curve
+ADAPTIVE_TOL = 1e-3
+ADAPTIVE_START = 33
+ADAPTIVE_MAX = 4000
+
+def with_events(time, events):
+    # time with the event times inside its range added, sorted
+    events = [e for e in events if time[0] <= e <= time[-1]]
+    return np.union1d(time, events)
+
+def adaptive_grid(f, start, end, events=(), tol=ADAPTIVE_TOL, points=ADAPTIVE_START, max_points=ADAPTIVE_MAX):
+    # Grid on [start, end] on which straight lines between points follow every curve of f(t) (a tuple of
+    # arrays) to within tol of its largest value. Events are always grid points; any interval whose
+    # midpoint is off the chord is halved, until none are
+    time = with_events(np.linspace(start, end, points), events)
+    values = np.stack(f(time))
+    while time.size < max_points:
+        scale = np.abs(values).max(axis=1, keepdims=True)
+        scale[scale == 0] = 1
+        middle = (time[:-1] + time[1:]) / 2
+        middle_values = np.stack(f(middle))
+        off = (np.abs(middle_values - (values[:, :-1] + values[:, 1:])/2) > tol*scale).any(axis=0)
+        if not off.any():
+            break
+        at = np.flatnonzero(off) + 1
+        time = np.insert(time, at, middle[off])
+        values = np.insert(values, at, middle_values[:, off], axis=1)
+    return time, values
+
+@lru_cache(maxsize=64)
+def adaptive_dimensionless(n, theta_end, events=()):
+    # theta, E_theta and F_theta of an N-CSTR on an adaptive grid; like dimensionless(), any tau
+    # reuses it with one multiply (read only, shared between requests)
+    theta, (E, F) = adaptive_grid(lambda theta: ncstr(theta, 1, n), 0, theta_end, (1,) + events)
+    for arr in (theta, E, F):
+        arr.setflags(write=False)
+    return theta, E, F
+
+def spike(time, at, area=1):
+    # A triangle of the given area and half width SPIKE_WIDTH peaking at `at`, and its exact integral
+    # (so F = 1/2 at the peak, as with rtdpy's on-grid spike)
+    # Rounded so the grid points at at +- SPIKE_WIDTH give exactly 0 and 1
+    x = np.clip(np.round((time - at) / SPIKE_WIDTH, 9), -1, 1)
+    E = area * (1 - np.abs(x)) / SPIKE_WIDTH
+    F = area * np.where(x < 0, (1 + x)**2 / 2, 1 - (1 - x)**2 / 2)
+    return E, F
+
+def event_model(reactorType, tau, n=1, time_end=None, bypass=0, deadvol=0):
+    # time, E and F on a nonuniform grid from 0 to time_end, with the same parameters as model()
+    tau_active = tau * (1 - deadvol) / (1 - bypass)
+    if reactorType == "pfr":
+        if tau_active >= time_end:
+            raise ValueError("PFR tau must be inside the time grid")
+        events = [tau_active - SPIKE_WIDTH, tau_active, tau_active + SPIKE_WIDTH] + ([SPIKE_WIDTH] if bypass else [])
+        time = with_events(np.array([0., time_end]), events)
+        E, F = spike(time, tau_active)
+    else:
+        theta, E, F = adaptive_dimensionless(n, time_end / tau_active, (SPIKE_WIDTH / tau_active,) if bypass else ())
+        time, E, F = theta * tau_active, E / tau_active, F.copy()
+    if bypass:
+        # The bypassed tracer leaves at t = 0: drawn as the right half of a spike of area bypass
+        E = (1 - bypass) * E + 2 * spike(time, 0, bypass)[0]
+        F = bypass + (1 - bypass) * F
+    return time, E, F
+
+def check_against_rtdpy():
+    # Largest difference from rtdpy's E and F over a range of models (F is rtdpy's trapezoid
+    # integral, so the closed form N-CSTR F differs by the trapezoid error, O(dt^2))
+    import rtdpy
+    worst = {'E': 0, 'F': 0}
+    for tau in [1, 3.3, 7.5, 10, 20]:
+        for dt in [.01, .05]:
+            time, E, F = model("pfr", tau, dt=dt, time_end=tau*2)
+            reference = rtdpy.Pfr(tau=tau, dt=dt, time_end=tau*2)
+            worst['E'] = max(worst['E'], np.abs(E - reference.exitage).max() * dt)
+            worst['F'] = max(worst['F'], np.abs(F - reference.stepresponse).max())
+            for n in [1, 2, 3.5, 10, 50]:
+                time, E, F = model("cstr", tau, n, dt=dt, time_end=tau*5)
+                reference = rtdpy.Ncstr(tau=tau, n=n, dt=dt, time_end=tau*5)
+                worst['E'] = max(worst['E'], np.abs(E - reference.exitage).max() * tau)
+                worst['F'] = max(worst['F'], np.abs(F - reference.stepresponse).max())
+    return worst
+
+if __name__ == "__main__":
+    worst = check_against_rtdpy()
+    print("Largest difference from rtdpy: E*tau {:.2e}, F {:.2e}".format(worst['E'], worst['F']))
@@ -21,15 +21,98 @@ import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import plotly
 import json
-#Instasll rtdpy first! (TRY INSTALL MANUALLY INSTEAD OF PIP) idk why it installed older version
-import rtdpy
+import FigureJSON
+import FigureBuilder
 import time
-from RTD import RTD
+from RTD import RTD, RTDResult, C_DT, FPS
+import RTDModels
+import Network
+from functools import lru_cache
+
+# Slider positions of the combined non-ideal model (bypass, dead volume, tanks in series, recycle)
+SLIDER_STEP = .02
+SLIDER_MAX = .5
+MAX_TANKS = 10
+RECYCLE_STEP = .5
+MAX_RECYCLE = 5
+# Points of a swept E/F curve (over 0 to 5 tau)
+SWEEP_POINTS = 400
+# Parameters an animated sweep can run over (frame labels), and the most frames it may have
+SWEEP_LABELS = {'n': "n = {:g}", 'bypass': "bypass = {:.0%}", 'deadvol': "dead volume = {:.0%}",
+                'recycle': "recycle ratio = {:g}"}
+MAX_SWEEP_FRAMES = 100
+
+def slider(value, step, top):
+    # Index of the slider position nearest value
+    return int(round(min(max(value, 0), top) / step))
+
+@lru_cache(maxsize=16)
+def sweep(tau, n, recycle):
+    # E and F of the combined model at every bypass x dead volume slider position, computed the first
+    # time a (n, recycle) pair is asked for; moving those two sliders only indexes into it.
+    # Bypass and dead volume only rescale time (tau_active) and E, so the model is evaluated once in
+    # dimensionless time and interpolated for each position. float32 and read only, as it is shared
+    # between requests
+    fractions = np.arange(slider(SLIDER_MAX, SLIDER_STEP, SLIDER_MAX) + 1) * SLIDER_STEP
+    bypass, deadvol = fractions[:, None, None], fractions[None, :, None]
+    time = RTDModels.time_grid(tau*5/SWEEP_POINTS, tau*5)
+    theta = np.arange(int(round(RTDModels.THETA_END/RTDModels.THETA_STEP))) * RTDModels.THETA_STEP
+    E_theta, F_theta = RTDModels.combined(theta, 1, n, recycle=recycle)
+
+    tau_active = tau * (1 - deadvol) / (1 - bypass)
+    scaled = np.broadcast_to(time / tau_active, (fractions.size, fractions.size, time.size))
+    E = (1 - bypass) * np.interp(scaled, theta, E_theta) / tau_active
+    F = bypass + (1 - bypass) * np.interp(scaled, theta, F_theta, right=1)
+    # The bypassed tracer is drawn as E(0) = bypass, as in CSTR_bypass_E
+    E[..., 0] += bypass[..., 0]
+    E, F = E.astype(np.float32), F.astype(np.float32)
+    for arr in (time, E, F):
+        arr.setflags(write=False)
+    return time, E, F
+
+def combined_curves(tau, n, recycle, bypass, deadvol):
+    # time, E and F at the slider positions nearest the given values
+    time, E, F = sweep(tau, min(max(int(round(n)), 1), MAX_TANKS), slider(recycle, RECYCLE_STEP, MAX_RECYCLE)*RECYCLE_STEP)
+    i, j = slider(bypass, SLIDER_STEP, SLIDER_MAX), slider(deadvol, SLIDER_STEP, SLIDER_MAX)
+    return time, E[i, j], F[i, j]
+
+def parameter_sweep(tau, parameter, values, n=1, bypass=0, deadvol=0, recycle=0):
+    # time, E and F of the combined model for every value of one parameter with the others fixed,
+    # shape (values, time), from a single broadcast evaluation of RTDModels.combined
+    if parameter not in SWEEP_LABELS:
+        raise ValueError("Cannot sweep {}".format(parameter))
+    params = {'n': n, 'bypass': bypass, 'deadvol': deadvol, 'recycle': recycle}
+    params[parameter] = np.asarray(values, dtype=float)
+    time = RTDModels.time_grid(tau*5/SWEEP_POINTS, tau*5)
+    # The bypassed tracer is drawn as E(0) = bypass, as in sweep()
+    E, F = RTDModels.combined(time, tau, **params, bypass_as="height")
+    return time, E, F
+
+def sweep_figures(time, E, F, parameter, values):
+    # E and F animations with one named frame per value, on fixed axes so the curves can be compared
+    names = [SWEEP_LABELS[parameter].format(value) for value in values]
+    figs = []
+    for curve, rows in (('E', E), ('F', F)):
+        frames = [[FigureBuilder.scatter(time, row, name=name)] for row, name in zip(rows, names)]
+        figs.append(FigureBuilder.figure(
+            data=frames[0],
+            layout=FigureBuilder.layout('sweep_' + curve,
+                xaxis=dict(range=[0, time[-1]]),
+                yaxis=dict(range=[0, max(rows.max(), 1 if curve == 'F' else 0)*1.1]),
+                title="Combined Model: Plot of {} against Time for each {}".format(curve, names[0].split(" =")[0]),
+                sliders=FigureBuilder.frame_slider(names),
+            ), frames=frames, names=names
+        ))
+    return figs
 
 class Real_RTD:
+
+    # Frame rate the pages play the C plot keyframes at
+    fps = FPS
     
     def __init__(self,V_reactor,flow, type):
-        types = ['pulse', 'step']
+        # 'arbitrary': the inlet signal is given to outlet() instead
+        types = ['pulse', 'step', 'arbitrary']
         if type in types:
             self.V_reactor = V_reactor
             self.flow = flow
@@ -40,501 +123,355 @@ class Real_RTD:
             self.deadvol = 10
             self.bypass_tau = self.V_reactor / ((1-self.bypass)*self.flow)
             self.deadvol_tau = (self.V_reactor-self.deadvol) / self.flow
-            self.ideal = RTD(20,2,self.type)
+            # Ideal reactor of the same V and Q; its kernels give the ideal curves and the grids of the real ones
+            self.ideal = RTD(self.V_reactor,self.flow,self.type)
+
+    def outlet(self, reactorType, nonideality, inlet, dt, n=1):
+        # Outlet concentration of the real reactor ('bypass' or 'deadvol') for an arbitrary inlet signal
+        if nonideality == "bypass":
+            return self.ideal.outlet(reactorType, inlet, dt, n, bypass=self.bypass)
+        return self.ideal.outlet(reactorType, inlet, dt, n, deadvol=self.deadvol/self.V_reactor)
+
+    def network(self, reactorType, nonideality, n=1):
+        # The real reactor ('bypass' or 'deadvol') as a Network, to build larger networks from
+        unit = (lambda tau: Network.cstr(tau, n)) if reactorType == "cstr" else Network.pfr
+        if nonideality == "bypass":
+            return Network.non_ideal(unit, self.tau, bypass=self.bypass)
+        return Network.non_ideal(unit, self.tau, deadvol=self.deadvol/self.V_reactor)
 
     #rtdpy not as nice as signal.unit_impulse for PFR
     # 3 methods for ideal PFR RTD:
     #   1) pfr = rtdpy.Pfr(tau = tau, dt=.01, time_end=100)
-    #      plt.plot(pfr.time, pfr.exitage)
+    #      plt.plot(pfr.time, pfr.E)
     #   2) imp = signal.unit_impulse(100)
     #      plt.plot(np.arange(0, 100), imp)
 
     def PFR_bypass(self):
-        PFR_Real = rtdpy.Pfr(tau=self.bypass_tau, dt=.25, time_end=self.tau*2)
+        PFR_Real, tau = self.ideal.pfr_front(bypass=self.bypass)
         x = PFR_Real.time
 
         if self.type == 'pulse':
-            y = PFR_Real.exitage*25*(1-self.bypass)
-            if not self.bypass_tau.is_integer():
-                y.fill(0)
+            y = np.where(x == tau, 100*(1-self.bypass), 0.)
             y[0] = self.bypass*100 #bypass amount
         else:
-            y = PFR_Real.stepresponse*100
-            y = np.where(y < 50, 20, y)
-            y = np.where(y >= 50, 100, y)
+            y = 100*PFR_Real.F
 
-        
-        if not self.bypass_tau.is_integer():
-            x = list(x)
-            x.append(round(self.bypass_tau,2))
-            # print(x)
-            x = sorted(x)
-            index = x.index(round(self.bypass_tau, 2))
-            # print(index)
-            y = list(y)
-            y.insert(index, 80)
-            # print(y)
-        
-        self.x = list(x).copy()
-        self.y = list(y).copy()
-        self.length = self.x.index(float("{:.2f}".format(self.bypass_tau)))
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
+        self.length = self.result.index(self.bypass_tau)
         self.length2 = len(self.x)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[], name = "PFR_Real")],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name = "PFR_Real")],
+            layout=FigureBuilder.layout('rtd_C',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, 110], autorange=False, showticklabels=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, 110], showticklabels=False),
                 title="Real PFR: Plot of Concentration against Time",
             ),
         )
-        fig.add_annotation(x=5.5, y=0.5*max(y), text="Flow bypass, delayed exit", font_size=14, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(5.5, 0.5*y.max(), "Flow bypass, delayed exit", 14)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_bypass_E(self):
         xdata, ydata = [], []
-        PFR_Real = rtdpy.Pfr(tau=self.bypass_tau, dt=.01, time_end=self.tau*2)
+        PFR_Real = self.ideal.kernel("pfr", bypass=self.bypass)
         x = PFR_Real.time
-        y = PFR_Real.exitage*(1-self.bypass)
-        y[0] = self.bypass*100
+        y = PFR_Real.E.copy()
+        y[0] = self.bypass*100 #bypass amount, drawn to the scale of the C plot
         # x = x[::25]
         # y = y[::25]
 
-        PFR_Ideal = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
+        PFR_Ideal = self.ideal.kernel("pfr")
         x1 = PFR_Ideal.time
-        y1 = PFR_Ideal.exitage
+        y1 = PFR_Ideal.E
 
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
+        self.result = RTDResult(x, E=y)
+        frames = self.result.frames('E')
         
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True),go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True),FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_E',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, max(y1)*1.1], autorange=False, showticklabels=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, y1.max()*1.1], showticklabels=False),
                 title="PFR: Plot of E against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-               buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=5, y=0.5*max(y1), text="Flow bypass, delayed exit", font_size=14, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(5, 0.5*y1.max(), "Flow bypass, delayed exit", 14)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_bypass_F(self):
         xdata, ydata = [], []
-        PFR_Real = rtdpy.Pfr(tau=self.bypass_tau, dt=.01, time_end=self.tau*2)
+        PFR_Real = self.ideal.kernel("pfr", bypass=self.bypass)
         x = PFR_Real.time
-        y = PFR_Real.stepresponse
-        #Temp solution for single bypass at start only
-        y = np.where(y <= (1-self.bypass), self.bypass, y)
-        y = np.where(y > (1-self.bypass), 1, y)
+        y = PFR_Real.F
         # x = x[::25]
         # y = y[::25]
 
-        PFR_Ideal = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
+        PFR_Ideal = self.ideal.kernel("pfr")
         x1 = PFR_Ideal.time
-        y1 = PFR_Ideal.stepresponse 
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True),go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        y1 = PFR_Ideal.F 
+
+        self.result = RTDResult(x, F=y)
+        frames = self.result.frames('F')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True),FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_F',
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="PFR: Plot of F against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=5, y=0.5*max(y1), text="Flow bypass, delayed exit", font_size=14, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(5, 0.5*y1.max(), "Flow bypass, delayed exit", 14)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
       
     def PFR_deadvol(self):
-        PFR_Real = rtdpy.Pfr(tau=self.deadvol_tau, dt=.25, time_end=self.tau*2)
+        PFR_Real, tau = self.ideal.pfr_front(deadvol=self.deadvol/self.V_reactor)
         x = PFR_Real.time
         if self.type == 'pulse':
-            y = PFR_Real.exitage*25
-            if not self.deadvol_tau.is_integer():
-                y.fill(0)
-            # print(y)
+            y = np.where(x == tau, 100., 0.)
         else:
-            y = PFR_Real.stepresponse*100
-            y = np.where(y < 50, 0, y)
-            y = np.where(y >= 50, 100, y)
-        
-        if not self.deadvol_tau.is_integer():
-            x = list(x)
-            x.append(round(self.deadvol_tau,2))
-            # print(x)
-            x = sorted(x)
-            index = x.index(round(self.deadvol_tau, 2))
-            # print(index)
-            y = list(y)
-            y.insert(index, 100)
-            # print(y)
+            y = 100*PFR_Real.F
         
-        self.x = list(x).copy()
-        self.y = list(y).copy()
-        self.length = self.x.index(float("{:.2f}".format(self.bypass_tau)))
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
+        self.length = self.result.index(self.bypass_tau)
         self.length2 = len(self.x)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[], name = "PFR Real")],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [], name = "PFR Real")],
+            layout=FigureBuilder.layout('rtd_C',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, 110], autorange=False, showticklabels=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, 110], showticklabels=False),
                 title="Real PFR: Plot of Concentration against Time",
             ),
         )
-        fig.add_annotation(x=15, y=0.5*max(y), text="Dead volume, early exit", font_size=16, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(15, 0.5*y.max(), "Dead volume, early exit", 16)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_deadvol_E(self):
         xdata, ydata = [], []
-        PFR_Real = rtdpy.Pfr(tau=self.deadvol_tau, dt=.01, time_end=self.tau*2)
+        PFR_Real = self.ideal.kernel("pfr", deadvol=self.deadvol/self.V_reactor)
         x = PFR_Real.time
-        y = PFR_Real.exitage
+        y = PFR_Real.E
         # x = x[::25]
         # y = y[::25]
 
-        PFR_Ideal = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
+        PFR_Ideal = self.ideal.kernel("pfr")
         x1 = PFR_Ideal.time
-        y1 = PFR_Ideal.exitage
+        y1 = PFR_Ideal.E
 
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
+        self.result = RTDResult(x, E=y)
+        frames = self.result.frames('E')
         
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_E',
                 hovermode=False,
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False, showticklabels=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, y.max()*1.1], showticklabels=False),
                 title="PFR: Plot of E against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-               buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=15, y=0.5*max(y1), text="Dead volume, early exit", font_size=16, showarrow=False, bgcolor="white", font_color="black")
+        fig['layout']['annotations'] = [FigureBuilder.annotation(15, 0.5*y1.max(), "Dead volume, early exit", 16)]
         
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def PFR_deadvol_F(self):
         xdata, ydata = [], []
-        PFR_Real = rtdpy.Pfr(tau=self.deadvol_tau, dt=.01, time_end=self.tau*2)
+        PFR_Real = self.ideal.kernel("pfr", deadvol=self.deadvol/self.V_reactor)
         x = PFR_Real.time
-        y = PFR_Real.stepresponse
+        y = PFR_Real.F
         # x = x[::25]
         # y = y[::25]
 
-        PFR_Ideal = rtdpy.Pfr(tau=self.tau, dt=.01, time_end=self.tau*2)
+        PFR_Ideal = self.ideal.kernel("pfr")
         x1 = PFR_Ideal.time
-        y1 = PFR_Ideal.stepresponse 
+        y1 = PFR_Ideal.F 
 
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
+        self.result = RTDResult(x, F=y)
+        frames = self.result.frames('F')
         
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*2], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_F',
+                xaxis=dict(range=[0, self.tau*2]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="PFR: Plot of F against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
 
-        fig.add_annotation(x=15, y=0.5*max(y1), text="Dead volume, early exit", font_size=16, showarrow=False, bgcolor="white", font_color="black")
+        fig['layout']['annotations'] = [FigureBuilder.annotation(15, 0.5*y1.max(), "Dead volume, early exit", 16)]
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_bypass(self, n):
-        CSTR = rtdpy.Ncstr(tau=self.bypass_tau, n = n, dt=.25, time_end=self.tau*5)
-        # x = np.arange(0, self.tau*5, 0.25)
-        x = CSTR.time
-        y = []
+        # Only the C time grid is needed (the E/F views' span every C_DT), the curve itself is closed form
+        x = RTDModels.time_grid(C_DT, self.ideal.grid("cstr")[1])
 
         if self.type == "pulse":
-            for t in x:
-                #need to check if Concentration curve is liddat
-                c = (100/self.V_reactor)*math.exp((-1)*t/self.bypass_tau)
-                y.append(c)
+            #need to check if Concentration curve is liddat
+            y = (100/self.V_reactor)*np.exp((-1)*x/self.bypass_tau)
         else:
-            for t in x:
-                #need to check if Concentration curve is liddat
-                c = (100/self.flow)*(1-math.exp((-1)*t/self.bypass_tau))
-                y.append(c)
-
-        self.x = list(x).copy()
-        self.y = list(y).copy()
-        self.length = self.x.index(float("{:.2f}".format(self.tau)))
+            #need to check if Concentration curve is liddat
+            y = (100/self.flow)*(1-np.exp((-1)*x/self.bypass_tau))
+
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
+        self.length = self.result.index(self.tau)
         self.length2 = len(self.x)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[])],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
-                title="Real CSTR: Plot of Concentration against Time"
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [])],
+            layout=FigureBuilder.layout('rtd_C',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
+                title="Real CSTR: Plot of Concentration against Time",
             )
         )
-        fig.add_annotation(x=30, y=3, text="Flow bypass, gentler gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 3, "Flow bypass, gentler gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_bypass_E(self,n):
 
-        CSTR_Real = rtdpy.Ncstr(tau=self.bypass_tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Real = self.ideal.kernel("cstr", n, bypass=self.bypass)
         xdata, ydata = [], []
         x = CSTR_Real.time
-        x = np.append(x, [self.tau*5+1])
-        y = [self.bypass*self.flow/self.flow]
-
-        for t in x:
-            e = ((1-self.bypass)*self.flow)**2/(self.V_reactor*self.flow)*math.exp((-1)*t/self.deadvol_tau)
-            y.append(e)
+        y = CSTR_Real.E.copy()
+        y[0] = self.bypass*self.flow/self.flow #bypassed fraction leaves at once
 
-        CSTR_Ideal = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Ideal = self.ideal.kernel("cstr", n)
         x1 = CSTR_Ideal.time
-        y1 = CSTR_Ideal.exitage
+        y1 = CSTR_Ideal.E
             
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+        self.result = RTDResult(x, E=y)
+        frames = self.result.frames('E')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_E',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="CSTR: Plot of E against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=30, y=0.1, text="Flow bypass, gentler gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 0.1, "Flow bypass, gentler gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_bypass_F(self,n):
 
-        CSTR_Real = rtdpy.Ncstr(tau=self.deadvol_tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Real = self.ideal.kernel("cstr", n, bypass=self.bypass)
         xdata, ydata = [], []
-        timelost = []
         x = CSTR_Real.time
-        y = [self.bypass*self.flow/self.flow]
-        data = CSTR_Real.stepresponse
-        for val in data:
-            if val >= y[0]:
-                y.append(val)
-            else:
-                pass
-
-        CSTR_Ideal = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
+        y = CSTR_Real.F
+
+        CSTR_Ideal = self.ideal.kernel("cstr", n)
         x1 = CSTR_Ideal.time
-        y1 = CSTR_Ideal.stepresponse
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        y1 = CSTR_Ideal.F
+
+        self.result = RTDResult(x, F=y)
+        frames = self.result.frames('F')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_F',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="CSTR: Plot of F against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=30, y=0.5*max(y1), text="Flow bypass, gentler gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 0.5*y1.max(), "Flow bypass, gentler gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_deadvol(self, n):
-        CSTR = rtdpy.Ncstr(tau=self.tau, n = n, dt=.25, time_end=self.tau*5)
-        # x = np.arange(0, self.tau*5, 0.25)
+        # The E/F views' kernel, read at every C_DT for the animated C plot
+        CSTR = self.ideal.kernel("cstr", n, deadvol=self.deadvol/self.V_reactor).resample(C_DT)
         x = CSTR.time
-        y = []
 
+        # Same curves as (100/V)exp(-t/tau_dead) and (100/Q)(1-exp(-t/tau_dead)), from E and F of the smaller volume
         if self.type == "pulse":
-            for t in x:
-                c = (100/self.V_reactor)*math.exp((-1)*t/self.deadvol_tau)
-                y.append(c)
+            y = (100*self.deadvol_tau/self.V_reactor)*CSTR.E
         else:
-            for t in x:
-                c = (100/self.flow)*(1-math.exp((-1)*t/self.deadvol_tau))
-                y.append(c)
+            y = (100/self.flow)*CSTR.F
 
-        self.x = list(x).copy()
-        self.y = list(y).copy()
+        self.result = RTDResult(x, C=y).keyframes('C')
+        self.x, self.y = self.result.time, self.result.C
         self.length = len(self.x)
 
-        fig = go.Figure(
-            data=[go.Scatter(x=[], y=[])],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Concentration (mol/m3)",
-                title="Real CSTR: Plot of Concentration against Time"
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter([], [])],
+            layout=FigureBuilder.layout('rtd_C',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
+                title="Real CSTR: Plot of Concentration against Time",
             )
         )
-        fig.add_annotation(x=30, y=3, text="Dead volume, steeper gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 3, "Dead volume, steeper gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_deadvol_E(self,n):
 
-        CSTR_Real = rtdpy.Ncstr(tau=self.deadvol_tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Real = self.ideal.kernel("cstr", n, deadvol=self.deadvol/self.V_reactor)
         xdata, ydata = [], []
         x = CSTR_Real.time
-        y = CSTR_Real.exitage
+        y = CSTR_Real.E
 
-        CSTR_Ideal = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Ideal = self.ideal.kernel("cstr", n)
         x1 = CSTR_Ideal.time
-        y1 = CSTR_Ideal.exitage
-
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))])])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, name="Real", showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Exit Age Function (1/s)",
+        y1 = CSTR_Ideal.E
+
+        self.result = RTDResult(x, E=y)
+        frames = self.result.frames('E')
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, name="Real", showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_E',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="CSTR: Plot of E against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames
         )
-        fig.add_annotation(x=30, y=0.1, text="Dead volume, steeper gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 0.1, "Dead volume, steeper gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
     def CSTR_deadvol_F(self,n):
 
-        CSTR_Real = rtdpy.Ncstr(tau=self.deadvol_tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Real = self.ideal.kernel("cstr", n, deadvol=self.deadvol/self.V_reactor)
         xdata, ydata = [], []
         x = CSTR_Real.time
-        y = CSTR_Real.stepresponse
+        y = CSTR_Real.F
 
-        CSTR_Ideal = rtdpy.Ncstr(tau=self.tau, n = n, dt=.01, time_end=self.tau*5)
+        CSTR_Ideal = self.ideal.kernel("cstr", n)
         x1 = CSTR_Ideal.time
-        y1 = CSTR_Ideal.stepresponse
+        y1 = CSTR_Ideal.F
         
-        frames = [go.Frame(data=[go.Scatter(x=[x[i] for i in range(len(x))], y=[y[i] for i in range(len(y))], name="Real")])]
-
-        fig = go.Figure(
-            data=[go.Scatter(x=xdata, y=ydata, showlegend=True), go.Scatter(x=x1, y=y1, name = "Ideal", showlegend=True)],
-            layout=go.Layout(template='plotly_dark',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(range=[0, self.tau*5], autorange=False),
-                yaxis=dict(range=[0, max(y)*1.1], autorange=False),
-                xaxis_title="Time (s)",
-                yaxis_title = "Cumulative Distribution Function",
+        self.result = RTDResult(x, F=y)
+        frames = self.result.frames('F', name="Real")
+
+        fig = FigureBuilder.figure(
+            data=[FigureBuilder.scatter(xdata, ydata, showlegend=True), FigureBuilder.scatter(x1, y1, name = "Ideal", showlegend=True)],
+            layout=FigureBuilder.layout('real_F',
+                xaxis=dict(range=[0, self.tau*5]),
+                yaxis=dict(range=[0, y.max()*1.1]),
                 title="CSTR: Plot of F against Time",
-                legend=dict(title = 'Legend', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                updatemenus=[dict(
-                bgcolor = 'grey',
-                font = dict(color = 'black', family="Helvetica Neue, monospace", size = 12),
-                type="buttons",
-                buttons=[dict(label="Display",
-                            method="animate",
-                            args=[None, {"frame": {"duration": 0, 
-                                    "redraw": True},
-                            "fromcurrent": True, 
-                            "transition": {"duration": 0}}])])]
             ), frames = frames)
-        fig.add_annotation(x=30, y=0.5*max(y1), text="Dead volume, steeper gradient", font_size=18, showarrow=False, bgcolor="white", font_color="black")
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        fig['layout']['annotations'] = [FigureBuilder.annotation(30, 0.5*y1.max(), "Dead volume, steeper gradient", 18)]
+        self.fig = fig
+        return FigureJSON.dumps(fig)
 
 #a = Real_RTD(20,2,'step')  # esp for PFR, ONLY INTEGER VALUES
 #a.CSTR_bypass_F(1)
@@ -0,0 +1,123 @@
+import numpy as np
+from scipy import signal, fft
+
+# Arbitrary tracer inputs
+# The outlet concentration of any linear reactor is its inlet concentration
+# convolved with E(t):  C_out(t) = integral of C_in(t') E(t - t') dt'
+# outlet() does that with an FFT (O(N log N)), so long and finely sampled
+# inlet signals cost about the same as the ideal pulse and step. The inlet
+# builders below return C_in on a time grid (np.arange(0, time_end, dt), the
+# grid RTDModels uses); RTD.outlet and Real_RTD.outlet pick the matching E.
+# deconvolve() goes the other way, recovering E(t) from measured inlet and
+# outlet series when the injection was not a clean pulse.
+
+def pulse(time, amount=100, flow=1):
+    # All of `amount` injected in the first time step: a spike at t = 0 whose trapezoid area (half the
+    # first interval, as outlet() integrates it) is amount/flow, drawn like RTDModels' bypass spike
+    C = np.zeros_like(time)
+    C[0] = 2 * amount / flow / (time[1] - time[0])
+    return C
+
+def step(time, concentration=1, start=0):
+    return np.where(time >= start, float(concentration), 0.)
+
+def ramp(time, slope=1, start=0, end=None):
+    # Rises at `slope` from `start`, then holds its value from `end` on
+    end = time[-1] if end is None else end
+    return slope * (np.clip(time, start, end) - start)
+
+def square(time, period, high=1, low=0, duty=.5):
+    # Square wave, `high` for the first `duty` fraction of every period
+    return np.where((time % period) < duty*period, float(high), float(low))
+
+def periodic(time, period, amplitude=1, mean=1):
+    # Sine wave around `mean` (kept at or above 0, a concentration)
+    return np.maximum(mean + amplitude*np.sin(2*np.pi*time/period), 0)
+
+def samples(time, t_data, C_data):
+    # Measured inlet concentrations, linearly interpolated onto the grid (0 outside the data)
+    t_data = np.asarray(t_data, dtype=float)
+    C_data = np.asarray(C_data, dtype=float)
+    order = np.argsort(t_data)
+    return np.interp(time, t_data[order], C_data[order], left=0, right=0)
+
+# Inlet signals the reactor pages offer (inlet() builds them)
+SIGNALS = ['step', 'ramp', 'square', 'periodic']
+
+def inlet(name, time, period):
+    # One of SIGNALS at concentration 1: the ramp reaches it after `period`, the square and sine
+    # waves repeat every `period`
+    if name == 'step':
+        return step(time)
+    if name == 'ramp':
+        return ramp(time, 1/period, end=period)
+    if name == 'square':
+        return square(time, period)
+    if name == 'periodic':
+        return periodic(time, period)
+    raise ValueError("Unknown inlet signal {}".format(name))
+
+def outlet(inlet, E, dt):
+    # C_out on the inlet's grid. E must be on the same dt grid from t = 0; where it is shorter
+    # than the inlet it is taken as 0 past its end. The integral is a trapezoid rule, as F is E's
+    # trapezoid integral (so a step in gives F out): the FFT sum less half of its two end terms
+    inlet = np.asarray(inlet, dtype=float)
+    E = np.asarray(E, dtype=float)[:inlet.size]
+    E = np.pad(E, (0, inlet.size - E.size))
+    C = signal.fftconvolve(inlet, E)[:inlet.size]
+    return (C - (E[0]*inlet + inlet[0]*E) / 2) * dt
+
+# Regularization strength of deconvolve, relative to the inlet signal's power
+ALPHA = 1e-3
+# Iterations of the non-negative solver: FFT points times iterations it may spend (about 3 s here),
+# within these bounds. It starts from the clipped closed form, so a few tens of steps are plenty
+WORK = 3e7
+MIN_ITER = 10
+MAX_ITER = 500
+
+def deconvolve(inlet, outlet_C, dt, length=None, alpha=ALPHA, nonnegative=False, max_iter=None, tol=1e-6):
+    # E(t) (length points, default the whole series) from inlet and outlet concentrations sampled every dt
+    # Dividing the spectra directly blows up measurement noise wherever the inlet has little power,
+    # so both methods add a Tikhonov term alpha * |inlet power| * |E|^2:
+    #   nonnegative=False: closed form in the FFT domain, O(N log N)
+    #   nonnegative=True:  the same least squares problem constrained to E >= 0, solved iteratively
+    inlet = np.asarray(inlet, dtype=float)
+    outlet_C = np.asarray(outlet_C, dtype=float)
+    size = min(inlet.size, outlet_C.size)
+    inlet, outlet_C = inlet[:size], outlet_C[:size]
+    length = min(length or size, size)
+
+    # Zero padded to a fast FFT length, so the products are linear (not circular) convolutions
+    nfft = fft.next_fast_len(2*size)
+    inlet_f = fft.rfft(inlet, nfft) * dt
+    power = np.abs(inlet_f)**2
+    weight = alpha * power.max()
+    if not nonnegative:
+        return fft.irfft(np.conj(inlet_f) * fft.rfft(outlet_C, nfft) / (power + weight), nfft)[:length]
+
+    # Projected accelerated gradient (FISTA) on |A E - C|^2 + weight |E|^2 with E >= 0, started from the
+    # clipped closed form solution. Each step is two FFT convolutions; 1/(max power + weight) is a safe step
+    outlet_f = fft.rfft(outlet_C, nfft)
+    E = np.maximum(fft.irfft(np.conj(inlet_f) * outlet_f / (power + weight), nfft)[:length], 0)
+    previous, momentum, y = E, 1, E
+    step = 1 / (power.max() + weight)
+    # E has `length` points and only the first `size` outlet points are compared, so the convolutions of
+    # the steps are exact on a size + length FFT (shorter than the closed form's when E is)
+    nfft = fft.next_fast_len(size + length)
+    inlet_f = fft.rfft(inlet, nfft) * dt
+    max_iter = max_iter or int(np.clip(WORK // nfft, MIN_ITER, MAX_ITER))
+    for _ in range(max_iter):
+        residual = fft.irfft(inlet_f * fft.rfft(y, nfft), nfft)[:size] - outlet_C
+        gradient = fft.irfft(np.conj(inlet_f) * fft.rfft(residual, nfft), nfft)[:length] + weight*y
+        E = np.maximum(y - step*gradient, 0)
+        change = np.abs(E - previous).max()
+        momentum, last = (1 + np.sqrt(1 + 4*momentum**2)) / 2, momentum
+        y = E + (last - 1)/momentum * (E - previous)
+        previous = E
+        if change <= tol * max(E.max(), 1e-300):
+            break
+    return E
+
+def mean_residence_time(time, E):
+    # First moment of E (normalized by its area)
+    return np.trapz(time*E, time) / np.trapz(E, time)
@@ -140,6 +140,41 @@ class RachfordRice:
             K.append(math.exp(lnK))
         return K
     
+    @classmethod
+    def batchK(cls, components, T, P):
+        # Same K values as calcK, for arrays of T (degC) and P (kPa) broadcast together
+        T_degR = np.asarray(T, dtype=float) * 9/5 + 491.67
+        P_psia = np.asarray(P, dtype=float) * 0.145
+        K = []
+        for component in components:
+            aT1, aT2, aT3, ap1, ap2, ap3 = cls.McWilliam_Coeff[component][:6]
+            K.append(np.exp(aT1/(T_degR**2) + aT2/T_degR + aT3 + ap1*np.log(P_psia) + ap2/(P_psia**2) + ap3/P_psia))
+        return K
+
+    @classmethod
+    def binaryEquilibrium(cls, components, T, P):
+        # Liquid (x) and vapour (y) mole fractions of component A in two phase equilibrium,
+        # for T in degC and P in kPa (scalars or arrays). x = (1-K_B)/(K_A-K_B) does not depend on z
+        K = cls.batchK(components, T, P)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = (1 - K[1]) / (K[0] - K[1])
+        return x, K[0] * x
+
+    @classmethod
+    def batchFlash(cls, components, T, P, z):
+        # Flash of a binary for arrays of T (degC), P (kPa) and z (of component A) broadcast together
+        # With two components Rachford Rice is linear in V/F, so it is solved directly instead of by Newton
+        # Returns V/F (0 liquid, 1 vapour), sum(z*K) and sum(z/K). The level 1 lines of the last two are
+        # the bubble and dew point curves
+        K = cls.batchK(components, T, P)
+        z = np.asarray(z, dtype=float)
+        bubble = z*K[0] + (1-z)*K[1]
+        dew = z/K[0] + (1-z)/K[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = -(z*(K[0]-1) + (1-z)*(K[1]-1)) / ((K[0]-1)*(K[1]-1))
+        v = np.where(bubble <= 1, 0, np.where(dew <= 1, 1, np.clip(v, 0, 1)))
+        return v, bubble, dew
+
     def RR(self,v,K,z):
         # Rachford Rice Eqn
         # v = V/F
@@ -0,0 +1,107 @@
+import numpy as np
+from functools import lru_cache
+from Plot import equilibrium_curve
+from RTD import RTD
+import RTDModels
+
+# Range-aware curve data for zoomed plots
+# Pages ship one coarse curve. When the user zooms, the page sends the visible
+# axis window and its width in pixels, and gets back the same traces with the
+# part inside the window recomputed at (about) one point per pixel. Points
+# outside the window are kept from the coarse curve so panning still shows a
+# complete line. The coarse curves are cached, so only the window is new work.
+
+MIN_POINTS = 10
+MAX_POINTS = 2000
+
+def budget(pixels):
+    # Points to compute for a window `pixels` wide
+    return int(min(max(pixels, MIN_POINTS), MAX_POINTS))
+
+###############################################################
+
+# Binary VLE
+# 'yxP'/'Txy' sweep T at constant P, 'yxT'/'Pxy' sweep P at constant T (same mapping as main.binaryvle)
+# The coarse curve is the one the page was drawn with (cached in Plot.equilibrium_curve)
+def phase_points(components, T, P, plot_type, lo=None, hi=None, num=50):
+    if plot_type in ("yxP", "Txy"):
+        return equilibrium_curve(tuple(components), 'T', P, lo, hi, num)
+    return equilibrium_curve(tuple(components), 'P', T, lo, hi, num)
+
+def in_window(point, plot_type, xmin, xmax, ymin, ymax):
+    x, y, sweep = point[0], point[1], point[2]
+    if plot_type in ("yxP", "yxT"):
+        return xmin <= x <= xmax and ymin <= y <= ymax
+    # T-x-y / P-x-y: bubble point (x, sweep) or dew point (y, sweep) visible
+    return ymin <= sweep <= ymax and (xmin <= x <= xmax or xmin <= y <= xmax)
+
+def refine_phase(components, T, P, plot_type, xmin, xmax, ymin, ymax, pixels):
+    coarse = list(phase_points(components, T, P, plot_type))
+    # Pure component end points are not part of the sweep
+    ends, swept = [coarse[0], coarse[-1]] if coarse else [], coarse[1:-1]
+    if not swept:
+        return coarse
+
+    # Sweep values of the visible coarse points, widened to their neighbours so the window edges are covered
+    order = sorted(range(len(swept)), key=lambda i: swept[i][2])
+    sweeps = [swept[i][2] for i in order]
+    inside = [k for k, i in enumerate(order) if in_window(swept[i], plot_type, xmin, xmax, ymin, ymax)]
+    if inside:
+        first, last = inside[0], inside[-1]
+    else:
+        # Window falls between two coarse points: refine around the one nearest its centre
+        xc, yc = (xmin + xmax)/2, (ymin + ymax)/2
+        nearest = min(range(len(order)), key=lambda k: (swept[order[k]][0] - xc)**2 + ((swept[order[k]][1] if plot_type in ("yxP", "yxT") else swept[order[k]][2]) - yc)**2)
+        first = last = nearest
+    lo = sweeps[max(first - 1, 0)]
+    hi = sweeps[min(last + 1, len(sweeps) - 1)]
+    if lo == hi:
+        return coarse
+
+    fine = list(phase_points(components, T, P, plot_type, lo, hi, budget(pixels)))
+    if not fine:
+        return coarse
+    outside = [p for p in swept if p[2] < lo or p[2] > hi]
+    return sorted(ends + outside + fine, key=lambda p: p[0])
+
+def phase_traces(points, plot_type):
+    # Trace indices and data in the layout plot.plot_* uses
+    if plot_type in ("yxP", "yxT"):
+        # Trace 0 is the x = y line, trace 1 the equilibrium line (padded with 0 and 1 like plot_yx_*)
+        x = [0] + [p[0] for p in points] + [1]
+        y = [0] + [p[1] for p in points] + [1]
+        return {'traces': [1], 'x': [x], 'y': [y]}
+    # Trace 0 bubble line, trace 1 dew line
+    x = [p[0] for p in points]
+    y = [p[1] for p in points]
+    sweep = [p[2] for p in points]
+    return {'traces': [0, 1], 'x': [x, y], 'y': [sweep, sweep]}
+
+###############################################################
+
+# Ideal reactor E and F curves
+@lru_cache(maxsize=128)
+def coarse_rtd(reactorType, V, Q, kind, n=1):
+    result = RTD(V, Q, "pulse").kernel(reactorType, n)
+    return result.time, getattr(result, kind)
+
+def refine_rtd(reactorType, V, Q, kind, tmin, tmax, pixels, n=1):
+    x, y = coarse_rtd(reactorType, V, Q, kind, n)
+    tmin, tmax = max(tmin, 0), min(tmax, x[-1])
+    if tmax <= tmin:
+        return {'traces': [0], 'x': [x], 'y': [y]}
+
+    # Only the window is evaluated, from the closed forms, at budget(pixels) points (plus the PFR
+    # spike's corners, so it keeps the shape the page was drawn with however narrow the window)
+    tau = V / Q
+    fine_x = np.linspace(tmin, tmax, budget(pixels))
+    if reactorType == "pfr":
+        fine_x = RTDModels.with_events(fine_x, [tau - RTDModels.SPIKE_WIDTH, tau, tau + RTDModels.SPIKE_WIDTH])
+        E, F = RTDModels.spike(fine_x, tau)
+    else:
+        E, F = RTDModels.ncstr(fine_x, tau, n)
+    fine_y = E if kind == "E" else F
+
+    refined_x = np.concatenate([x[x < tmin], fine_x, x[x > tmax]])
+    refined_y = np.concatenate([y[x < tmin], fine_y, y[x > tmax]])
+    return {'traces': [0], 'x': [refined_x], 'y': [refined_y]}
@@ -0,0 +1,66 @@
+## Benchmarks for the figure layer. Run with: python benchmark.py ##
+import json
+import timeit
+import plotly
+import FigureJSON
+import FigureBuilder
+from VLECalculations import Steam
+from Plot import plot_steam
+from RTD import RTD
+from Real_RTD import Real_RTD
+
+def timed(func, repeat=5, number=3):
+    # Best of `repeat` runs, in ms per call
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+def steam_figure():
+    system = Steam(50, 100)
+    system.instantiate()
+    graph = plot_steam(system)
+    graph.plot_steamVLE()
+    return graph.fig
+
+def rtd_figures():
+    system = RTD(20, 1, 'pulse')
+    figs = {}
+    system.CSTR_E(1)
+    figs['CSTR E'] = system.fig
+    system.CSTR_F(1)
+    figs['CSTR F'] = system.fig
+    system.PFR_E()
+    figs['PFR E'] = system.fig
+    system.PFR_F()
+    figs['PFR F'] = system.fig
+    realsystem = Real_RTD(20, 2, 'pulse')
+    realsystem.CSTR_deadvol_E(1)
+    figs['Real CSTR E'] = realsystem.fig
+    realsystem.CSTR_deadvol_F(1)
+    figs['Real CSTR F'] = realsystem.fig
+    return figs
+
+def serialization():
+    figs = {'Steam curve': steam_figure()}
+    figs.update(rtd_figures())
+
+    print("{:<14}{:>14}{:>14}{:>14}{:>10}".format("Figure", "Encoder (ms)", "Dicts (ms)", "Typed (ms)", "Speedup"))
+    for name, fig in figs.items():
+        # Both paths must give the same figure
+        assert json.loads(FigureJSON.dumps(fig)) == json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+        old = timed(lambda: json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+        new = timed(lambda: FigureJSON.dumps(fig))
+        typed = timed(lambda: FigureJSON.dumps(fig, typed_arrays=True))
+        print("{:<14}{:>14.2f}{:>14.2f}{:>14.2f}{:>9.1f}x".format(name, old, new, typed, old/new))
+
+def construction():
+    # Cost of plotly validating a figure we already built from the skeletons
+    figs = {'Steam curve': steam_figure()}
+    figs.update(rtd_figures())
+
+    print("{:<14}{:>16}".format("Figure", "go.Figure (ms)"))
+    for name, fig in figs.items():
+        print("{:<14}{:>16.2f}".format(name, timed(lambda: FigureBuilder.to_plotly(fig))))
+
+if __name__ == "__main__":
+    serialization()
+    print()
+    construction()
@@ -1,15 +1,40 @@
-from flask import Flask, render_template, session, request, Response
+from flask import Flask, render_template, session, request, Response, abort, url_for
 from resetParamForm import PureForm, BinaryForm, IdealReactorForm, RealReactorForm
 from VLECalculations import RachfordRice, Antoine, Steam
 from Plot import plot, plot_steam, GvsP, GvsT
-from RTD import RTD
-from Real_RTD import Real_RTD
+from RTD import RTD, MAX_PECLET, PLAYBACK_SPEED
+from Real_RTD import Real_RTD, combined_curves, parameter_sweep, sweep_figures, SWEEP_LABELS, MAX_SWEEP_FRAMES
+import FigureJSON
+import Zoom
+import PhaseMap
+import Experiment
+import AxialDispersion
+import Particles
+import PageStore
+import Compartments
+import Tracer
+import os
+import numpy as np
+import tempfile
 from functools import wraps
+from jinja2 import Undefined
+from markupsafe import Markup
 
 app = Flask(__name__)
 
 app.config["SECRET_KEY"] = "mykey"
 
+# Every ideal/real reactor page is served from the precomputed store (built by python PageStore.py
+# before the server starts; pages are computed per request while it is missing or stale)
+PageStore.open_index()
+
+# Curve arrays (NumPy) written into page scripts as JavaScript arrays, e.g. {{ system.x | jsarray }}
+@app.template_filter("jsarray")
+def jsarray(values):
+    if values is None or isinstance(values, Undefined):
+        return Markup("[]")
+    return Markup(FigureJSON.dumps(values))
+
 def check_authTHERMO(username, password):
     """This function is called to check if a username /
     password combination is valid.
@@ -102,6 +127,22 @@ def purevle():
 
 ###############################################################
 
+chemicals = dict([('met','Methane'),('ethy','Ethylene'),('eth','Ethane'),('propy','Propylene'),
+('prop','Propane'), ('isob','Isobutane') , ('nbut','n-Butane'), ('isop','Isopentane'), ('npent','n-Pentane'),
+('nhex','n-Hexane'), ('nhep','n-Heptane'), ('noct','n-Octane'),('nnon','n-Nonane'), ('ndec','n-Decane'), ("none", "Not initialised")])
+
+def zoom_window():
+    # Visible axis window and pixel budget sent by static/zoom.js
+    try:
+        window = [float(request.args[key]) for key in ("xmin", "xmax", "ymin", "ymax")]
+        pixels = int(request.args.get("pixels", 500))
+    except (KeyError, ValueError):
+        abort(400)
+    xmin, xmax, ymin, ymax = window
+    if not np.all(np.isfinite(window)) or xmax <= xmin or ymax <= ymin or pixels <= 0:
+        abort(400)
+    return window, pixels
+
 # BINARY VLE WRITE UP
 @app.route("/binaryvleinfo")
 @requires_authTHERMO
@@ -115,10 +156,6 @@ def binaryvle():
 
     form = BinaryForm()
 
-    chemicals = dict([('met','Methane'),('ethy','Ethylene'),('eth','Ethane'),('propy','Propylene'),
-    ('prop','Propane'), ('isob','Isobutane') , ('nbut','n-Butane'), ('isop','Isopentane'), ('npent','n-Pentane'),
-    ('nhex','n-Hexane'), ('nhep','n-Heptane'), ('noct','n-Octane'),('nnon','n-Nonane'), ('ndec','n-Decane'), ("none", "Not initialised")])
-
     plots = dict([("yxP","y-x (const P)"), ("yxT","y-x (const T)"), ("Txy","T-x-y"), ("Pxy","P-x-y"), ("none", "Not initialised")])
     
     #initialisation
@@ -173,8 +210,74 @@ def binaryvle():
             initial.plot_Txy()
         graphJSON = initial.generate()
         solver_limit = False
+    zoomURL = url_for("binaryvle_zoom", componentA=componentA, componentB=componentB, plot_type=plot_type, T=T, P=P)
+    phasemapURL = url_for("binaryvle_phasemap", componentA=componentA, componentB=componentB, T=T, P=P, z=z)
+    stateURL = url_for("binaryvle_state", componentA=componentA, componentB=componentB, plot_type=plot_type, T=T, P=P)
+
+    return render_template("binaryvle.html", solver_limit=solver_limit, form=form, graphJSON=graphJSON, plot_type=plot_type, system=system, chemicals=chemicals, plots=plots, errors=errors, exceed=exceed, zoomURL=zoomURL, phasemapURL=phasemapURL, stateURL=stateURL)
+
+def binary_system():
+    # Components, plot type, T and P of a binary plot, from the query string
+    try:
+        components = (chemicals[request.args["componentA"]], chemicals[request.args["componentB"]])
+        plot_type = request.args["plot_type"]
+        T = float(request.args["T"])
+        P = float(request.args["P"])
+    except (KeyError, ValueError):
+        abort(400)
+    # Same ranges as BinaryForm (NaN fails them too)
+    if plot_type not in ("yxP", "yxT", "Txy", "Pxy") or not -70 <= T <= 200 or not 101.3 <= P <= 6000:
+        abort(400)
+    return components, plot_type, T, P
+
+# BINARY VLE ZOOMED CURVE DATA
+@app.route("/binaryvle/zoom")
+@requires_authTHERMO
+def binaryvle_zoom():
+    (xmin, xmax, ymin, ymax), pixels = zoom_window()
+    components, plot_type, T, P = binary_system()
+
+    points = Zoom.refine_phase(components, T, P, plot_type, xmin, xmax, ymin, ymax, pixels)
+    return Response(FigureJSON.dumps(Zoom.phase_traces(points, plot_type)), mimetype="application/json")
 
-    return render_template("binaryvle.html", solver_limit=solver_limit, form=form, graphJSON=graphJSON, plot_type=plot_type, system=system, chemicals=chemicals, plots=plots, errors=errors, exceed=exceed)
+# BINARY VLE CURRENT STATE ONLY
+# For a new T or z on an unchanged curve (same components and P for yxP/T-x-y, same T for yxT/P-x-y)
+# the page only needs the tie-line/current point, which is always the last trace of the plot
+@app.route("/binaryvle/state")
+@requires_authTHERMO
+def binaryvle_state():
+    components, plot_type, T, P = binary_system()
+    try:
+        z = float(request.args["z"])
+    except (KeyError, ValueError):
+        abort(400)
+    # Same range as BinaryForm.z (NaN fails it too)
+    if not 0 <= z <= 1:
+        abort(400)
+
+    system = RachfordRice(2, T, P, list(components), [z, 1-z])
+    traces = plot(system).current_state(plot_type)
+    state = {'x': system.x, 'y': system.y, 'v': system.v, 'z': system.z}
+    return Response(FigureJSON.dumps({'traces': [-1], 'data': traces, 'state': state}), mimetype="application/json")
+
+# BINARY VLE PHASE MAP (V/F over the whole T-P range for one z)
+@app.route("/binaryvle/phasemap")
+@requires_authTHERMO
+def binaryvle_phasemap():
+    try:
+        components = (chemicals[request.args["componentA"]], chemicals[request.args["componentB"]])
+        z = float(request.args["z"])
+        T = float(request.args["T"])
+        P = float(request.args["P"])
+        n = int(request.args.get("n", PhaseMap.MAP_POINTS))
+    except (KeyError, ValueError):
+        abort(400)
+    if not 0 <= z <= 1:
+        abort(400)
+    n = min(max(n, 10), PhaseMap.MAX_MAP_POINTS)
+
+    fig = PhaseMap.phase_map(components, z, T, P, n)
+    return Response(FigureJSON.dumps(fig), mimetype="application/json")
 
 ###############################################################
 
@@ -211,23 +314,143 @@ def idealreactors():
         errors = False
     
     if errors == False:
-        system = RTD(reactorVol, reactorFlow, tracerType)
-        if reactorType == "cstr":
-            Cgraph = system.CSTR(1) #note that code now has this as "n"
-            Egraph = system.CSTR_E(1)
-            Fgraph = system.CSTR_F(1)
-        elif reactorType == "pfr":
-            Cgraph = system.PFR()
-            Egraph = system.PFR_E()
-            Fgraph = system.PFR_F()
+        page = PageStore.ideal_page(reactorType, reactorVol, reactorFlow, tracerType)
+        system = page['system']
+        Cgraph = page['Cgraph']
+        Egraph = page['Egraph']
+        Fgraph = page['Fgraph']
     else:
-        system = RTD(reactorVol, reactorFlow, tracerType)
-        system.length = 0
+        system = PageStore.blank(PageStore.ideal_page(reactorType, reactorVol, reactorFlow, tracerType)['system'])
         Cgraph = False
         Egraph = False
         Fgraph = False
+    zoomURL = url_for("idealreactors_zoom", reactorType=reactorType, reactorVol=reactorVol, reactorFlow=reactorFlow)
+    experimentURL = url_for("idealreactors_experiment")
+    dispersionURL = url_for("idealreactors_dispersion", reactorVol=reactorVol, reactorFlow=reactorFlow)
+    inletURL = url_for("idealreactors_inlet", reactorType=reactorType, reactorVol=reactorVol, reactorFlow=reactorFlow)
+    streamURL = url_for("idealreactors_stream", reactorType=reactorType, reactorVol=reactorVol, reactorFlow=reactorFlow)
 
-    return render_template("idealreactors.html", reactorType=reactorType, tracerType=tracerType, system=system, form=form, errors=errors, Cgraph=Cgraph, Egraph=Egraph, Fgraph=Fgraph)
+    return render_template("idealreactors.html", reactorType=reactorType, tracerType=tracerType, system=system, form=form, errors=errors, Cgraph=Cgraph, Egraph=Egraph, Fgraph=Fgraph, zoomURL=zoomURL, experimentURL=experimentURL, dispersionURL=dispersionURL, inletURL=inletURL, streamURL=streamURL)
+
+# IDEAL PFR/CSTR ZOOMED E/F DATA
+@app.route("/idealreactors/zoom")
+@requires_authRXT
+def idealreactors_zoom():
+    (xmin, xmax, ymin, ymax), pixels = zoom_window()
+    try:
+        reactorType = request.args["reactorType"]
+        kind = request.args["kind"]
+        reactorVol = int(request.args["reactorVol"])
+        reactorFlow = int(request.args["reactorFlow"])
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorType not in ("cstr", "pfr") or kind not in ("E", "F") or reactorVol <= 0 or reactorFlow <= 0:
+        abort(400)
+
+    traces = Zoom.refine_rtd(reactorType, reactorVol, reactorFlow, kind, xmin, xmax, pixels)
+    return Response(FigureJSON.dumps(traces), mimetype="application/json")
+
+# AXIAL DISPERSION E/F FAMILIES (Pe: comma separated Peclet numbers, boundary: open or closed)
+@app.route("/idealreactors/dispersion")
+@requires_authRXT
+def idealreactors_dispersion():
+    try:
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        Pe = [float(value) for value in request.args["Pe"].split(",")]
+        boundary = request.args.get("boundary", "open")
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or boundary not in ("open", "closed") or not 0 < len(Pe) <= MAX_PECLET or not all(0 < p < float("inf") for p in Pe):
+        abort(400)
+
+    system = RTD(reactorVol, reactorFlow, "pulse")
+    return Response('{"E":' + system.dispersion_E(Pe, boundary) + ',"F":' + system.dispersion_F(Pe, boundary) + '}', mimetype="application/json")
+
+# OUTLET CONCENTRATION FOR ANOTHER TRACER INPUT (signal: one of Tracer.SIGNALS; period: of the wave, or the
+# ramp's rise time, up to 100 tau and by default tau)
+@app.route("/idealreactors/inlet")
+@requires_authRXT
+def idealreactors_inlet():
+    try:
+        reactorType = request.args["reactorType"]
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        shape = request.args["signal"]
+        n = float(request.args.get("n", 1))
+        period = float(request.args.get("period", 0))
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorType not in ("cstr", "pfr") or reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or shape not in Tracer.SIGNALS:
+        abort(400)
+    if not (0 < n < float("inf") and 0 <= period <= 100*reactorVol/reactorFlow):
+        abort(400)
+
+    system = RTD(reactorVol, reactorFlow, "arbitrary")
+    return Response('{"C":' + system.inlet_C(reactorType, shape, period or None, n) + '}', mimetype="application/json")
+
+# EXPERIMENTAL E/F FROM AN UPLOADED TRACER LOG (CSV/text, .npy or raw float64 time/C pairs)
+@app.route("/idealreactors/experiment", methods=["POST"])
+@requires_authRXT
+def idealreactors_experiment():
+    upload = request.files.get("tracerlog")
+    if upload is None or not upload.filename:
+        abort(400)
+    # Saved to disk so it can be streamed or memory mapped instead of read into memory
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(upload.filename)[1].lower()) as f:
+        upload.save(f)
+        f.flush()
+        try:
+            moments = Experiment.ingest(f.name)
+        except ValueError:
+            abort(400)
+    Egraph, Fgraph = Experiment.figures(moments)
+    return Response(FigureJSON.dumps({'E': Egraph, 'F': Fgraph, 'moments': moments.summary()}), mimetype="application/json")
+
+# LIVE TRACER FEED OVER SERVER-SENT EVENTS: A SIMULATED SENSOR (OR A RECORDED LOG FROM THE TRACER_LOGS
+# DIRECTORY, log=<file name>) REPLAYED AT speed SECONDS PER SECOND (CLAMPED TO Experiment.MIN/MAX_STREAM_SPEED),
+# WITH E, F, MEAN AND VARIANCE PER SAMPLE
+@app.route("/idealreactors/stream")
+@requires_authRXT
+def idealreactors_stream():
+    try:
+        reactorType = request.args.get("reactorType", "cstr")
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        n = float(request.args.get("n", 1))
+        speed = float(request.args.get("speed", PLAYBACK_SPEED))
+        log = request.args.get("log")
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorType not in ("cstr", "pfr") or reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or not 0 < n < float("inf") or not 0 < speed < float("inf"):
+        abort(400)
+    speed = min(max(speed, Experiment.MIN_STREAM_SPEED), Experiment.MAX_STREAM_SPEED)
+
+    if log:
+        directory = os.environ.get("TRACER_LOGS")
+        if not directory or os.path.basename(log) != log or not os.path.isfile(os.path.join(directory, log)):
+            abort(404)
+        # One pass first for the log's whole area (E and F of each sample) and its length (thinning)
+        try:
+            whole = Experiment.ingest(os.path.join(directory, log))
+        except ValueError:
+            abort(400)
+        total = whole.area
+        rows = Experiment.replay(os.path.join(directory, log), stride=-(-whole.rows // Experiment.MAX_STREAM_ROWS))
+    else:
+        total = Experiment.SENSOR_AMOUNT / reactorFlow
+        rows = Experiment.sensor(reactorType, reactorVol/reactorFlow, reactorFlow, n)
+
+    def events():
+        # Each stream holds a worker thread while it sleeps between samples (see the Procfile), for at
+        # most Experiment.MAX_STREAM_SECONDS
+        moments = Experiment.Moments()
+        for t, C in Experiment.paced(rows, speed):
+            moments.sample(t, C)
+            yield "data: " + FigureJSON.dumps(moments.live(total)) + "\n\n"
+        yield "event: end\ndata: " + FigureJSON.dumps(moments.live(total) if moments.rows else {}) + "\n\n"
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # REAL PFR/CSTR PAGE
 @app.route("/realreactors", methods=["GET","POST"])
@@ -235,13 +458,9 @@ def idealreactors():
 def realreactors():
 
     form = RealReactorForm()
-    # Profs told us to fix V and Q for real reactor application
-    reactorVol = 20       #m3
-    reactorFlow = 2      #m3/s
-    # Array to check for real issues with reactors
-    reasons_for_deadvol = ["poor impeller design", "reactor fouling"]
-    reasons_for_bypass = ["poor outlet design", "poor bed packing"]
-    # reasons_for_both = [] <- can add in when got more ideas
+    # Profs told us to fix V and Q for real reactor application (PageStore.REAL_VOLUME, REAL_FLOW)
+    reactorVol = PageStore.REAL_VOLUME       #m3
+    reactorFlow = PageStore.REAL_FLOW      #m3/s
 
     if form.reactorType.data==None:
         reactorType = "cstr"
@@ -262,44 +481,148 @@ def realreactors():
             problemType = form.problemType_pfr.data
         errors = False
 
+    page = PageStore.real_page(reactorType, tracerType, problemType)
     if errors == False:
-        idealsystem = RTD(reactorVol, reactorFlow, tracerType)
-        realsystem = Real_RTD(reactorVol, reactorFlow, tracerType)
-        if reactorType == "cstr":
-            Cgraph = idealsystem.CSTR(1) #note that code now has this as "n"
-            if problemType in reasons_for_deadvol:
-                realCgraph = realsystem.CSTR_deadvol(1) 
-                realEgraph = realsystem.CSTR_deadvol_E(1)
-                realFgraph = realsystem.CSTR_deadvol_F(1)
-                bypassdeadvolume = "Dead Volume"
-            elif problemType in reasons_for_bypass:
-                realCgraph = realsystem.CSTR_bypass(1) 
-                realEgraph = realsystem.CSTR_bypass_E(1)
-                realFgraph = realsystem.CSTR_bypass_F(1)
-                bypassdeadvolume = "Reactor Bypass"
-        elif reactorType == "pfr":
-            Cgraph = idealsystem.PFR()
-            if problemType in reasons_for_deadvol:
-                realCgraph = realsystem.PFR_deadvol() 
-                realEgraph = realsystem.PFR_deadvol_E()
-                realFgraph = realsystem.PFR_deadvol_F()
-                bypassdeadvolume = "Dead Volume"
-            elif problemType in reasons_for_bypass:
-                realCgraph = realsystem.PFR_bypass() 
-                realEgraph = realsystem.PFR_bypass_E()
-                realFgraph = realsystem.PFR_bypass_F()
-                bypassdeadvolume = "Reactor Bypass"
+        idealsystem = page['idealsystem']
+        realsystem = page['realsystem']
+        Cgraph = page['Cgraph']
+        realCgraph = page['realCgraph']
+        realEgraph = page['realEgraph']
+        realFgraph = page['realFgraph']
     else:
-        idealsystem = RTD(reactorVol, reactorFlow, tracerType)
-        realsystem = Real_RTD(reactorVol, reactorFlow, tracerType)
-        idealsystem.length = 0
-        realsystem.length = 0
+        idealsystem = PageStore.blank(page['idealsystem'])
+        realsystem = PageStore.blank(page['realsystem'])
         Cgraph = False
         realCgraph = False
         realEgraph = False
         realFgraph = False
 
-    return render_template("realreactors.html", form=form, errors=errors, tracerType=tracerType, reactorType=reactorType, problemType=problemType, idealsystem=idealsystem, realsystem=realsystem, Cgraph=Cgraph, realCgraph=realCgraph, realEgraph=realEgraph, realFgraph=realFgraph)
+    sweepURL = url_for("realreactors_sweep", reactorVol=reactorVol, reactorFlow=reactorFlow)
+    sweepStart = page['sweepStart']
+    compartmentsURL = url_for("realreactors_compartments", reactorVol=reactorVol, reactorFlow=reactorFlow)
+    profileURL = url_for("realreactors_profile", reactorVol=reactorVol, reactorFlow=reactorFlow)
+    montecarloURL = url_for("realreactors_montecarlo", reactorType=reactorType, reactorVol=reactorVol, reactorFlow=reactorFlow)
+    animateURL = url_for("realreactors_animate", reactorVol=reactorVol, reactorFlow=reactorFlow)
+
+    return render_template("realreactors.html", form=form, errors=errors, tracerType=tracerType, reactorType=reactorType, problemType=problemType, idealsystem=idealsystem, realsystem=realsystem, Cgraph=Cgraph, realCgraph=realCgraph, realEgraph=realEgraph, realFgraph=realFgraph, sweepURL=sweepURL, sweepStart=sweepStart, compartmentsURL=compartmentsURL, maxCompartments=Compartments.MAX_COMPARTMENTS, profileURL=profileURL, montecarloURL=montecarloURL, maxParticles=Particles.MAX_PARTICLES, animateURL=animateURL, maxSweepFrames=MAX_SWEEP_FRAMES)
+
+def combined_parameters_ok(n, bypass, deadvol, recycle):
+    # Bounds of the combined bypass/dead volume/tanks/recycle model (numbers or arrays; NaN fails them)
+    n, bypass, deadvol, recycle = (np.asarray(p, dtype=float) for p in (n, bypass, deadvol, recycle))
+    return bool(np.all((n > 0) & np.isfinite(n) & (recycle >= 0) & np.isfinite(recycle) &
+                       (bypass >= 0) & (bypass < 1) & (deadvol >= 0) & (deadvol < 1)))
+
+# COMBINED NON-IDEAL MODEL AT A SLIDER POSITION (from the cached sweeps in Real_RTD)
+@app.route("/realreactors/sweep")
+@requires_authRXT
+def realreactors_sweep():
+    try:
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        n, recycle, bypass, deadvol = [float(request.args.get(key, 1 if key == "n" else 0)) for key in ("n", "recycle", "bypass", "deadvol")]
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or not combined_parameters_ok(n, bypass, deadvol, recycle):
+        abort(400)
+
+    time, E, F = combined_curves(reactorVol/reactorFlow, n, recycle, bypass, deadvol)
+    return Response(FigureJSON.dumps({'traces': [0], 'x': [time], 'E': [E], 'F': [F]}), mimetype="application/json")
+
+# ANIMATED SWEEP OF ONE COMBINED MODEL PARAMETER (count values from start to stop, the others fixed)
+@app.route("/realreactors/animate")
+@requires_authRXT
+def realreactors_animate():
+    try:
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        parameter = request.args["parameter"]
+        start, stop = float(request.args["start"]), float(request.args["stop"])
+        count = int(request.args.get("count", 21))
+        fixed = {key: float(request.args.get(key, 1 if key == "n" else 0)) for key in SWEEP_LABELS}
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or parameter not in SWEEP_LABELS or not 2 <= count <= MAX_SWEEP_FRAMES:
+        abort(400)
+    values = np.linspace(start, stop, count)
+    fixed[parameter] = values
+    if not combined_parameters_ok(fixed["n"], fixed["bypass"], fixed["deadvol"], fixed["recycle"]):
+        abort(400)
+
+    time, E, F = parameter_sweep(reactorVol/reactorFlow, parameter, values, **{key: value for key, value in fixed.items() if key != parameter})
+    Egraph, Fgraph = sweep_figures(time, E, F, parameter, values)
+    return Response(FigureJSON.dumps({'E': Egraph, 'F': Fgraph}), mimetype="application/json")
+
+# AXIAL DISPERSION PDE: CONCENTRATION PROFILES ALONG THE REACTOR AND THE OUTLET E/F
+@app.route("/realreactors/profile")
+@requires_authRXT
+def realreactors_profile():
+    try:
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        Pe = float(request.args["Pe"])
+        k = float(request.args.get("k", 0))
+        cells = int(request.args.get("cells", AxialDispersion.CELLS))
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorVol <= 0 or reactorFlow <= 0 or not 2 <= cells <= AxialDispersion.MAX_CELLS:
+        abort(400)
+    # The model rejects a non-finite or non-positive tau or Pe and a non-finite or negative k
+    try:
+        reactor = AxialDispersion.AxialDispersion(reactorVol/reactorFlow, Pe, k, cells)
+    except ValueError:
+        abort(400)
+
+    result, (frame_times, z, field) = reactor.result()
+    profile = AxialDispersion.profile_figure(frame_times, z, field, "Axial Dispersion (Pe = {:g})".format(Pe))
+    return Response(FigureJSON.dumps({'profile': profile, 'x': result.time, 'E': result.E, 'F': result.F}), mimetype="application/json")
+
+# MONTE CARLO E/F OF THE BYPASS/DEAD VOLUME REACTOR, WITH 95% BANDS
+@app.route("/realreactors/montecarlo")
+@requires_authRXT
+def realreactors_montecarlo():
+    try:
+        reactorType = request.args["reactorType"]
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        n = float(request.args.get("n", 1))
+        bypass = float(request.args.get("bypass", 0))
+        deadvol = float(request.args.get("deadvol", 0))
+        particles = int(request.args.get("particles", 100_000))
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorType not in ("cstr", "pfr") or reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or not 0 < n < float("inf"):
+        abort(400)
+    if not (0 <= bypass < 1 and 0 <= deadvol < 1 and 0 < particles <= Particles.MAX_PARTICLES):
+        abort(400)
+
+    tau = reactorVol / reactorFlow
+    # In the request's own thread: a process pool per request would fork the whole server worker
+    result, stats = Particles.run(*Particles.non_ideal(reactorType, tau, n, bypass, deadvol), particles,
+                                  tau*2 if reactorType == "pfr" else tau*5, processes=1)
+    Egraph, Fgraph = Particles.figures(result, stats)
+    summary = {key: value for key, value in stats.items() if np.isscalar(value)}
+    return Response(FigureJSON.dumps({'E': Egraph, 'F': Fgraph, 'stats': summary}), mimetype="application/json")
+
+# COMPARTMENT MODEL C/E/F: n COMPARTMENTS IN SERIES WITH BACKFLOW BETWEEN NEIGHBOURS AND STAGNANT SIDE
+# ZONES (dead_fraction of the volume, swapping exchange flow with their compartment)
+@app.route("/realreactors/compartments")
+@requires_authRXT
+def realreactors_compartments():
+    try:
+        reactorVol = float(request.args["reactorVol"])
+        reactorFlow = float(request.args["reactorFlow"])
+        n = int(request.args.get("n", 1))
+        backflow, dead_fraction, exchange = [float(request.args.get(key, 0)) for key in ("backflow", "dead_fraction", "exchange")]
+    except (KeyError, ValueError):
+        abort(400)
+    if reactorVol <= 0 or reactorFlow <= 0 or not np.isfinite(reactorVol / reactorFlow) or not 1 <= n <= Compartments.MAX_COMPARTMENTS:
+        abort(400)
+    if not (0 <= backflow < float("inf") and 0 <= dead_fraction < 1 and 0 <= exchange < float("inf")):
+        abort(400)
+
+    result = Compartments.backmixed_chain(reactorVol, reactorFlow, n, backflow, dead_fraction, exchange).result()
+    Cgraph, Egraph, Fgraph = Compartments.figures(result, "Compartment Model (n = {})".format(n))
+    return Response(FigureJSON.dumps({'C': Cgraph, 'E': Egraph, 'F': Fgraph}), mimetype="application/json")
 
 ###############################################################
 
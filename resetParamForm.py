@@ -17,9 +17,9 @@ class IdealReactorForm(FlaskForm):
     
     reactorType = SelectField("Type of Reactor: ", choices = [("cstr","CSTR"), ("pfr","PFR")])
 
-    reactorVol = IntegerField("Reactor Volume (V): ", validators=[NumberRange(0, 20, message=("Volume out of range!"))], render_kw={'placeholder': "From 0 - 20"})
+    reactorVol = IntegerField("Reactor Volume (V): ", validators=[NumberRange(1, 20, message=("Volume out of range!"))], render_kw={'placeholder': "From 1 - 20"})
 
-    reactorFlow = IntegerField("Flow Rate (Q): ", validators=[NumberRange(0, 5, message=("Flow rate out of range!"))], render_kw={'placeholder': "From 0 - 5"})
+    reactorFlow = IntegerField("Flow Rate (Q): ", validators=[NumberRange(1, 5, message=("Flow rate out of range!"))], render_kw={'placeholder': "From 1 - 5"})
 
     tracerType = SelectField("Type of Tracer Input: ", choices = [("pulse","Pulse"), ("step","Step")])
 
@@ -0,0 +1,42 @@
+// Range-aware zoom: when a plot is zoomed, fetch curve points refined for the visible window
+// url already carries the query string describing the system, e.g. "/binaryvle/zoom?plot_type=Txy&..."
+function attachZoom(divId, url) {
+    var div = document.getElementById(divId);
+    var original = null;
+
+    div.on('plotly_relayout', function(event) {
+        // Double click resets the axes: put the curves the page was loaded with back
+        if (event['xaxis.autorange'] || event['yaxis.autorange']) {
+            if (original != null) {
+                Plotly.restyle(div, {x: original.x, y: original.y}, original.traces);
+            }
+            return;
+        }
+        if (!('xaxis.range[0]' in event || 'xaxis.range' in event || 'yaxis.range[0]' in event)) {
+            return;
+        }
+        var xrange = div.layout.xaxis.range;
+        var yrange = div.layout.yaxis.range;
+        var query = '&xmin=' + xrange[0] + '&xmax=' + xrange[1] +
+                    '&ymin=' + yrange[0] + '&ymax=' + yrange[1] +
+                    '&pixels=' + Math.round(div.clientWidth);
+
+        fetch(url + query, {credentials: 'same-origin'})
+            .then(function(response) { return response.json(); })
+            .then(function(result) {
+                // Curves that are not drawn yet (E/F before "Display") are left alone
+                for (var i = 0; i < result.traces.length; i++) {
+                    var trace = div.data[result.traces[i]];
+                    if (!trace || !trace.x || trace.x.length == 0) {
+                        return;
+                    }
+                }
+                if (original == null) {
+                    original = {traces: result.traces,
+                                x: result.traces.map(function(i) { return div.data[i].x.slice(); }),
+                                y: result.traces.map(function(i) { return div.data[i].y.slice(); })};
+                }
+                Plotly.restyle(div, {x: result.x, y: result.y}, result.traces);
+            });
+    });
+}
@@ -0,0 +1,24 @@
+import os
+import sys
+import base64
+import pytest
+
+# The app's modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def basic_auth(user, password):
+    return {'Authorization': 'Basic ' + base64.b64encode("{}:{}".format(user, password).encode()).decode()}
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+    app.config['WTF_CSRF_ENABLED'] = False
+    return app.test_client()
+
+@pytest.fixture(scope="session")
+def rxt():
+    return basic_auth('student', 'reactor2116best')
+
+@pytest.fixture(scope="session")
+def thermo():
+    return basic_auth('student', 'thermo2121rox')
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+import Compartments
+import RTDModels
+
+@pytest.mark.parametrize("method", ["expm", "implicit"])
+def test_chain_is_tanks_in_series(method):
+    # n equal compartments without backflow or dead zones: the N-CSTR closed form
+    result = Compartments.backmixed_chain(10, 2, 3).result(method=method)
+    E, F = RTDModels.ncstr(result.time, 5, 3)
+    assert np.abs(result.E - E).max() < 1e-4 * E.max()
+    assert np.abs(result.F - F).max() < 1e-4
+
+def test_direct_stream_is_bypass():
+    reactor = Compartments.Compartments({'a': 8}, [('in', 'a', 1.6), ('a', 'out', 1.6), ('in', 'out', .4)])
+    result = reactor.result()
+    assert result.F[0] == pytest.approx(.2)
+
+def test_unbalanced_streams_raise():
+    with pytest.raises(ValueError):
+        Compartments.Compartments({'a': 1}, [('in', 'a', 1), ('a', 'out', 2)])
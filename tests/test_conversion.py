@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import Conversion
+import RTDModels
+
+TAU = 5
+
+def cstr_curves(n=1):
+    time = np.linspace(0, TAU*20, 4001)
+    E, F = RTDModels.ncstr(time, TAU, n)
+    return time, E, F
+
+@pytest.mark.parametrize("n", [1, 3])
+def test_first_order_tanks(n):
+    # First order: segregation and maximum mixedness both give the tanks-in-series conversion
+    k = np.array([.05, .3, 2])
+    time, E, F = cstr_curves(n)
+    exact = 1 - (1 + k*TAU/n)**-n
+    assert Conversion.segregation(time, E, k, F=F) == pytest.approx(exact, abs=1e-5)
+    assert Conversion.maximum_mixedness(time, F, k) == pytest.approx(exact, abs=1e-3)
+
+def test_second_order_cstr_bounds():
+    # Second order in one CSTR: maximum mixedness is the CSTR design equation, segregation is higher
+    k, C0 = .4, 1
+    time, E, F = cstr_curves()
+    Da = k*TAU*C0
+    cstr = 1 - (np.sqrt(1 + 4*Da) - 1) / (2*Da)
+    assert Conversion.maximum_mixedness(time, F, k, order=2) == pytest.approx(cstr, abs=1e-3)
+    assert Conversion.segregation(time, E, k, order=2, F=F) > cstr
+
+def test_pfr_is_batch():
+    time, E, F = RTDModels.event_model("pfr", TAU, time_end=TAU*2)
+    k = .3
+    assert Conversion.segregation(time, E, k, F=F) == pytest.approx(1 - np.exp(-k*TAU), abs=1e-4)
+
+def test_bypass_leaves_unreacted():
+    time = np.linspace(0, TAU*20, 4001)
+    E, F = RTDModels.combined(time, TAU, 1, bypass=.25)
+    k = .3
+    exact = .75 * (1 - 1/(1 + k*TAU/.75))
+    assert Conversion.segregation(time, E, k, F=F) == pytest.approx(exact, abs=1e-3)
+    assert Conversion.maximum_mixedness(time, F, k) == pytest.approx(exact, abs=1e-3)
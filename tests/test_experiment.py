@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import Experiment
+
+def tracer_log(n=20001):
+    time = np.linspace(0, 40, n)
+    return time, 3 * time * np.exp(-time)
+
+def test_text_log_round_trip(tmp_path):
+    time, C = tracer_log()
+    path = tmp_path / "log.csv"
+    np.savetxt(path, np.stack([time, C], axis=1), delimiter=',', header="time,C", comments='')
+    moments = Experiment.ingest(str(path), chunk_rows=3000)
+    assert moments.rows == time.size
+    assert moments.area == pytest.approx(3, rel=1e-6)
+    # E = t exp(-t): mean 2, variance 2, skewness sqrt(2)
+    assert moments.mean == pytest.approx(2, rel=1e-6)
+    assert moments.variance == pytest.approx(2, rel=1e-5)
+    assert moments.skewness == pytest.approx(np.sqrt(2), rel=1e-4)
+    result = moments.result()
+    assert len(result.time) <= 2 * Experiment.PLOT_POINTS
+    assert result.F[-1] == pytest.approx(1)
+
+@pytest.mark.parametrize("suffix", [".npy", ".bin"])
+def test_binary_log_matches_text(tmp_path, suffix):
+    time, C = tracer_log()
+    path = str(tmp_path / ("log" + suffix))
+    data = np.stack([time, C], axis=1)
+    if suffix == ".npy":
+        np.save(path, data)
+    else:
+        data.astype('<f8').tofile(path)
+    moments = Experiment.ingest(path, chunk_rows=7000)
+    assert moments.mean == pytest.approx(2, rel=1e-6)
+
+def test_samples_one_by_one_match_chunks():
+    time, C = tracer_log(2001)
+    chunked, streamed = Experiment.Moments(), Experiment.Moments()
+    chunked.add(time, C)
+    for t, c in zip(time, C):
+        streamed.sample(t, c)
+    assert streamed.mean == pytest.approx(chunked.mean, rel=1e-12)
+    assert streamed.variance == pytest.approx(chunked.variance, rel=1e-10)
+
+def test_live_F_grows_to_one():
+    # E and F of a live sample are over the whole pulse, not over the area seen so far
+    time, C = tracer_log(2001)
+    moments = Experiment.Moments()
+    F = []
+    for t, c in zip(time, C):
+        moments.sample(t, c)
+        F.append(moments.live(3)['F'])
+    assert F[0] == 0 and F[100] == pytest.approx(1 - 3*np.exp(-2), rel=1e-3)
+    assert F[-1] == pytest.approx(1, rel=1e-4)
+
+def test_pacing_stops_at_the_time_limit():
+    rows = [(t, 0.) for t in range(100)]
+    assert len(list(Experiment.paced(rows, speed=1000, seconds=.05))) == 51
+
+def test_empty_log_raises(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("time,C\n")
+    with pytest.raises(ValueError):
+        Experiment.ingest(str(path))
+
+@pytest.mark.parametrize("delimiter", [',', '\t', ';', ' '])
+def test_text_delimiters_and_headers(tmp_path, delimiter):
+    time, C = tracer_log()
+    path = tmp_path / "log.txt"
+    lines = ["Tracer test 3", "time{}C".format(delimiter), "s{}mg/L".format(delimiter)]
+    lines += ["{:.10g}{}{:.10g}".format(t, delimiter, c) for t, c in zip(time, C)]
+    path.write_text("\n".join(lines))
+    chunks = list(Experiment.read(str(path), chunk_rows=5000))
+    assert sum(len(t) for t, _ in chunks) == time.size
+    moments = Experiment.ingest(str(path), chunk_rows=5000)
+    assert moments.mean == pytest.approx(2, rel=1e-6)
+
+def test_header_does_not_slow_the_first_chunk(tmp_path, monkeypatch):
+    # The header is skipped before loadtxt, so no chunk is parsed line by line
+    time, C = tracer_log(1000)
+    path = tmp_path / "log.csv"
+    np.savetxt(path, np.stack([time, C], axis=1), delimiter=',', header="time,C", comments='')
+    calls = []
+    is_row = Experiment.is_row
+    monkeypatch.setattr(Experiment, "is_row", lambda line, delimiter: calls.append(line) or is_row(line, delimiter))
+    assert Experiment.ingest(str(path)).rows == 1000
+    assert len(calls) < 10
+
+@pytest.mark.parametrize("shape", [(100,), (100, 1), (10, 10, 2)])
+def test_npy_of_wrong_shape_raises(tmp_path, shape):
+    path = str(tmp_path / "log.npy")
+    np.save(path, np.ones(shape))
+    with pytest.raises(ValueError):
+        Experiment.ingest(path)
+
+def test_npy_with_extra_columns(tmp_path):
+    time, C = tracer_log()
+    path = str(tmp_path / "log.npy")
+    np.save(path, np.stack([time, C, C], axis=1))
+    assert Experiment.ingest(path).mean == pytest.approx(2, rel=1e-6)
+
+def test_raw_of_odd_length_raises(tmp_path):
+    path = tmp_path / "log.bin"
+    path.write_bytes(np.arange(5, dtype='<f8').tobytes())
+    with pytest.raises(ValueError):
+        Experiment.ingest(str(path))
@@ -0,0 +1,5 @@
+import FigureBuilder
+
+def test_layouts_validate_against_plotly():
+    # Every skeleton layout, filled as the pages fill it, passes plotly's own validators
+    assert FigureBuilder.validate_all() > 0
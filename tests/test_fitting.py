@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+import Fitting
+import RTDModels
+
+def test_recovers_cstr_parameters():
+    time = np.linspace(0, 60, 600)
+    tau_active = 10 * (1 - .15) / (1 - .1)
+    E, F = RTDModels.ncstr(time, tau_active, 3)
+    result = Fitting.fit(time, .9*E, 10, "cstr", "E")
+    assert result['success']
+    assert result['n'] == pytest.approx(3, rel=1e-4)
+    assert result['bypass'] == pytest.approx(.1, abs=1e-4)
+    assert result['deadvol'] == pytest.approx(.15, abs=1e-4)
+
+def test_batch_keeps_order_and_reports_errors():
+    time = np.linspace(0, 60, 300)
+    datasets = [{'time': time, 'values': RTDModels.ncstr(time, 10, n)[1], 'tau': 10, 'kind': 'F'} for n in (1, 4)]
+    datasets.append({'time': [0, 1], 'values': [0, 1], 'tau': 10})
+    results = Fitting.fit_batch(datasets, processes=1)
+    assert [round(r['n']) for r in results[:2]] == [1, 4]
+    assert not results[2]['success']
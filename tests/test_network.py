@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import Network
+import RTDModels
+
+def shifted_tanks(time, delay, tau, n):
+    E, F = np.zeros_like(time), np.zeros_like(time)
+    later = time > delay
+    E[later], F[later] = RTDModels.ncstr(time[later] - delay, tau, n)
+    return E, F
+
+def away_from(time, jumps):
+    # Points further than 1% of the span from the jumps (the inversion smooths the jumps themselves)
+    span = time.max()
+    return np.all([np.abs(time - jump) > span/100 for jump in list(jumps) + [0]], axis=0)
+
+@pytest.mark.parametrize("n", [1, 5])
+def test_pfr_then_tanks(n):
+    time = np.linspace(0, 30, 1201)
+    network = Network.series(Network.pfr(5), Network.cstr(5, n))
+    E, F = shifted_tanks(time, 5, 5, n)
+    far = away_from(time, [5])
+    assert np.abs(network.E(time) - E)[far].max() < 1e-4 * E.max()
+    assert np.abs(network.F(time) - F)[far].max() < 1e-4
+
+def test_pfr_with_bypass():
+    time = np.linspace(0, 20, 1201)
+    network = Network.parallel((.8, Network.pfr(10)), (.2, None))
+    assert network.instant(20) == pytest.approx(.2)
+    F = .2 + .8*(time >= 10)
+    far = away_from(time, [10])
+    assert np.abs(network.F(time) - F)[far].max() < 1e-4
+    # E is the delayed spike, near 0 elsewhere
+    assert np.abs(network.E(time)[far]).max() < 1e-2
+
+def test_non_ideal_matches_combined():
+    # Tanks with bypass, dead volume and recycle (no delay: the Talbot inversion)
+    time = np.linspace(0, 60, 601)
+    network = Network.non_ideal(lambda tau: Network.cstr(tau, 2), 10, bypass=.2, deadvol=.1, recycle_ratio=1)
+    E, F = RTDModels.combined(time, 10, 2, bypass=.2, deadvol=.1, recycle=1)
+    assert np.abs(network.F(time) - F)[1:].max() < 1e-6
+    assert np.abs(network.E(time) - E)[1:].max() < 1e-6 * E[1:].max()
@@ -0,0 +1,30 @@
+import os
+import orjson
+import FigureJSON
+import PageStore
+
+def test_store_round_trip(tmp_path):
+    store = str(tmp_path)
+    index = PageStore.build(store)
+    assert len(index) == 2*20*5*2 + 8
+    assert PageStore.read_index(store) == index
+    # A store that matches the code is not built again
+    written = os.path.getmtime(os.path.join(store, "index.json"))
+    assert PageStore.ensure(store) == index
+    assert os.path.getmtime(os.path.join(store, "index.json")) == written
+    key = PageStore.ideal_key("pfr", 7, 3, "step")
+    with open(PageStore.blob_path(index[key], store), 'rb') as f:
+        assert orjson.loads(f.read()) == orjson.loads(FigureJSON.dumps(PageStore.compute_ideal("pfr", 7, 3, "step")))
+
+def test_missing_store_is_not_built(tmp_path):
+    assert PageStore.open_index(str(tmp_path)) == {}
+    assert os.listdir(tmp_path) == []
+    PageStore.open_index()
+
+def test_fingerprint_follows_library_versions(monkeypatch):
+    current = PageStore.fingerprint()
+    for module in (PageStore.np, PageStore.scipy, PageStore.plotly):
+        with monkeypatch.context() as patch:
+            patch.setattr(module, "__version__", module.__version__ + ".post1")
+            assert PageStore.fingerprint() != current
+    assert PageStore.fingerprint() == current
@@ -0,0 +1,17 @@
+import numpy as np
+import PhaseMap
+
+COMPONENTS = ("Propane", "n-Butane")
+
+def test_chunked_grid_matches_one_chunk(tmp_path):
+    T, P, z = np.linspace(0, 80, 7), np.linspace(200, 2000, 5), np.linspace(0, 1, 4)
+    whole = PhaseMap.flash_grid(COMPONENTS, T, P, z)
+    chunked = PhaseMap.flash_grid(COMPONENTS, T, P, z, max_cells=6)
+    assert np.array_equal(whole, chunked, equal_nan=True)
+    path = str(tmp_path / "study.npy")
+    assert PhaseMap.export_study(COMPONENTS, T, P, z, path, dtype='float64') == (7, 5, 4)
+    assert np.array_equal(np.load(path), whole, equal_nan=True)
+
+def test_map_is_a_figure():
+    fig = PhaseMap.phase_map(COMPONENTS, .5, n=20)
+    assert fig['data'] and fig['layout']
@@ -0,0 +1,175 @@
+import json
+import pytest
+
+BINARY = "componentA=met&componentB=ethy&plot_type=yxP&P=500"
+IDEAL_ZOOM = "/idealreactors/zoom?reactorType=cstr&kind=E&reactorVol=10&reactorFlow=2&ymin=0&ymax=1"
+
+@pytest.mark.parametrize("url", [
+    "/binaryvle/zoom?{}&T=nan&xmin=0&xmax=1&ymin=0&ymax=1".format(BINARY),
+    "/binaryvle/zoom?{}&T=20&xmin=nan&xmax=1&ymin=0&ymax=1".format(BINARY),
+    "/binaryvle/zoom?{}&T=20&xmin=0&xmax=1&ymin=0&ymax=1&pixels=-5".format(BINARY),
+    "/binaryvle/phasemap?componentA=met&componentB=ethy&T=20&P=500&z=1.5",
+])
+def test_binary_routes_reject_bad_input(client, thermo, url):
+    assert client.get(url, headers=thermo).status_code == 400
+
+@pytest.mark.parametrize("url", [
+    IDEAL_ZOOM + "&xmin=5&xmax=5",
+    IDEAL_ZOOM + "&xmin=5&xmax=inf",
+    "/idealreactors/zoom?reactorType=cstr&kind=E&reactorVol=0&reactorFlow=2&xmin=0&xmax=1&ymin=0&ymax=1",
+    "/idealreactors/dispersion?reactorVol=10&reactorFlow=2&Pe=nan",
+    "/idealreactors/dispersion?reactorVol=10&reactorFlow=2&Pe=1&boundary=both",
+    "/idealreactors/dispersion?reactorVol=nan&reactorFlow=2&Pe=1",
+    "/realreactors/montecarlo?reactorType=cstr&reactorVol=20&reactorFlow=2&bypass=1",
+    "/realreactors/montecarlo?reactorType=cstr&reactorVol=20&reactorFlow=2&n=nan",
+    "/realreactors/montecarlo?reactorType=cstr&reactorVol=inf&reactorFlow=2",
+    "/realreactors/profile?reactorVol=20&reactorFlow=2&Pe=-5",
+    "/realreactors/profile?reactorVol=20&reactorFlow=2&Pe=nan",
+    "/realreactors/profile?reactorVol=20&reactorFlow=2&Pe=inf",
+    "/realreactors/profile?reactorVol=20&reactorFlow=2&Pe=10&k=nan",
+    "/realreactors/profile?reactorVol=20&reactorFlow=nan&Pe=10",
+    "/realreactors/animate?reactorVol=20&reactorFlow=2&parameter=bypass&start=0&stop=2",
+])
+def test_reactor_routes_reject_bad_input(client, rxt, url):
+    assert client.get(url, headers=rxt).status_code == 400
+
+def test_narrow_zoom_window_is_cheap(client, rxt):
+    response = client.get(IDEAL_ZOOM + "&xmin=4.9999&xmax=5&pixels=2000", headers=rxt)
+    assert response.status_code == 200
+    assert len(response.get_json()['x'][0]) < 5000
+
+def test_routes_need_login(client):
+    assert client.get("/idealreactors").status_code == 401
+
+@pytest.mark.parametrize("z", ["1.5", "-0.1", "nan"])
+def test_binary_state_rejects_bad_z(client, thermo, z):
+    url = "/binaryvle/state?{}&T=-20&z={}".format(BINARY, z)
+    assert client.get(url, headers=thermo).status_code == 400
+
+def test_binary_state_is_last_trace(client, thermo):
+    result = client.get("/binaryvle/state?{}&T=-20&z=0.5".format(BINARY), headers=thermo).get_json()
+    assert result['traces'] == [-1] and len(result['data']) == 1
+    assert result['state']['z'] == [.5, .5]
+    assert b"/binaryvle/state?" in client.get("/binaryvle", headers=thermo).data
+
+@pytest.mark.parametrize("name, content", [
+    ("log.npy", "vector"),
+    ("log.bin", b"\0" * 24),
+    ("log.csv", b"time,C\n"),
+])
+def test_bad_tracer_logs_are_400(client, rxt, name, content):
+    import io
+    import numpy as np
+    if content == "vector":
+        buffer = io.BytesIO()
+        np.save(buffer, np.ones(10))
+        content = buffer.getvalue()
+    response = client.post("/idealreactors/experiment", headers=rxt,
+                           data={'tracerlog': (io.BytesIO(content), name)}, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+SWEEP = "/realreactors/sweep?reactorVol=20&reactorFlow=2"
+ANIMATE = "/realreactors/animate?reactorVol=20&reactorFlow=2&parameter=bypass&start=0&stop=.5"
+
+@pytest.mark.parametrize("query", ["&n=nan", "&n=0", "&n=inf", "&recycle=-1", "&bypass=1", "&deadvol=-0.1", "&bypass=nan"])
+def test_combined_model_routes_check_bounds(client, rxt, query):
+    assert client.get(SWEEP + query, headers=rxt).status_code == 400
+    # The fixed parameters of an animation (the swept one comes from start and stop)
+    swept = "parameter=n&start=1&stop=3" if "bypass" in query else "parameter=bypass&start=0&stop=.5"
+    url = ANIMATE.replace("parameter=bypass&start=0&stop=.5", swept)
+    assert client.get(url, headers=rxt).status_code == 200
+    assert client.get(url + query, headers=rxt).status_code == 400
+
+@pytest.mark.parametrize("flow", ["0", "-2", "nan"])
+def test_combined_model_routes_need_a_flow(client, rxt, flow):
+    for url in (SWEEP, ANIMATE):
+        assert client.get(url.replace("reactorFlow=2", "reactorFlow=" + flow), headers=rxt).status_code == 400
+
+def test_combined_model_routes(client, rxt):
+    assert client.get(SWEEP + "&n=3&recycle=1&bypass=.1&deadvol=.2", headers=rxt).status_code == 200
+    assert client.get(ANIMATE + "&count=5&n=2", headers=rxt).status_code == 200
+
+COMPARTMENTS = "/realreactors/compartments?reactorVol=20&reactorFlow=2"
+
+@pytest.mark.parametrize("query", ["&n=0", "&n=1.5", "&n=100000", "&backflow=-1", "&dead_fraction=1", "&exchange=nan"])
+def test_compartments_route_rejects_bad_input(client, rxt, query):
+    assert client.get(COMPARTMENTS + query, headers=rxt).status_code == 400
+
+def test_compartments_route_is_on_the_real_page(client, rxt):
+    result = client.get(COMPARTMENTS + "&n=20&backflow=1&dead_fraction=.2&exchange=.5", headers=rxt).get_json()
+    assert set(result) == {'C', 'E', 'F'}
+    assert result['F']['frames'][-1]['data'][0]['y'][-1] == pytest.approx(1, abs=1e-3)
+    assert b"/realreactors/compartments?" in client.get("/realreactors", headers=rxt).data
+
+def test_profile_route_is_on_the_pfr_page(client, rxt):
+    data = {'reactorType': "pfr", 'tracerType': "pulse", 'problemType_cstr': "poor impeller design",
+            'problemType_pfr': "reactor fouling"}
+    page = client.post("/realreactors", headers=rxt, data=data).data
+    assert b"/realreactors/profile?" in page
+    assert b"/realreactors/profile?" not in client.get("/realreactors", headers=rxt).data
+    result = client.get("/realreactors/profile?reactorVol=20&reactorFlow=2&Pe=20&cells=200", headers=rxt).get_json()
+    assert result['F'][-1] == pytest.approx(1, abs=1e-2)
+
+def test_dispersion_route_is_on_the_ideal_page(client, rxt):
+    assert b"/idealreactors/dispersion?" in client.get("/idealreactors", headers=rxt).data
+    result = client.get("/idealreactors/dispersion?reactorVol=10&reactorFlow=2&Pe=1,20&boundary=closed", headers=rxt).get_json()
+    assert [trace['name'] for trace in result['E']['data']] == ["Pe = 1", "Pe = 20"]
+
+def test_montecarlo_route_is_on_the_real_page(client, rxt):
+    page = client.get("/realreactors", headers=rxt).data
+    assert b"/realreactors/montecarlo?reactorType=cstr&" in page
+    result = client.get("/realreactors/montecarlo?reactorType=cstr&reactorVol=20&reactorFlow=2&bypass=.2&particles=20000", headers=rxt).get_json()
+    assert result['stats']['instant'] == pytest.approx(.2, abs=.02)
+
+def test_animate_route_is_on_the_real_page(client, rxt):
+    assert b"/realreactors/animate?" in client.get("/realreactors", headers=rxt).data
+
+def test_stream_sends_F_of_the_whole_pulse(client, rxt):
+    # Speeds above the most allowed are clamped to it, not refused
+    response = client.get("/idealreactors/stream?reactorType=cstr&reactorVol=20&reactorFlow=2&speed=1e9", headers=rxt)
+    samples = [json.loads(line[6:]) for line in response.get_data(as_text=True).split("\n") if line.startswith("data: ")]
+    F = [sample['F'] for sample in samples]
+    assert F[1] < .1 and F[-1] == pytest.approx(1, abs=.05)
+    assert all(sample['E'] is not None for sample in samples)
+
+@pytest.mark.parametrize("query", ["&speed=0", "&speed=nan", "&speed=inf", "&n=nan", "&reactorFlow=0"])
+def test_stream_rejects_bad_input(client, rxt, query):
+    url = "/idealreactors/stream?reactorType=cstr&reactorVol=2&reactorFlow=2" + query
+    assert client.get(url.replace("reactorFlow=2&reactorFlow", "reactorFlow"), headers=rxt).status_code == 400
+
+def test_stream_replays_a_thinned_log(client, rxt, tmp_path, monkeypatch):
+    import numpy as np
+    time = np.linspace(0, 40, 20001)
+    np.savetxt(tmp_path / "log.csv", np.stack([time, 3 * time * np.exp(-time)], axis=1), delimiter=',')
+    monkeypatch.setenv("TRACER_LOGS", str(tmp_path))
+    response = client.get("/idealreactors/stream?reactorVol=20&reactorFlow=2&speed=1000&log=log.csv", headers=rxt)
+    samples = [json.loads(line[6:]) for line in response.get_data(as_text=True).split("\n") if line.startswith("data: ")]
+    assert len(samples) <= 2001 + 1
+    assert samples[-1]['F'] == pytest.approx(1, abs=1e-3)
+
+@pytest.mark.parametrize("volume, flow", [(0, 2), (10, 0)])
+def test_ideal_page_refuses_empty_reactor(client, rxt, volume, flow):
+    data = {'reactorType': "cstr", 'reactorVol': volume, 'reactorFlow': flow, 'tracerType': "pulse"}
+    response = client.post("/idealreactors", headers=rxt, data=data)
+    assert response.status_code == 200
+    assert b"out of range!" in response.data
+
+def test_montecarlo_route_runs_in_its_own_thread(client, rxt, monkeypatch):
+    import Particles
+    def no_pool(*args, **kwargs):
+        raise AssertionError("the route started a process pool")
+    monkeypatch.setattr(Particles, "ProcessPoolExecutor", no_pool)
+    url = "/realreactors/montecarlo?reactorType=cstr&reactorVol=20&reactorFlow=2&particles={}".format(2 * Particles.CHUNK)
+    assert client.get(url, headers=rxt).status_code == 200
+
+INLET = "/idealreactors/inlet?reactorType=cstr&reactorVol=10&reactorFlow=2"
+
+@pytest.mark.parametrize("query", ["&signal=pulse", "&signal=ramp&period=-1", "&signal=ramp&period=nan", "&signal=square&period=1e6", "&signal=step&n=0"])
+def test_inlet_route_rejects_bad_input(client, rxt, query):
+    assert client.get(INLET + query, headers=rxt).status_code == 400
+
+def test_inlet_route_is_on_the_ideal_page(client, rxt):
+    assert b"/idealreactors/inlet?" in client.get("/idealreactors", headers=rxt).data
+    figure = client.get(INLET + "&signal=ramp&period=2", headers=rxt).get_json()['C']
+    assert [trace['name'] for trace in figure['data']] == ["Inlet", "Outlet"]
+    assert figure['data'][1]['y'][-1] == pytest.approx(1, abs=1e-2)
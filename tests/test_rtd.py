@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import RTD
+import Real_RTD
+
+@pytest.mark.parametrize("type", ["pulse", "step"])
+def test_cstr_c_plots_reuse_the_e_f_kernel(monkeypatch, type):
+    grids = []
+    kernel = RTD.rtd_kernel.__wrapped__
+    def recording(reactorType, tau, n, dt, time_end, bypass=0, deadvol=0):
+        grids.append(dt)
+        return kernel(reactorType, tau, n, dt, time_end, bypass, deadvol)
+    monkeypatch.setattr(RTD, "rtd_kernel", recording)
+    RTD.RTD(10, 2, type).CSTR(3)
+    real = Real_RTD.Real_RTD(50, 2, type)
+    real.CSTR_bypass(3)
+    real.CSTR_deadvol(3)
+    # Every evaluation is on the E/F views' event-aware grid, none on the C_DT one
+    assert grids and all(dt is None for dt in grids)
+
+def test_resample_reads_the_curves_on_a_uniform_grid():
+    result = RTD.RTD(10, 2, "pulse").kernel("cstr", 2)
+    resampled = result.resample(RTD.C_DT)
+    assert np.allclose(np.diff(resampled.time), RTD.C_DT)
+    assert resampled.time[-1] < result.time_end
+    t = resampled.time
+    # Two tanks of tau/2: E = t exp(-2t/tau)(2/tau)^2
+    tau = 5
+    assert np.max(np.abs(resampled.E - t*np.exp(-2*t/tau)*(2/tau)**2)) < 1e-3*resampled.E.max()
+    assert np.max(np.abs(resampled.F - result.interp(t, 'F'))) == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import RTDModels
+
+def test_matches_rtdpy():
+    pytest.importorskip("rtdpy")
+    worst = RTDModels.check_against_rtdpy()
+    # F differs from rtdpy's trapezoid integral by its O(dt^2) error
+    assert worst['E'] < 1e-8
+    assert worst['F'] < 5e-3
+
+@pytest.mark.parametrize("n", [1, 2, 3.5, 10])
+def test_ncstr_area_and_mean(n):
+    time = np.linspace(0, 100, 20001)
+    E, F = RTDModels.ncstr(time, 5, n)
+    assert np.trapz(E, time) == pytest.approx(1, abs=1e-6)
+    assert np.trapz(time*E, time) == pytest.approx(5, rel=1e-6)
+    assert F[-1] == pytest.approx(1)
+
+def test_event_model_pfr_spike_at_tau():
+    time, E, F = RTDModels.event_model("pfr", 5, time_end=10)
+    assert time[E.argmax()] == 5
+    assert np.trapz(E, time) == pytest.approx(1)
+    assert F[0] == 0 and F[-1] == 1
+
+def test_combined_bypass_leaves_at_zero():
+    time = np.linspace(0, 200, 20001)
+    E, F = RTDModels.combined(time, 10, 2, bypass=.2, deadvol=.1)
+    assert F[0] == pytest.approx(.2)
+    assert F[-1] == pytest.approx(1, abs=1e-4)
+
+def test_closed_dispersion_moments():
+    # Closed-closed vessel: mean tau, variance 2D - 2D^2 (1 - exp(-1/D)) in tau^2
+    time = np.linspace(0, 50, 5001)
+    D = .1
+    E, F = RTDModels.closed_dispersion(time, 5, D)
+    mean = np.trapz(time*E, time)
+    assert mean == pytest.approx(5, rel=1e-3)
+    variance = np.trapz((time - mean)**2*E, time) / 25
+    assert variance == pytest.approx(2*D - 2*D**2*(1 - np.exp(-1/D)), rel=1e-2)
+
+def test_combined_bypass_drawings():
+    time = np.linspace(0, 50, 501)
+    spike, F = RTDModels.combined(time, 10, 2, bypass=[.1, .3])
+    height, F_height = RTDModels.combined(time, 10, 2, bypass=[.1, .3], bypass_as="height")
+    assert np.array_equal(F, F_height) and np.array_equal(spike[:, 1:], height[:, 1:])
+    assert list(spike[:, 0] * (time[1] - time[0]) / 2) == pytest.approx([.1, .3])
+    assert list(height[:, 0]) == pytest.approx([.1, .3])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import Tracer
+import RTDModels
+
+def smeared_test(points=4000, noise=0.):
+    # A 3-CSTR E (tau 10) behind a smeared Gaussian injection, with the measured outlet
+    dt = 100 / points
+    time = np.arange(points) * dt
+    E = RTDModels.ncstr(time, 10, 3)[0]
+    inlet = np.exp(-((time - 2) / .7)**2)
+    outlet = Tracer.outlet(inlet, E, dt)
+    outlet += np.random.default_rng(0).normal(0, noise * outlet.max(), points)
+    return time, dt, E, inlet, outlet
+
+@pytest.mark.parametrize("nonnegative", [False, True])
+def test_deconvolve_recovers_E(nonnegative):
+    time, dt, E, inlet, outlet = smeared_test(noise=.002)
+    recovered = Tracer.deconvolve(inlet, outlet, dt, length=2400, nonnegative=nonnegative)
+    assert recovered.size == 2400
+    assert np.abs(recovered - E[:2400]).max() < .02 * E.max()
+    assert Tracer.mean_residence_time(time[:2400], recovered) == pytest.approx(10, rel=.02)
+    if nonnegative:
+        assert recovered.min() >= 0
+
+def test_nonnegative_iterations_scale_with_size(monkeypatch):
+    # The iteration budget shrinks as the FFTs grow
+    time, dt, E, inlet, outlet = smeared_test(points=20000)
+    monkeypatch.setattr(Tracer, "WORK", 1)
+    calls = []
+    rfft = Tracer.fft.rfft
+    monkeypatch.setattr(Tracer.fft, "rfft", lambda *args: calls.append(1) or rfft(*args))
+    Tracer.deconvolve(inlet, outlet, dt, nonnegative=True, tol=0)
+    # Three transforms to set up, then two per iteration
+    assert len(calls) == 3 + 2*Tracer.MIN_ITER
+
+@pytest.mark.parametrize("n", [1, 3])
+def test_step_into_tanks_is_F(n):
+    from RTD import RTD
+    dt = .01
+    result = RTD(10, 2, "arbitrary").outlet("cstr", Tracer.step(np.arange(0, 25, dt)), dt, n)
+    F = RTDModels.ncstr(result.time, 5, n)[1]
+    assert np.abs(result.C - F).max() < 1e-5
+
+def test_real_reactor_step_with_bypass():
+    # A step into the bypassed CSTR: the bypassed fraction arrives at once, the rest as the tank's F
+    from Real_RTD import Real_RTD
+    dt = .01
+    result = Real_RTD(20, 2, "arbitrary").outlet("cstr", "bypass", Tracer.step(np.arange(0, 50, dt)), dt)
+    F = .2 + .8 * RTDModels.ncstr(result.time, 10/.8, 1)[1]
+    assert np.abs(result.C[1:] - F[1:]).max() < 1e-5
+
+def test_pulse_into_tanks_is_E():
+    from RTD import RTD
+    dt = .01
+    time = np.arange(0, 25, dt)
+    result = RTD(10, 2, "arbitrary").outlet("cstr", Tracer.pulse(time, 100, 2), dt, 2)
+    assert np.abs(result.C - 50 * RTDModels.ncstr(time, 5, 2)[0]).max() < 1e-9